@@ -0,0 +1,137 @@
+"""
+Maintenance des tables d'historique partitionnées (`activities`, `audit_log`):
+création des partitions mensuelles, agrégats journaliers et rétention.
+"""
+import os
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import text
+
+from app.core.partitions import (
+    add_months, month_start, ensure_monthly_partitions, drop_partitions_before, is_partitioned,
+)
+from app.core.scheduler import exclusive_job
+from app.activities.timeline import timeline_enabled, trim_timelines
+
+logger = logging.getLogger(__name__)
+
+# Nombre de mois de partitions créés à l'avance
+PARTITIONS_MONTHS_AHEAD = int(os.getenv("PARTITIONS_MONTHS_AHEAD", "2"))
+# Rétention globale en mois (suppression de partitions entières, 0 = illimitée).
+# Désactivée par défaut: l'historique n'est supprimé que sur configuration explicite
+ACTIVITY_RETENTION_MONTHS = int(os.getenv("ACTIVITY_RETENTION_MONTHS", "0"))
+AUDIT_LOG_RETENTION_MONTHS = int(os.getenv("AUDIT_LOG_RETENTION_MONTHS", "0"))
+# Rétention par type d'action, en jours (ex: "login_failed:30,user_login:90", vide = aucune)
+ACTIVITY_RETENTION_DAYS = os.getenv("ACTIVITY_RETENTION_DAYS", "")
+# Nombre de jours recalculés à chaque passage des agrégats journaliers
+ACTIVITY_ROLLUP_DAYS = int(os.getenv("ACTIVITY_ROLLUP_DAYS", "2"))
+
+PARTITIONED_TABLES = ("activities", "audit_log")
+
+ROLLUP_STATS_SQL = text("""
+    INSERT INTO activity_daily_stats (day, action_type, event_count, user_count)
+    SELECT created_at::date, action_type, COUNT(*), COUNT(DISTINCT user_id)
+    FROM activities
+    WHERE created_at >= :since AND created_at < :until
+    GROUP BY created_at::date, action_type
+    ON CONFLICT (day, action_type) DO UPDATE
+    SET event_count = EXCLUDED.event_count, user_count = EXCLUDED.user_count
+""")
+
+ROLLUP_USERS_SQL = text("""
+    INSERT INTO activity_daily_users (day, user_id)
+    SELECT DISTINCT created_at::date, user_id
+    FROM activities
+    WHERE created_at >= :since AND created_at < :until AND user_id IS NOT NULL
+    ON CONFLICT DO NOTHING
+""")
+
+
+def parse_retention(value: str) -> Dict[str, int]:
+    """Parse "action:jours,action:jours" en dictionnaire (entrées invalides ignorées)"""
+    retention = {}
+    for entry in (value or "").split(","):
+        action, _, days = entry.strip().partition(":")
+        if action and days.strip().isdigit() and int(days) > 0:
+            retention[action] = int(days)
+    return retention
+
+
+async def rollup_available(conn) -> bool:
+    """Tables d'agrégats présentes (absentes si le schéma vient de create_all, sans migrations)"""
+    result = await conn.execute(text("SELECT to_regclass('activity_daily_stats') IS NOT NULL"))
+    return bool(result.scalar())
+
+
+async def last_rollup_day(conn) -> Optional[date]:
+    """
+    Dernier jour présent dans les agrégats journaliers: les jours antérieurs sont clos
+    et complets. None si les agrégats sont absents ou vides.
+    """
+    if not await rollup_available(conn):
+        return None
+    result = await conn.execute(text("SELECT MAX(day) FROM activity_daily_stats"))
+    return result.scalar()
+
+
+async def rollup_daily_activity(conn, since: date, until: date):
+    """Recalcule les agrégats journaliers pour les jours [since, until["""
+    params = {"since": since, "until": until}
+    await conn.execute(text("DELETE FROM activity_daily_stats WHERE day >= :since AND day < :until"), params)
+    await conn.execute(ROLLUP_STATS_SQL, params)
+    await conn.execute(ROLLUP_USERS_SQL, params)
+
+
+async def apply_retention(conn, now: datetime) -> int:
+    """Applique les rétentions par type d'action puis supprime les partitions expirées"""
+    deleted = 0
+    for action_type, days in parse_retention(ACTIVITY_RETENTION_DAYS).items():
+        result = await conn.execute(
+            text("DELETE FROM activities WHERE action_type = :action_type AND created_at < :cutoff"),
+            {"action_type": action_type, "cutoff": now - timedelta(days=days)},
+        )
+        deleted += result.rowcount or 0
+
+    for table, months in (("activities", ACTIVITY_RETENTION_MONTHS), ("audit_log", AUDIT_LOG_RETENTION_MONTHS)):
+        if months > 0:
+            await drop_partitions_before(conn, table, add_months(month_start(now), -months))
+    return deleted
+
+
+async def run_activity_maintenance():
+    """Job périodique: partitions à venir, agrégats journaliers, puis rétention"""
+    async with exclusive_job("activity_maintenance") as conn:
+        if conn is None:
+            return
+
+        now = datetime.utcnow()
+        for table in PARTITIONED_TABLES:
+            # Tables créées par create_all (sans migrations): pas de partitions à gérer
+            if not await is_partitioned(conn, table):
+                logger.debug("Table %s non partitionnée, partitions ignorées", table)
+                continue
+            await ensure_monthly_partitions(conn, table, now, PARTITIONS_MONTHS_AHEAD, column="created_at")
+        await conn.commit()
+
+        # Les agrégats sont calculés avant la rétention pour ne pas perdre l'historique.
+        # Après une interruption du planificateur, le calcul reprend au dernier jour agrégé
+        today = now.date()
+        since = today - timedelta(days=max(ACTIVITY_ROLLUP_DAYS - 1, 0))
+        if await rollup_available(conn):
+            last_day = await last_rollup_day(conn)
+            if last_day is not None and last_day < since:
+                since = last_day
+            await rollup_daily_activity(conn, since, today + timedelta(days=1))
+            await conn.commit()
+
+        deleted = await apply_retention(conn, now)
+        await conn.commit()
+        if deleted:
+            logger.info("Activités supprimées par la rétention: %d", deleted)
+
+        if timeline_enabled():
+            trimmed = await trim_timelines(conn)
+            await conn.commit()
+            if trimmed:
+                logger.info("Entrées de timeline tronquées: %d", trimmed)
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, Query
-from sqlmodel import select, or_
+from sqlmodel import select
+from sqlalchemy import text
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
 
-from app.models import Activity, User, Wishlist, WishlistShare, GroupMember
+from app.models import Activity, User
 from app.auth.deps import get_current_user
 from app.core.async_db import async_engine
+from app.core.responses import model_response
+from app.activities.timeline import FEED_CANDIDATES_SQL, TIMELINE_FEED_SQL, ensure_timeline, timeline_enabled
 
 router = APIRouter(prefix="/activities", tags=["activities"])
 
@@ -70,6 +73,45 @@ ACTION_LABELS = {
 def get_action_info(action_type: str):
     return ACTION_LABELS.get(action_type, (action_type, "activity", "gray"))
 
+# Feed en une seule requête:
+# - `accessible` et `candidates` (app.activities.timeline.FEED_CANDIDATES_SQL): pour chaque
+#   liste accessible, seulement les `window` activités les plus récentes
+# - jointure finale sur users/wishlists pour renvoyer username et titre sans requêtes supplémentaires
+FEED_SQL = text(f"""
+    WITH {FEED_CANDIDATES_SQL},
+    page AS (
+        SELECT DISTINCT id, created_at FROM candidates
+        ORDER BY created_at DESC, id DESC
+        OFFSET :offset
+        LIMIT :limit
+    )
+    SELECT a.id, a.user_id, u.username, a.action_type, a.target_type, a.target_id,
+           a.target_name, a.wishlist_id, w.title AS wishlist_title, a.created_at
+    FROM page p
+    JOIN activities a ON a.id = p.id AND a.created_at = p.created_at
+    LEFT JOIN users u ON u.id = a.user_id
+    LEFT JOIN wishlists w ON w.id = a.wishlist_id
+    ORDER BY a.created_at DESC, a.id DESC
+""")
+
+def activity_row_to_response(row) -> ActivityResponse:
+    label, icon, color = get_action_info(row["action_type"])
+    return ActivityResponse(
+        id=row["id"],
+        user_id=row["user_id"],
+        username=row.get("username"),
+        action_type=row["action_type"],
+        action_label=label,
+        target_type=row["target_type"],
+        target_id=row["target_id"],
+        target_name=row["target_name"],
+        wishlist_id=row["wishlist_id"],
+        wishlist_title=row.get("wishlist_title"),
+        created_at=row["created_at"],
+        icon=icon,
+        color=color
+    )
+
 # =====================================================
 # ROUTES
 # =====================================================
@@ -85,91 +127,15 @@ async def get_activity_feed(
     Récupérer le feed d'activités de l'utilisateur.
     Inclut: ses propres activités + activités sur listes partagées avec lui
     """
-    # 1. Récupérer les IDs des listes de l'utilisateur
-    my_lists_result = await session.exec(
-        select(Wishlist.id).where(Wishlist.owner_id == current_user.id)
-    )
-    my_list_ids = list(my_lists_result.all())
-    
-    # 2. Récupérer les IDs des listes partagées avec l'utilisateur
-    shared_list_ids = []
-    
-    # Partages directs
-    direct_shares = await session.exec(
-        select(WishlistShare.wishlist_id).where(
-            WishlistShare.target_user_id == current_user.id,
-            WishlistShare.share_type == "internal",
-            WishlistShare.is_active == True
-        )
-    )
-    shared_list_ids.extend(direct_shares.all())
-    
-    # Partages via groupes
-    my_groups = await session.exec(
-        select(GroupMember.group_id).where(GroupMember.user_id == current_user.id)
-    )
-    group_ids = list(my_groups.all())
-    
-    if group_ids:
-        group_shares = await session.exec(
-            select(WishlistShare.wishlist_id).where(
-                WishlistShare.target_group_id.in_(group_ids),
-                WishlistShare.share_type == "internal",
-                WishlistShare.is_active == True
-            )
-        )
-        shared_list_ids.extend(group_shares.all())
-    
-    # Combiner tous les IDs de listes accessibles
-    all_list_ids = list(set(my_list_ids + shared_list_ids))
-    
-    # 3. Récupérer les activités
-    query = select(Activity).where(
-        or_(
-            Activity.user_id == current_user.id,  # Mes activités
-            Activity.wishlist_id.in_(all_list_ids) if all_list_ids else False  # Activités sur mes listes
-        )
-    ).order_by(Activity.created_at.desc()).offset(offset).limit(limit)
-    
-    result = await session.exec(query)
-    activities = result.all()
-    
-    # 4. Enrichir avec les infos utilisateur et wishlist
-    responses = []
-    for activity in activities:
-        label, icon, color = get_action_info(activity.action_type)
-        
-        response = ActivityResponse(
-            id=activity.id,
-            user_id=activity.user_id,
-            action_type=activity.action_type,
-            action_label=label,
-            target_type=activity.target_type,
-            target_id=activity.target_id,
-            target_name=activity.target_name,
-            wishlist_id=activity.wishlist_id,
-            created_at=activity.created_at,
-            icon=icon,
-            color=color
-        )
-        
-        # Récupérer le username
-        if activity.user_id:
-            user_result = await session.exec(select(User).where(User.id == activity.user_id))
-            user = user_result.first()
-            if user:
-                response.username = user.username
-        
-        # Récupérer le titre de la wishlist
-        if activity.wishlist_id:
-            wl_result = await session.exec(select(Wishlist).where(Wishlist.id == activity.wishlist_id))
-            wl = wl_result.first()
-            if wl:
-                response.wishlist_title = wl.title
-        
-        responses.append(response)
-    
-    return responses
+    params = {"uid": current_user.id, "offset": offset, "limit": limit}
+    if timeline_enabled():
+        # Une seule source pour toutes les pages: la timeline matérialisée (initialisée
+        # avec l'historique à la première lecture), bornée à ACTIVITY_TIMELINE_MAX_LENGTH
+        await ensure_timeline(session, current_user.id)
+        result = await session.execute(TIMELINE_FEED_SQL, params)
+    else:
+        result = await session.execute(FEED_SQL, {**params, "window": offset + limit})
+    return model_response([activity_row_to_response(row) for row in result.mappings().all()], List[ActivityResponse])
 
 @router.get("/recent", response_model=List[ActivityResponse])
 async def get_recent_activities(
@@ -208,4 +174,4 @@ async def get_recent_activities(
             color=color
         ))
     
-    return responses
+    return model_response(responses, List[ActivityResponse])
@@ -0,0 +1,200 @@
+"""
+Timelines matérialisées par utilisateur (fan-out à l'écriture).
+
+Avec ACTIVITY_FEED_STRATEGY=write, chaque activité insérée est poussée dans la table
+`user_timeline` de chaque membre de son audience (auteur, propriétaire, collaborateurs,
+destinataires des partages internes et membres des groupes destinataires).
+Le feed devient alors une lecture par plage de cette table.
+
+L'audience est calculée à l'écriture, mais les droits sont revérifiés à la lecture:
+une entrée dont la liste n'est plus accessible (partage révoqué, collaborateur ou
+membre de groupe retiré) n'est plus renvoyée. Un nouveau partage n'ajoute pas
+l'historique existant à la timeline du destinataire.
+
+À sa première lecture du feed après l'activation, la timeline d'un utilisateur est
+initialisée avec son historique (feed calculé à la lecture, ACTIVITY_TIMELINE_MAX_LENGTH
+entrées), puis marquée dans `user_timeline_backfill`.
+"""
+import os
+import logging
+from typing import Set
+from sqlalchemy import event, text
+
+from app.models import Activity
+
+logger = logging.getLogger(__name__)
+
+# read: feed calculé à la lecture (petites instances) / write: timelines matérialisées
+ACTIVITY_FEED_STRATEGY = os.getenv("ACTIVITY_FEED_STRATEGY", "read").lower()
+# Nombre maximum d'entrées conservées par timeline
+ACTIVITY_TIMELINE_MAX_LENGTH = int(os.getenv("ACTIVITY_TIMELINE_MAX_LENGTH", "500"))
+
+FANOUT_SQL = text("""
+    INSERT INTO user_timeline (user_id, activity_id, created_at)
+    SELECT DISTINCT audience.user_id, CAST(:activity_id AS INTEGER), CAST(:created_at AS TIMESTAMP)
+    FROM (
+        SELECT CAST(:actor_id AS INTEGER) AS user_id
+        UNION ALL
+        SELECT owner_id FROM wishlists WHERE id = :wishlist_id
+        UNION ALL
+        SELECT user_id FROM wishlist_collaborators WHERE wishlist_id = :wishlist_id
+        UNION ALL
+        SELECT target_user_id FROM wishlist_shares
+        WHERE wishlist_id = :wishlist_id AND share_type = 'internal' AND is_active = TRUE
+        UNION ALL
+        SELECT gm.user_id FROM wishlist_shares ws
+        JOIN group_members gm ON gm.group_id = ws.target_group_id
+        WHERE ws.wishlist_id = :wishlist_id AND ws.share_type = 'internal' AND ws.is_active = TRUE
+    ) audience
+    WHERE audience.user_id IS NOT NULL
+    ON CONFLICT DO NOTHING
+""")
+
+# Listes visibles par :uid: possédées, en collaboration, ou partagées (directement ou via
+# un groupe). Même prédicat pour le feed calculé à la lecture et la lecture des timelines
+ACCESSIBLE_WISHLISTS_SQL = """
+    SELECT id AS wishlist_id FROM wishlists WHERE owner_id = :uid
+    UNION
+    SELECT wishlist_id FROM wishlist_collaborators WHERE user_id = :uid
+    UNION
+    SELECT ws.wishlist_id FROM wishlist_shares ws
+    WHERE ws.share_type = 'internal' AND ws.is_active = TRUE AND ws.target_user_id = :uid
+    UNION
+    SELECT ws.wishlist_id FROM wishlist_shares ws
+    JOIN group_members gm ON gm.group_id = ws.target_group_id AND gm.user_id = :uid
+    WHERE ws.share_type = 'internal' AND ws.is_active = TRUE
+"""
+
+# CTE `accessible` et `candidates` du feed calculé à la lecture: pour chaque source,
+# seulement les `window` activités les plus récentes (LATERAL + index (wishlist_id,
+# created_at)), ce qui borne le coût même avec des milliers de listes
+FEED_CANDIDATES_SQL = f"""
+    accessible AS ({ACCESSIBLE_WISHLISTS_SQL}),
+    candidates AS (
+        (
+            SELECT a.id, a.created_at FROM activities a
+            WHERE a.user_id = :uid
+            ORDER BY a.created_at DESC
+            LIMIT :window
+        )
+        UNION ALL
+        SELECT recent.id, recent.created_at
+        FROM accessible l
+        CROSS JOIN LATERAL (
+            SELECT a.id, a.created_at FROM activities a
+            WHERE a.wishlist_id = l.wishlist_id
+            ORDER BY a.created_at DESC
+            LIMIT :window
+        ) recent
+    )"""
+
+TIMELINE_FEED_SQL = text(f"""
+    WITH accessible AS ({ACCESSIBLE_WISHLISTS_SQL})
+    SELECT a.id, a.user_id, u.username, a.action_type, a.target_type, a.target_id,
+           a.target_name, a.wishlist_id, w.title AS wishlist_title, a.created_at
+    FROM user_timeline t
+    JOIN activities a ON a.id = t.activity_id AND a.created_at = t.created_at
+    LEFT JOIN users u ON u.id = a.user_id
+    LEFT JOIN wishlists w ON w.id = a.wishlist_id
+    WHERE t.user_id = :uid
+      AND (a.user_id = :uid OR a.wishlist_id IN (SELECT wishlist_id FROM accessible))
+    ORDER BY t.created_at DESC, t.activity_id DESC
+    OFFSET :offset
+    LIMIT :limit
+""")
+
+BACKFILLED_SQL = text("SELECT EXISTS (SELECT 1 FROM user_timeline_backfill WHERE user_id = :uid)")
+
+# Historique récent de l'utilisateur copié dans sa timeline, puis marque de rattrapage
+# (les deux écritures dans la même instruction; ON CONFLICT pour les lectures simultanées)
+BACKFILL_SQL = text(f"""
+    WITH {FEED_CANDIDATES_SQL},
+    filled AS (
+        INSERT INTO user_timeline (user_id, activity_id, created_at)
+        SELECT DISTINCT CAST(:uid AS INTEGER), id, created_at FROM candidates
+        ORDER BY created_at DESC, id DESC
+        LIMIT :window
+        ON CONFLICT DO NOTHING
+    )
+    INSERT INTO user_timeline_backfill (user_id) VALUES (:uid)
+    ON CONFLICT DO NOTHING
+""")
+
+# Par utilisateur, l'entrée de rang max_length + 1 est trouvée par un parcours borné de la
+# clé primaire (user_id, created_at, activity_id); elle et les plus anciennes sont supprimées
+TRIM_SQL = text("""
+    DELETE FROM user_timeline t
+    USING (
+        SELECT u.id AS user_id, cutoff.created_at, cutoff.activity_id
+        FROM (
+            SELECT id FROM users WHERE id > :after ORDER BY id LIMIT :batch_size
+        ) u
+        CROSS JOIN LATERAL (
+            SELECT created_at, activity_id FROM user_timeline
+            WHERE user_id = u.id
+            ORDER BY created_at DESC, activity_id DESC
+            OFFSET :max_length
+            LIMIT 1
+        ) cutoff
+    ) old
+    WHERE t.user_id = old.user_id
+      AND (t.created_at, t.activity_id) <= (old.created_at, old.activity_id)
+""")
+
+LAST_USER_SQL = text("""
+    SELECT MAX(id) FROM (SELECT id FROM users WHERE id > :after ORDER BY id LIMIT :batch_size) u
+""")
+
+# Utilisateurs traités par transaction lors de la troncature
+TRIM_BATCH_SIZE = 500
+
+# Utilisateurs dont la timeline est déjà initialisée (évite une requête par lecture)
+_backfilled: Set[int] = set()
+
+
+def timeline_enabled() -> bool:
+    return ACTIVITY_FEED_STRATEGY == "write"
+
+
+def fanout_activity(mapper, connection, activity: Activity):
+    """Listener after_insert: pousse l'activité dans les timelines, dans la même transaction"""
+    connection.execute(FANOUT_SQL, {
+        "activity_id": activity.id,
+        "created_at": activity.created_at,
+        "actor_id": activity.user_id,
+        "wishlist_id": activity.wishlist_id,
+    })
+
+
+async def ensure_timeline(session, user_id: int):
+    """Initialise la timeline de l'utilisateur avec son historique, une seule fois"""
+    if user_id in _backfilled:
+        return
+    result = await session.execute(BACKFILLED_SQL, {"uid": user_id})
+    if not result.scalar():
+        await session.execute(BACKFILL_SQL, {"uid": user_id, "window": ACTIVITY_TIMELINE_MAX_LENGTH})
+        await session.commit()
+        logger.info("Timeline initialisée avec l'historique de l'utilisateur %s", user_id)
+    _backfilled.add(user_id)
+
+
+async def trim_timelines(conn) -> int:
+    """Tronque chaque timeline à ACTIVITY_TIMELINE_MAX_LENGTH entrées, par lots d'utilisateurs"""
+    trimmed = 0
+    after = 0
+    while True:
+        params = {"after": after, "batch_size": TRIM_BATCH_SIZE}
+        result = await conn.execute(LAST_USER_SQL, params)
+        last_id = result.scalar()
+        if last_id is None:
+            return trimmed
+        result = await conn.execute(TRIM_SQL, {**params, "max_length": ACTIVITY_TIMELINE_MAX_LENGTH})
+        trimmed += result.rowcount or 0
+        await conn.commit()
+        after = last_id
+
+
+if timeline_enabled():
+    # Un seul point d'accroche pour tous les endroits qui journalisent une activité via l'ORM
+    event.listen(Activity, "after_insert", fanout_activity)
+    logger.info("Feed d'activités: timelines matérialisées (fan-out à l'écriture)")
@@ -1,21 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlmodel import select, func
+from sqlalchemy import text
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date
 from pydantic import BaseModel
 import os
 import time
-import asyncpg
-import socket
 
 from app.models import (
     User, Wishlist, Item, Group, WishlistShare, 
-    SiteConfig, InternalError, AuditLog, Activity
+    SiteConfig, InternalError, AuditLog
 )
 from app.auth.deps import get_current_user
 from app.auth.routes import get_password_hash
 from app.core.async_db import async_engine
+from app.core import health as health_checks
+from app.core import site_config
+from app.admin.utils import (
+    LOG_COLUMNS, build_logs_query, encode_log_cursor, decode_log_cursor, parse_extra_data
+)
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -73,6 +78,12 @@ class GlobalStatsResponse(BaseModel):
     items_purchased: int
     items_available: int
 
+class DailyStatsResponse(BaseModel):
+    day: date
+    action_type: str
+    event_count: int
+    user_count: int
+
 class ErrorResponse(BaseModel):
     id: int
     error_type: str
@@ -84,6 +95,7 @@ class ErrorResponse(BaseModel):
 
 class LogResponse(BaseModel):
     id: int
+    source: str  # activity, audit
     user_id: Optional[int]
     username: Optional[str]
     action: str
@@ -164,8 +176,11 @@ async def update_config(
     config.updated_by = admin.id
     
     session.add(config)
+    # Autres workers notifiés au commit
+    await site_config.notify_site_config_changed(session, [key])
     await session.commit()
     await session.refresh(config)
+    site_config.apply_updates({key: config.value})
     
     # Log
     audit = AuditLog(
@@ -201,7 +216,10 @@ async def update_config_bulk(
             session.add(config)
             updated.append(key)
     
+    if updated:
+        await site_config.notify_site_config_changed(session, updated)
     await session.commit()
+    site_config.apply_updates({key: str(payload.configs[key]) for key in updated})
     
     # Log
     audit = AuditLog(
@@ -273,9 +291,7 @@ async def create_user(
 ):
     """Créer un utilisateur (si OIDC désactivé)"""
     # Vérifier si OIDC activé
-    oidc_result = await session.exec(select(SiteConfig).where(SiteConfig.key == "oidc_enabled"))
-    oidc_config = oidc_result.first()
-    if oidc_config and oidc_config.value == "true":
+    if await site_config.get_config("oidc_enabled") == "true":
         raise HTTPException(
             status_code=400, 
             detail="Création manuelle désactivée (OIDC activé)"
@@ -384,9 +400,7 @@ async def update_user(
 ):
     """Modifier un utilisateur (désactivé si OIDC actif)"""
     # Vérifier si OIDC activé
-    oidc_result = await session.exec(select(SiteConfig).where(SiteConfig.key == "oidc_enabled"))
-    oidc_config = oidc_result.first()
-    if oidc_config and oidc_config.value == "true":
+    if await site_config.get_config("oidc_enabled") == "true":
         raise HTTPException(
             status_code=400, 
             detail="Modification manuelle désactivée (OIDC activé)"
@@ -514,15 +528,26 @@ async def get_global_stats(
     # Réservations totales
     total_reservations = items_reserved + items_purchased
     
-    # Utilisateurs actifs ces 7 derniers jours
+    # Utilisateurs actifs ces 7 derniers jours (aujourd'hui compris): agrégats journaliers
+    # pour les jours clos, table activities depuis le dernier jour agrégé. Sans agrégats
+    # (planificateur désactivé, schéma create_all), tout est lu dans activities
     from datetime import timedelta
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    active_7d_result = await session.exec(
-        select(func.count(func.distinct(Activity.user_id))).where(
-            Activity.created_at >= seven_days_ago
-        )
-    )
-    active_users_7d = active_7d_result.first() or 0
+    from app.activities.maintenance import last_rollup_day
+    since = datetime.utcnow().date() - timedelta(days=6)
+    rollup_until = await last_rollup_day(session)
+    if rollup_until is not None and rollup_until > since:
+        active_7d_result = await session.execute(text("""
+            SELECT COUNT(DISTINCT user_id) FROM (
+                SELECT user_id FROM activity_daily_users WHERE day >= :since AND day < :until
+                UNION
+                SELECT user_id FROM activities WHERE created_at >= :until AND user_id IS NOT NULL
+            ) active
+        """), {"since": since, "until": rollup_until})
+    else:
+        active_7d_result = await session.execute(text(
+            "SELECT COUNT(DISTINCT user_id) FROM activities WHERE created_at >= :since"
+        ), {"since": since})
+    active_users_7d = active_7d_result.scalar() or 0
     
     # Nouveaux utilisateurs ces 30 derniers jours
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
@@ -557,58 +582,55 @@ async def get_global_stats(
         items_available=items_available
     )
 
+@router.get("/stats/daily", response_model=List[DailyStatsResponse])
+async def get_daily_stats(
+    days: int = Query(30, ge=1, le=365),
+    action_type: Optional[str] = None,
+    admin: User = Depends(require_admin),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Récupérer les agrégats journaliers d'activité (calculés par le planificateur)"""
+    from datetime import timedelta
+    from app.activities.maintenance import rollup_available
+    if not await rollup_available(session):
+        return []
+    query = """
+        SELECT day, action_type, event_count, user_count
+        FROM activity_daily_stats
+        WHERE day >= :since
+    """
+    params = {"since": datetime.utcnow().date() - timedelta(days=days - 1)}
+    if action_type:
+        query += " AND action_type = :action_type"
+        params["action_type"] = action_type
+    query += " ORDER BY day DESC, action_type"
+    
+    result = await session.execute(text(query), params)
+    return [DailyStatsResponse(**row) for row in result.mappings().all()]
+
 @router.get("/health")
 async def get_health_detailed(admin: User = Depends(require_admin)):
     """Récupérer le statut de santé détaillé (équivalent enrichi de /api/health)"""
-    start_time = time.time()
-    
-    # DB check
-    db_ok = False
-    db_latency = None
-    db_error = None
-    try:
-        raw_dsn = os.getenv("DATABASE_URL", "postgresql://wisherr:wisherr@db:5432/wisherr")
-        for suffix in ("+asyncpg", "+psycopg2", "+psycopg"):
-            raw_dsn = raw_dsn.replace(suffix, "")
-        t0 = time.perf_counter()
-        conn = await asyncpg.connect(raw_dsn)
-        await conn.execute("SELECT 1")
-        await conn.close()
-        db_latency = round((time.perf_counter() - t0) * 1000, 2)
-        db_ok = True
-    except Exception as e:
-        db_error = str(e)
-    
-    # Redis check
-    cache_ok = None
-    cache_latency = None
-    cache_error = None
-    redis_host = os.getenv("REDIS_HOST")
-    if redis_host:
-        try:
-            redis_port = int(os.getenv("REDIS_PORT", "6379"))
-            t0 = time.perf_counter()
-            sock = socket.create_connection((redis_host, redis_port), timeout=1)
-            cache_latency = round((time.perf_counter() - t0) * 1000, 2)
-            sock.close()
-            cache_ok = True
-        except Exception as e:
-            cache_ok = False
-            cache_error = str(e)
-    
+    # Vérification fraîche (sondes parallèles via les pools existants)
+    report = await health_checks.refresh()
+    db, cache = report["db"], report["cache"]
+
+    def latency_ms(result):
+        return round(result["latency_seconds"] * 1000, 2) if result["latency_seconds"] is not None else None
+
     return {
-        "status": "healthy" if db_ok else "degraded",
+        "status": "healthy" if db["ok"] else "degraded",
         "uptime_seconds": round(time.time() - float(os.getenv("START_TIME", time.time())), 2),
         "database": {
-            "ok": db_ok,
-            "latency_ms": db_latency,
-            "error": db_error
+            "ok": db["ok"],
+            "latency_ms": latency_ms(db),
+            "error": db["error"]
         },
         "cache": {
-            "configured": redis_host is not None,
-            "ok": cache_ok,
-            "latency_ms": cache_latency,
-            "error": cache_error
+            "configured": bool(os.getenv("REDIS_HOST")),
+            "ok": cache["ok"],
+            "latency_ms": latency_ms(cache),
+            "error": cache["error"]
         },
         "version": os.getenv("APP_VERSION", "0.1.0")
     }
@@ -714,85 +736,144 @@ async def report_error(
 # ROUTES - LOGS
 # =====================================================
 
+class LogFilters:
+    """Filtres communs au journal paginé et à l'export"""
+    def __init__(
+        self,
+        user_id: Optional[int] = None,
+        action: Optional[str] = None,
+        action_filter: Optional[str] = Query(None, description="Alias historique de `action`"),
+        target_type: Optional[str] = None,
+        target_id: Optional[int] = None,
+        source: Optional[str] = Query(None, pattern="^(activity|audit)$"),
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ):
+        self.user_id = user_id
+        self.action = action or action_filter
+        self.target_type = target_type
+        self.target_id = target_id
+        self.source = source
+        self.date_from = date_from
+        self.date_to = date_to
+
+    def as_kwargs(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "action": self.action,
+            "target_type": self.target_type,
+            "target_id": self.target_id,
+            "source": self.source,
+            "date_from": self.date_from,
+            "date_to": self.date_to,
+        }
+
+def log_row_to_response(row) -> LogResponse:
+    return LogResponse(
+        id=row["id"],
+        source=row["source"],
+        user_id=row["user_id"],
+        username=row["username"],
+        action=row["action"],
+        target_type=row["target_type"],
+        target_id=row["target_id"],
+        target_name=row["target_name"],
+        extra_data=parse_extra_data(row["extra_data"]),
+        created_at=row["created_at"]
+    )
+
 @router.get("/logs", response_model=List[LogResponse])
 async def list_logs(
+    response: Response,
     limit: int = Query(50, ge=1, le=200),
-    action_filter: Optional[str] = None,
+    cursor: Optional[str] = None,
+    filters: LogFilters = Depends(),
     admin: User = Depends(require_admin),
     session: AsyncSession = Depends(get_async_session)
 ):
-    """Lister les logs d'audit et activités utilisateurs"""
-    import json
-    responses = []
+    """
+    Lister les logs d'audit et activités utilisateurs (les plus récents d'abord).
+    Pagination par curseur: rappeler avec `cursor` = en-tête `X-Next-Cursor` de la réponse.
+    """
+    try:
+        position = decode_log_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    def parse_extra_data(data):
-        """Parse extra_data qui peut être un dict, une string JSON, ou None"""
-        if data is None:
-            return None
-        if isinstance(data, dict):
-            return data if data else None
-        if isinstance(data, str):
-            try:
-                parsed = json.loads(data)
-                return parsed if parsed else None
-            except (json.JSONDecodeError, TypeError):
-                return None
-        return None
-    
-    # 1. Récupérer les activités utilisateurs (plus riches en infos)
-    activity_query = (
-        select(Activity, User.username)
-        .join(User, User.id == Activity.user_id, isouter=True)
-        .order_by(Activity.created_at.desc())
-        .limit(limit)
-    )
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    query, params = build_logs_query(limit + 1, position, **filters.as_kwargs())
+    result = await session.execute(query, params)
+    rows = result.mappings().all()
     
-    activity_result = await session.exec(activity_query)
-    activities = activity_result.all()
-    
-    for act, username in activities:
-        responses.append(LogResponse(
-            id=act.id,
-            user_id=act.user_id,
-            username=username,
-            action=act.action_type,
-            target_type=act.target_type,
-            target_id=act.target_id,
-            target_name=act.target_name,
-            extra_data=parse_extra_data(act.extra_data),
-            created_at=act.created_at
-        ))
+    page = rows[:limit]
+    if len(rows) > limit:
+        last = page[-1]
+        response.headers["X-Next-Cursor"] = encode_log_cursor(last["created_at"], last["source"], last["id"])
     
-    # 2. Récupérer les audit logs (actions admin)
-    audit_query = (
-        select(AuditLog, User.username)
-        .join(User, User.id == AuditLog.user_id, isouter=True)
-        .order_by(AuditLog.created_at.desc())
-        .limit(limit)
+    return [log_row_to_response(row) for row in page]
+
+LOG_EXPORT_BATCH_SIZE = 1000
+
+@router.get("/logs/export")
+async def export_logs(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: LogFilters = Depends(),
+    admin: User = Depends(require_admin)
+):
+    """
+    Exporter le journal filtré en NDJSON ou CSV.
+    Le flux est produit par lots (pagination par curseur), sans charger toute la plage en mémoire.
+    """
+    import csv
+    import io
+    import json
+
+    async def generate():
+        position = None
+        if format == "csv":
+            yield ",".join(LOG_COLUMNS) + "\n"
+        async with AsyncSession(async_engine) as session:
+            while True:
+                query, params = build_logs_query(LOG_EXPORT_BATCH_SIZE, position, **filters.as_kwargs())
+                result = await session.execute(query, params)
+                rows = result.mappings().all()
+                if not rows:
+                    break
+                
+                # extra_data en objet, comme dans /logs (la requête le renvoie sous forme de texte)
+                records = [
+                    {col: parse_extra_data(row[col]) if col == "extra_data" else row[col] for col in LOG_COLUMNS}
+                    for row in rows
+                ]
+                buffer = io.StringIO()
+                if format == "csv":
+                    writer = csv.writer(buffer)
+                    for record in records:
+                        writer.writerow([
+                            json.dumps(record[col]) if col == "extra_data" and record[col] is not None
+                            else record[col].isoformat() if col == "created_at"
+                            else record[col]
+                            for col in LOG_COLUMNS
+                        ])
+                else:
+                    for record in records:
+                        buffer.write(json.dumps(record, default=str) + "\n")
+                yield buffer.getvalue()
+                
+                if len(rows) < LOG_EXPORT_BATCH_SIZE:
+                    break
+                last = rows[-1]
+                position = (last["created_at"], last["source"], last["id"])
+                # Libérer le snapshot entre deux lots sur de grandes plages
+                await session.commit()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"wisherr-logs-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
-    
-    if action_filter:
-        audit_query = audit_query.where(AuditLog.action == action_filter)
-    
-    audit_result = await session.exec(audit_query)
-    audit_logs = audit_result.all()
-    
-    for log, username in audit_logs:
-        responses.append(LogResponse(
-            id=log.id + 1000000,  # Offset pour éviter collision d'ID
-            user_id=log.user_id,
-            username=username,
-            action=log.action,
-            target_type=log.target_type,
-            target_id=log.target_id,
-            target_name=None,
-            extra_data=None,
-            created_at=log.created_at
-        ))
-    
-    # Trier par date décroissante et limiter
-    responses.sort(key=lambda x: x.created_at, reverse=True)
-    return responses[:limit]
 
 @router.get("/logs/actions")
 async def list_log_actions(admin: User = Depends(require_admin)):
@@ -1 +1,133 @@
-# Fonctions utilitaires pour admin (placeholder)
+# Fonctions utilitaires pour admin
+import json
+import base64
+from datetime import datetime
+from typing import Optional, Tuple, Dict, Any
+from sqlalchemy import text
+
+# Sources du journal unifié: activités utilisateurs et audit admin
+LOG_SOURCES = {
+    "activity": {
+        "table": "activities",
+        "action": "action_type",
+        "target_name": "target_name",
+        "extra_data": "extra_data",
+    },
+    "audit": {
+        "table": "audit_log",
+        "action": "action",
+        "target_name": "CAST(NULL AS VARCHAR)",
+        "extra_data": "CAST(NULL AS JSONB)",
+    },
+}
+
+LOG_COLUMNS = ["source", "id", "user_id", "username", "action", "target_type", "target_id", "target_name", "extra_data", "created_at"]
+
+
+def encode_log_cursor(created_at: datetime, source: str, id: int) -> str:
+    """Encode la position (created_at, source, id) du dernier log renvoyé"""
+    raw = json.dumps([created_at.isoformat(), source, id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_log_cursor(cursor: str) -> Tuple[datetime, str, int]:
+    """Décode un curseur de pagination (ValueError si invalide)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, source, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if source not in LOG_SOURCES:
+            raise ValueError(source)
+        return datetime.fromisoformat(created_at), source, int(id)
+    except Exception as e:
+        raise ValueError(f"Curseur invalide: {cursor}") from e
+
+
+def parse_extra_data(data) -> Optional[dict]:
+    """Parse extra_data qui peut être un dict, une string JSON, ou None"""
+    if data is None:
+        return None
+    if isinstance(data, dict):
+        return data if data else None
+    if isinstance(data, str):
+        try:
+            parsed = json.loads(data)
+            return parsed if parsed else None
+        except (json.JSONDecodeError, TypeError):
+            return None
+    return None
+
+
+def build_logs_query(
+    limit: int,
+    cursor: Optional[Tuple[datetime, str, int]] = None,
+    source: Optional[str] = None,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    target_type: Optional[str] = None,
+    target_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    """
+    Construit la requête paginée du journal unifié (UNION ALL activities + audit_log).
+
+    Chaque branche applique les filtres et la limite elle-même (index sur created_at
+    et colonnes filtrées), puis la fusion trie sur (created_at, source, id) DESC:
+    le curseur est la dernière position renvoyée.
+
+    Returns:
+        (requête SQL, paramètres)
+    """
+    params: Dict[str, Any] = {"limit": limit}
+    filters = []
+    if user_id is not None:
+        params["user_id"] = user_id
+        filters.append("{a}.user_id = :user_id")
+    if action:
+        params["action"] = action
+        filters.append("{a}.{action} = :action")
+    if target_type:
+        params["target_type"] = target_type
+        filters.append("{a}.target_type = :target_type")
+    if target_id is not None:
+        params["target_id"] = target_id
+        filters.append("{a}.target_id = :target_id")
+    if date_from:
+        params["date_from"] = date_from
+        filters.append("{a}.created_at >= :date_from")
+    if date_to:
+        params["date_to"] = date_to
+        filters.append("{a}.created_at < :date_to")
+    if cursor:
+        params["cursor_ts"], params["cursor_source"], params["cursor_id"] = cursor
+        # La première condition permet l'usage de l'index sur created_at
+        filters.append("{a}.created_at <= :cursor_ts")
+        filters.append("({a}.created_at, CAST('{source}' AS TEXT), {a}.id) < (:cursor_ts, CAST(:cursor_source AS TEXT), :cursor_id)")
+
+    branches = []
+    for name, cols in LOG_SOURCES.items():
+        if source and source != name:
+            continue
+        alias = "l"
+        where = " AND ".join(f.format(a=alias, action=cols["action"], source=name) for f in filters) or "TRUE"
+        branches.append(f"""
+            (
+                SELECT CAST('{name}' AS TEXT) AS source, {alias}.id, {alias}.user_id,
+                       {alias}.{cols['action']} AS action, {alias}.target_type, {alias}.target_id,
+                       {cols['target_name']} AS target_name, {cols['extra_data']} AS extra_data,
+                       {alias}.created_at
+                FROM {cols['table']} {alias}
+                WHERE {where}
+                ORDER BY {alias}.created_at DESC, {alias}.id DESC
+                LIMIT :limit
+            )""")
+
+    sql = f"""
+        SELECT logs.source, logs.id, logs.user_id, u.username, logs.action, logs.target_type,
+               logs.target_id, logs.target_name, logs.extra_data, logs.created_at
+        FROM ({" UNION ALL ".join(branches)}) logs
+        LEFT JOIN users u ON u.id = logs.user_id
+        ORDER BY logs.created_at DESC, logs.source DESC, logs.id DESC
+        LIMIT :limit
+    """
+    return text(sql), params
@@ -1,5 +1,5 @@
 
-# Import du limiter global depuis app.core.limits
-from app.core.limits import limiter
+# Import de la limitation de débit globale depuis app.core.limits
+from app.core.limits import limiter, rate_limit
 
-__all__ = ["limiter"]
+__all__ = ["limiter", "rate_limit"]
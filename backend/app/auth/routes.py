@@ -11,11 +11,11 @@ from app.models import User, BlacklistedToken, Activity
 from .schemas import UserResponse, TokenResponse, RegisterResponse, OkResponse
 from .deps import get_current_user, oauth2_scheme, get_current_user_async
 from pydantic import BaseModel, EmailStr
-from app.core.utils import get_site_config_bool
+from app.core.site_config import get_config_bool
 import re
 import os
 import logging
-from .limits import limiter
+from .limits import rate_limit
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 if not SECRET_KEY:
@@ -75,10 +75,9 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 	to_encode.update({"exp": expire})
 	return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-@router.post("/register", response_model=RegisterResponse)
-@limiter.limit("5/minute")
+@router.post("/register", response_model=RegisterResponse, dependencies=[Depends(rate_limit("register"))])
 async def register(payload: RegisterRequest, request: Request, session: AsyncSession = Depends(get_async_session)):
-	if not get_site_config_bool("enable_local_auth", True):
+	if not await get_config_bool("enable_local_auth", True):
 		raise HTTPException(status_code=403, detail="L'authentification locale est désactivée.")
 	username = payload.username
 	email = payload.email
@@ -103,10 +102,9 @@ async def register(payload: RegisterRequest, request: Request, session: AsyncSes
 	logging.info("register: success", extra={"user_id": user.id, "extra": {"username": user.username, "email": user.email}})
 	return RegisterResponse(id=user.id, username=user.username, email=user.email)
 
-@router.post("/login", response_model=TokenResponse)
-@limiter.limit("10/minute")
+@router.post("/login", response_model=TokenResponse, dependencies=[Depends(rate_limit("auth"))])
 async def login(payload: LoginRequest, request: Request, session: AsyncSession = Depends(get_async_session)):
-	if not get_site_config_bool("enable_local_auth", True):
+	if not await get_config_bool("enable_local_auth", True):
 		raise HTTPException(status_code=403, detail="L'authentification locale est désactivée.")
 	username = payload.username
 	password = payload.password
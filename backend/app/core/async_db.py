@@ -3,6 +3,8 @@ from sqlalchemy.ext.asyncio import create_async_engine
 import os
 from dotenv import load_dotenv
 
+from app.core.query_stats import instrument_engine
+
 load_dotenv()
 
 RAW_DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://wisherr:wisherr@db:5432/wisherr")
@@ -16,10 +18,12 @@ else:
     ASYNC_DATABASE_URL = "postgresql+asyncpg://wisherr:wisherr@db:5432/wisherr"
 async_engine = create_async_engine(
     ASYNC_DATABASE_URL,
-    echo=True,
+    # Requêtes SQL journalisées selon SQL_ECHO (app.core.logging_setup), via le pipeline de logs
+    echo=False,
     future=True,
     connect_args={"timeout": 10},
 )
+instrument_engine(async_engine)
 
 def get_async_session():
     from contextlib import asynccontextmanager
@@ -2,6 +2,8 @@ from sqlmodel import SQLModel, create_engine
 import os
 from dotenv import load_dotenv
 
+from app.core.query_stats import instrument_engine
+
 load_dotenv()
 
 RAW_DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://wisherr:wisherr@db:5432/wisherr")
@@ -16,12 +18,14 @@ else:
 
 engine = create_engine(
     SYNC_DATABASE_URL,
-    echo=True,
+    # Requêtes SQL journalisées selon SQL_ECHO (app.core.logging_setup), via le pipeline de logs
+    echo=False,
     future=True,
     pool_size=10,
     max_overflow=2,
     pool_recycle=1800,
 )
+instrument_engine(engine)
 
 def init_db():
     SQLModel.metadata.create_all(engine)
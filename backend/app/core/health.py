@@ -0,0 +1,161 @@
+"""
+Vérifications de santé exécutées en arrière-plan.
+
+Les sondes (base de données, Redis, hôtes externes) tournent en parallèle toutes les
+HEALTH_CHECK_INTERVAL secondes dans chaque worker, via les pools existants (engine
+async, client Redis). Les endpoints de santé renvoient le dernier résultat en mémoire:
+une sonde d'orchestrateur ne déclenche jamais d'I/O.
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+
+from app.core.async_db import async_engine
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "15"))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+# Résultat trop ancien (boucle bloquée): le worker n'est plus considéré prêt
+HEALTH_MAX_AGE = float(os.getenv("HEALTH_MAX_AGE", str(HEALTH_CHECK_INTERVAL * 3)))
+HEALTH_EXTERNAL_HOSTS = os.getenv("HEALTH_EXTERNAL_HOSTS", "doc.my-documents.be:80")
+
+_report: Optional[dict] = None
+_task: Optional[asyncio.Task] = None
+_refreshing: Optional[asyncio.Task] = None
+
+
+def external_hosts() -> List[Tuple[str, int]]:
+    hosts = []
+    for hostpair in HEALTH_EXTERNAL_HOSTS.split(","):
+        host, _, port = hostpair.strip().partition(":")
+        if host:
+            hosts.append((host, int(port) if port.isdigit() else 80))
+    return hosts
+
+
+async def timed(probe) -> dict:
+    """Exécute une sonde avec délai maximum; renvoie ok, latence et erreur"""
+    t0 = time.perf_counter()
+    try:
+        await asyncio.wait_for(probe, HEALTH_CHECK_TIMEOUT)
+        return {"ok": True, "error": None, "latency_seconds": time.perf_counter() - t0}
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"Délai dépassé ({HEALTH_CHECK_TIMEOUT:g} s)", "latency_seconds": None}
+    except Exception as e:
+        return {"ok": False, "error": str(e) or type(e).__name__, "latency_seconds": None}
+
+
+async def probe_db():
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def probe_redis():
+    from app.core import cache
+    if cache.redis_client is None:
+        raise RuntimeError("Redis non connecté")
+    await cache.redis_client.ping()
+
+
+async def probe_tcp(host: str, port: int):
+    _, writer = await asyncio.open_connection(host, port)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run_checks() -> dict:
+    """Exécute toutes les sondes en parallèle"""
+    hosts = external_hosts()
+    redis_configured = bool(os.getenv("REDIS_HOST"))
+    probes = [timed(probe_db())]
+    if redis_configured:
+        probes.append(timed(probe_redis()))
+    probes.extend(timed(probe_tcp(host, port)) for host, port in hosts)
+    results = await asyncio.gather(*probes)
+
+    db = results[0]
+    cache = results[1] if redis_configured else {"ok": None, "error": None, "latency_seconds": None}
+    external = [
+        {"host": host, "port": port, **result}
+        for (host, port), result in zip(hosts, results[1 + redis_configured:])
+    ]
+    return {"checked_at": time.time(), "db": db, "cache": cache, "external": external}
+
+
+async def _run_and_store() -> dict:
+    global _report
+    _report = await run_checks()
+    return _report
+
+
+def _refresh_done(_):
+    global _refreshing
+    _refreshing = None
+
+
+async def refresh() -> dict:
+    """Met à jour le dernier résultat (les appels simultanés partagent la même exécution)"""
+    global _refreshing
+    if _refreshing is None:
+        _refreshing = asyncio.ensure_future(_run_and_store())
+        _refreshing.add_done_callback(_refresh_done)
+    return await asyncio.shield(_refreshing)
+
+
+async def get_report() -> dict:
+    """Dernier résultat; sondes exécutées à la demande s'il n'y en a pas encore (ou boucle désactivée)"""
+    if _report is None or (_task is None and time.time() - _report["checked_at"] > HEALTH_MAX_AGE):
+        return await refresh()
+    return _report
+
+
+def is_ready(report: Optional[dict]) -> bool:
+    """Prêt: base de données joignable et résultat récent (Redis et hôtes externes non bloquants)"""
+    if report is None or not report["db"]["ok"]:
+        return False
+    # Boucle active mais résultat ancien: la boucle d'événements du worker est bloquée
+    return _task is None or time.time() - report["checked_at"] <= HEALTH_MAX_AGE
+
+
+def is_healthy(report: dict) -> bool:
+    cache_ok = report["cache"]["ok"]
+    return bool(report["db"]["ok"]) and cache_ok is not False and all(c["ok"] for c in report["external"])
+
+
+async def _loop():
+    healthy = True
+    while True:
+        try:
+            report = await refresh()
+            # Journalisé aux changements d'état seulement
+            if is_healthy(report) != healthy:
+                healthy = not healthy
+                if healthy:
+                    logger.info("Vérifications de santé de nouveau en succès")
+                else:
+                    logger.warning("Vérification de santé en échec: %s", report)
+        except Exception as e:
+            logger.exception("Vérification de santé impossible: %s", e)
+        await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+
+
+def start_health_checks():
+    """Lance la boucle des vérifications (appelé au démarrage de chaque worker)"""
+    global _task
+    if _task is None and HEALTH_CHECK_INTERVAL > 0:
+        _task = asyncio.get_running_loop().create_task(_loop())
+
+
+async def stop_health_checks():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,213 @@
+"""
+Client HTTP sortant partagé (scraping): pool de connexions, keep-alive, HTTP/2,
+limite de concurrence par site et taille de réponse bornée.
+"""
+import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+import httpx
+
+from app.core.metrics import SCRAPE_FETCH_LATENCY, SCRAPE_FETCH_COUNT
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_TIMEOUT = float(os.getenv("SCRAPE_TIMEOUT", "15"))
+SCRAPE_CONNECT_TIMEOUT = float(os.getenv("SCRAPE_CONNECT_TIMEOUT", "5"))
+SCRAPE_MAX_CONNECTIONS = int(os.getenv("SCRAPE_MAX_CONNECTIONS", "100"))
+SCRAPE_MAX_KEEPALIVE = int(os.getenv("SCRAPE_MAX_KEEPALIVE", "20"))
+SCRAPE_KEEPALIVE_EXPIRY = float(os.getenv("SCRAPE_KEEPALIVE_EXPIRY", "30"))
+SCRAPE_PER_HOST_CONCURRENCY = int(os.getenv("SCRAPE_PER_HOST_CONCURRENCY", "4"))
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", str(5 * 1024 * 1024)))
+SCRAPE_HTTP2 = os.getenv("SCRAPE_HTTP2", "true").lower() in ("true", "1", "yes", "on")
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# Client partagé (créé au démarrage, ou à la première utilisation hors application)
+http_client: Optional[httpx.AsyncClient] = None
+
+
+class HostLimiter:
+    """Sémaphore par site cible: limite les requêtes simultanées vers un même hôte"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._slots: Dict[str, list] = {}  # host -> [Semaphore, utilisateurs]
+
+    @asynccontextmanager
+    async def acquire(self, host: str):
+        slot = self._slots.get(host)
+        if slot is None:
+            slot = self._slots[host] = [asyncio.Semaphore(self.limit), 0]
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                self._slots.pop(host, None)
+
+
+host_limiter = HostLimiter(SCRAPE_PER_HOST_CONCURRENCY)
+
+
+class FetchResult:
+    """Réponse (éventuellement tronquée à SCRAPE_MAX_BYTES) d'une requête sortante"""
+
+    def __init__(self, url: str, status_code: int, headers: httpx.Headers, content: bytes,
+                 charset: Optional[str], truncated: bool = False, stopped: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.charset = charset  # charset de l'en-tête Content-Type, s'il y en a un
+        self.encoding = charset or "utf-8"
+        self.truncated = truncated
+        self.stopped = stopped  # lecture interrompue par `stop`
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+
+# Motifs d'hôtes des sites connus (enregistrés par les extracteurs): seuls libellés
+# d'hôte possibles dans les métriques, les autres sites sont regroupés sous "other"
+METRIC_HOST_PATTERNS: List[str] = []
+
+
+def register_metric_hosts(*patterns: str):
+    """Ajoute des motifs d'hôtes (ex: "amazon.") aux libellés des métriques"""
+    for pattern in patterns:
+        pattern = pattern.lower()
+        if pattern not in METRIC_HOST_PATTERNS:
+            METRIC_HOST_PATTERNS.append(pattern)
+
+
+def registrable_domain(url: str) -> str:
+    """Domaine enregistrable approximatif de `url` (amazon.fr, amazon.co.uk...)"""
+    host = (urlsplit(url).hostname or "unknown").lower()
+    parts = host.split(".")
+    # amazon.fr, fnac.com... ; garder trois niveaux pour les suffixes composés (amazon.co.uk)
+    if len(parts) > 2 and len(parts[-2]) <= 3 and len(parts[-1]) == 2:
+        return ".".join(parts[-3:])
+    return ".".join(parts[-2:])
+
+
+def metric_host(url: str) -> str:
+    """Label d'hôte pour les métriques: motif du site connu correspondant, sinon "other" """
+    host = (urlsplit(url).hostname or "").lower()
+    for pattern in METRIC_HOST_PATTERNS:
+        if pattern in host:
+            return pattern.strip(".")
+    return "other"
+
+
+def http2_available() -> bool:
+    """HTTP/2 nécessite le paquet `h2` (extra httpx[http2])"""
+    if not SCRAPE_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=http2_available(),
+        follow_redirects=True,
+        headers=DEFAULT_HEADERS,
+        timeout=httpx.Timeout(SCRAPE_TIMEOUT, connect=SCRAPE_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=SCRAPE_MAX_CONNECTIONS,
+            max_keepalive_connections=SCRAPE_MAX_KEEPALIVE,
+            keepalive_expiry=SCRAPE_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+async def init_http_client():
+    """Crée le client HTTP partagé"""
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+        logger.info("Client HTTP sortant initialisé (http2=%s)", http2_available())
+
+
+async def close_http_client():
+    """Ferme le client HTTP partagé"""
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+
+async def fetch(url: str, headers: Optional[dict] = None, max_bytes: int = SCRAPE_MAX_BYTES,
+                stop: Optional[Callable[[bytes], bool]] = None, follow_redirects: bool = True,
+                extensions: Optional[dict] = None) -> FetchResult:
+    """
+    GET via le client partagé, sous la limite de concurrence de l'hôte.
+    Le corps est lu en flux et tronqué à `max_bytes`; `stop` est appelé pour chaque
+    morceau reçu et interrompt la lecture quand il renvoie True (la connexion est
+    alors fermée au lieu d'être rendue au pool). Avec `follow_redirects=False`, une
+    redirection lève HTTPStatusError (l'appelant vérifie la cible avant de la suivre).
+    `extensions` est transmis à la requête httpx (ex: `sni_hostname`).
+
+    Raises:
+        httpx.TimeoutException, httpx.HTTPStatusError, httpx.HTTPError
+    """
+    client = get_http_client()
+    label = metric_host(url)
+    outcome = "error"
+    t0 = time.perf_counter()
+    try:
+        async with host_limiter.acquire(urlsplit(url).hostname or ""):
+            async with client.stream("GET", url, headers=headers, follow_redirects=follow_redirects,
+                                     extensions=extensions) as response:
+                response.raise_for_status()
+                chunks: List[bytes] = []
+                size = 0
+                truncated = stopped = False
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= max_bytes:
+                        truncated = True
+                        break
+                    if stop is not None and stop(chunk):
+                        stopped = True
+                        break
+                content = b"".join(chunks)[:max_bytes]
+                outcome = "ok"
+                if truncated:
+                    logger.info("Réponse tronquée à %d octets: %s", max_bytes, url)
+                elif stopped:
+                    logger.debug("Lecture arrêtée après %d octets: %s", size, url)
+                return FetchResult(str(response.url), response.status_code, response.headers,
+                                   content, response.charset_encoding, truncated, stopped)
+    except httpx.TimeoutException:
+        outcome = "timeout"
+        raise
+    except httpx.HTTPStatusError as e:
+        outcome = f"http_{e.response.status_code // 100}xx"
+        raise
+    finally:
+        SCRAPE_FETCH_LATENCY.labels(host=label).observe(time.perf_counter() - t0)
+        SCRAPE_FETCH_COUNT.labels(host=label, outcome=outcome).inc()
@@ -1,6 +1,305 @@
+"""
+Limitation de débit par groupe de routes, partagée entre workers.
 
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+Chaque groupe (auth, register, scrape, scrape_batch, share, upload) a sa limite
+("10/minute"), appliquée par adresse IP via la dépendance `rate_limit(groupe)`. Une
+requête coûte un jeton, ou plusieurs avec `enforce_rate_limit(..., cost=n)` (un par
+URL d'un batch). Avec Redis, les compteurs sont communs à tous les workers et nœuds
+(algorithme GCRA, script Lua atomique) et survivent aux redémarrages. Sans Redis (ou
+Redis indisponible), chaque worker applique la limite seul (seau de jetons en mémoire).
 
-# Rate limiter global configuré avec SlowAPI
-limiter = Limiter(key_func=get_remote_address)
+Voie rapide locale: un client actif réserve plusieurs jetons à la fois dans Redis
+(au plus RATE_LIMIT_LOCAL_SHARE de sa limite), consommés ensuite sans aller-retour
+réseau pendant RATE_LIMIT_LEASE_SECONDS; un refus est mémorisé jusqu'au délai
+indiqué par Redis. La limite globale n'est jamais dépassée: les jetons réservés non
+utilisés sont perdus à l'expiration de la réservation.
+
+Adresse du client: celle de la connexion, sauf si elle appartient à TRUSTED_PROXIES
+(reverse proxy nginx...). X-Forwarded-For est alors lu de droite à gauche et la première
+adresse qui n'est pas un proxy de confiance est retenue; un client ne peut donc pas
+choisir sa clé en envoyant lui-même l'en-tête.
+"""
+import os
+import re
+import math
+import time
+import logging
+import ipaddress
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional
+from fastapi import HTTPException, Request
+
+from app.core import cache
+from app.core.metrics import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("true", "1", "yes", "on")
+# Part de la limite d'un client qu'un worker peut réserver d'un coup (0: Redis à chaque requête)
+RATE_LIMIT_LOCAL_SHARE = float(os.getenv("RATE_LIMIT_LOCAL_SHARE", "0.1"))
+# Durée de validité des jetons réservés (s)
+RATE_LIMIT_LEASE_SECONDS = float(os.getenv("RATE_LIMIT_LEASE_SECONDS", "1"))
+# Clients suivis en mémoire par worker (les moins récents sont oubliés)
+RATE_LIMIT_LOCAL_KEYS = int(os.getenv("RATE_LIMIT_LOCAL_KEYS", "10000"))
+# Proxys de confiance (IP ou réseaux CIDR, séparés par des virgules) dont l'en-tête
+# X-Forwarded-For est pris en compte; vide = adresse de la connexion uniquement
+TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "")
+
+# Limites par groupe de routes ("" pour désactiver un groupe)
+RATE_LIMITS_CONFIG = {
+    "auth": os.getenv("RATE_LIMIT_AUTH", "10/minute"),
+    "register": os.getenv("RATE_LIMIT_REGISTER", "5/minute"),
+    "scrape": os.getenv("RATE_LIMIT_SCRAPE", "30/minute"),
+    # POST /scrape/batch: décompté par URL
+    "scrape_batch": os.getenv("RATE_LIMIT_SCRAPE_BATCH", "300/minute"),
+    "share": os.getenv("RATE_LIMIT_SHARE", "60/minute"),
+    "upload": os.getenv("RATE_LIMIT_UPLOAD", os.getenv("UPLOAD_RATE_LIMIT", "30/minute")),
+    # Toutes les requêtes /api, appliquée par le middleware (app.core.middleware)
+    "default": os.getenv("RATE_LIMIT_DEFAULT", ""),
+}
+
+RATE_LIMITED_MESSAGE = "Trop de requêtes, réessayez plus tard"
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+RATE_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$", re.IGNORECASE)
+
+# GCRA: la clé contient l'heure d'arrivée théorique (ms). Accorde jusqu'à ARGV[3]
+# jetons, rien si moins de ARGV[4] sont disponibles; renvoie {jetons accordés, délai
+# avant un nouvel essai en ms}
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local emission = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local minimum = tonumber(ARGV[4])
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then tat = now end
+local available = math.floor((now + period - tat) / emission)
+if available < minimum then
+    return {0, math.ceil(tat + minimum * emission - period - now)}
+end
+local granted = math.min(requested, available)
+local new_tat = tat + granted * emission
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return {granted, 0}
+"""
+
+
+@dataclass(frozen=True)
+class Rate:
+    amount: int
+    period: float
+
+    @property
+    def emission(self) -> float:
+        """Intervalle entre deux jetons (s)"""
+        return self.period / self.amount
+
+    @property
+    def max_lease(self) -> int:
+        return max(1, int(self.amount * RATE_LIMIT_LOCAL_SHARE))
+
+
+def parse_rate(spec: str) -> Optional[Rate]:
+    """"10/minute", "100/hour", "5/10seconds"; None si vide"""
+    if not spec or not spec.strip():
+        return None
+    match = RATE_RE.match(spec)
+    if not match or int(match.group(1)) < 1:
+        raise ValueError(f"Limite de débit invalide: {spec!r}")
+    amount, multiplier, unit = match.groups()
+    return Rate(int(amount), PERIODS[unit.lower()] * int(multiplier or 1))
+
+
+RATE_LIMITS: Dict[str, Optional[Rate]] = {group: parse_rate(spec) for group, spec in RATE_LIMITS_CONFIG.items()}
+
+
+class TokenBucket:
+    """Seau de jetons local (limite appliquée par ce seul worker)"""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, rate: Rate, now: float):
+        self.tokens = float(rate.amount)
+        self.updated = now
+
+    def take(self, rate: Rate, now: float, cost: int = 1) -> float:
+        self.tokens = min(rate.amount, self.tokens + (now - self.updated) / rate.emission)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) * rate.emission
+
+
+class Lease:
+    """Jetons réservés dans Redis pour un client, consommables sans aller-retour"""
+
+    __slots__ = ("tokens", "expires", "size", "blocked_until")
+
+    def __init__(self):
+        self.tokens = 0
+        self.expires = 0.0
+        self.size = 1
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    def __init__(self, max_keys: int = RATE_LIMIT_LOCAL_KEYS):
+        self.max_keys = max_keys
+        self._leases: "OrderedDict[str, Lease]" = OrderedDict()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._script = None
+        self._script_client = None
+
+    def _entry(self, entries: OrderedDict, key: str, factory):
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = factory()
+            if len(entries) > self.max_keys:
+                entries.popitem(last=False)
+        else:
+            entries.move_to_end(key)
+        return entry
+
+    def hit_local(self, rate: Rate, key: str, now: float, cost: int = 1) -> float:
+        bucket = self._entry(self._buckets, key, lambda: TokenBucket(rate, now))
+        return bucket.take(rate, now, cost)
+
+    async def _reserve(self, redis, rate: Rate, key: str, count: int, minimum: int = 1):
+        if self._script is None or self._script_client is not redis:
+            self._script = redis.register_script(GCRA_SCRIPT)
+            self._script_client = redis
+        granted, retry_ms = await self._script(
+            keys=[f"ratelimit:{key}"],
+            args=[rate.emission * 1000, rate.period * 1000, count, minimum],
+        )
+        return int(granted), int(retry_ms) / 1000
+
+    async def hit(self, rate: Rate, key: str, cost: int = 1) -> float:
+        """
+        Consomme `cost` jetons (tous ou aucun); renvoie 0 si la requête est autorisée,
+        sinon le délai (s) avant un nouvel essai
+        """
+        now = time.monotonic()
+        redis = cache.redis_client
+        if redis is None:
+            return self.hit_local(rate, key, now, cost)
+
+        lease = self._entry(self._leases, key, Lease)
+        if lease.blocked_until > now:
+            return lease.blocked_until - now
+        if lease.tokens >= cost and lease.expires > now:
+            lease.tokens -= cost
+            return 0.0
+        # Jetons encore valides: seul le complément est demandé à Redis
+        held = lease.tokens if lease.expires > now else 0
+        needed = cost - held
+
+        # Taille de la prochaine réservation selon l'activité du client: doublée si la
+        # précédente est épuisée avant expiration, réduite si des jetons ont été perdus
+        if lease.expires > now:
+            lease.size = min(lease.size * 2, rate.max_lease)
+        elif lease.tokens > 0:
+            lease.size = max(1, lease.size // 2)
+
+        try:
+            granted, retry_after = await self._reserve(redis, rate, key, max(lease.size, needed), needed)
+        except Exception as e:
+            logger.warning("Limitation de débit Redis indisponible, limite locale: %s", e)
+            return self.hit_local(rate, key, now, cost)
+
+        if granted < needed:
+            lease.tokens = 0
+            lease.blocked_until = now + retry_after
+            return retry_after
+        lease.tokens = held + granted - cost
+        lease.expires = now + RATE_LIMIT_LEASE_SECONDS
+        return 0.0
+
+
+limiter = RateLimiter()
+
+
+def parse_networks(spec: str):
+    networks = []
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if entry:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+    return tuple(networks)
+
+
+TRUSTED_NETWORKS = parse_networks(TRUSTED_PROXIES)
+
+
+@lru_cache(maxsize=4096)
+def is_trusted_proxy(address: str) -> bool:
+    if not TRUSTED_NETWORKS:
+        return False
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_NETWORKS)
+
+
+def resolve_client_address(peer: Optional[str], forwarded_for: Optional[str] = None) -> str:
+    """
+    Adresse du client pour la limitation de débit: `peer` (adresse de la connexion), ou
+    derrière un proxy de confiance la dernière adresse non fiable de X-Forwarded-For
+    """
+    if not peer:
+        return "unknown"
+    if not forwarded_for or not is_trusted_proxy(peer):
+        return peer
+    for hop in reversed(forwarded_for.split(",")):
+        hop = hop.strip()
+        if not hop:
+            continue
+        peer = hop
+        if not is_trusted_proxy(hop):
+            break
+    return peer
+
+
+def client_address(request: Request) -> str:
+    return resolve_client_address(request.client.host if request.client else None,
+                                  request.headers.get("x-forwarded-for"))
+
+
+async def check_rate_limit_group(group: str, client: str, cost: int = 1) -> float:
+    """Délai (s) avant un nouvel essai si la limite du groupe est atteinte pour ce client, sinon 0"""
+    rate = RATE_LIMITS[group]
+    if not RATE_LIMIT_ENABLED or rate is None:
+        return 0.0
+    # Une requête plus coûteuse que la limite entière consomme toute la limite
+    retry_after = await limiter.hit(rate, f"{group}:{client}", min(cost, rate.amount))
+    if retry_after > 0:
+        RATE_LIMITED.labels(group=group).inc()
+    return retry_after
+
+
+async def enforce_rate_limit(group: str, request: Request, cost: int = 1):
+    """Consomme `cost` jetons du groupe pour le client de la requête; 429 si la limite est atteinte"""
+    retry_after = await check_rate_limit_group(group, client_address(request), cost)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=429,
+            detail=RATE_LIMITED_MESSAGE,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def rate_limit(group: str):
+    """Dépendance FastAPI: limite de débit du groupe de routes, par adresse IP"""
+    if group not in RATE_LIMITS:
+        raise ValueError(f"Groupe de limitation de débit inconnu: {group}")
+
+    async def check_rate_limit(request: Request):
+        await enforce_rate_limit(group, request)
+
+    return check_rate_limit
@@ -0,0 +1,170 @@
+"""
+Journalisation JSON non bloquante.
+
+Les appels de log ne font que déposer l'enregistrement dans une file bornée: un thread
+dédié (QueueListener) encode en JSON (orjson si installé) et écrit sur stdout. Chaque
+enregistrement porte l'identifiant de la requête HTTP en cours (contextvar renseignée
+par app.core.middleware, renvoyé dans l'en-tête X-Request-ID). Les loggers bruyants
+peuvent être échantillonnés (LOG_SAMPLING), les avertissements et erreurs étant
+toujours conservés.
+"""
+import os
+import re
+import sys
+import copy
+import json
+import uuid
+import queue
+import random
+import atexit
+import logging
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépend de l'installation
+    orjson = None
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Enregistrements en attente d'écriture; au-delà ils sont abandonnés (et comptés)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Part des logs conservés par préfixe de logger, ex: "sqlalchemy.engine=0.01,app.scrape=0.5"
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+# Requêtes SQL journalisées (logger sqlalchemy.engine, remplace echo=True des engines)
+SQL_ECHO = os.getenv("SQL_ECHO", "true").lower() in ("true", "1", "yes", "on")
+
+REQUEST_ID_HEADER = b"x-request-id"
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_listener: Optional[QueueListener] = None
+
+
+def dumps(data: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(data, default=str).decode()
+    return json.dumps(data, default=str)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        log_record = {
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "logger": record.name,
+            "time": self.formatTime(record, self.datefmt),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            log_record["request_id"] = request_id
+        if hasattr(record, "user_id"):
+            log_record["user_id"] = record.user_id
+        if hasattr(record, "extra"):
+            log_record.update(record.extra)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_record["exception"] = record.exc_text
+        return dumps(log_record)
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    rates = {}
+    for entry in spec.split(","):
+        name, _, rate = entry.strip().partition("=")
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Ne conserve qu'une partie des logs (sous WARNING) des loggers configurés"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Préfixe le plus long en premier: sqlalchemy.engine.Engine avant sqlalchemy
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return rate >= 1 or random.random() < rate
+        return True
+
+
+class RequestIdFilter(logging.Filter):
+    """Ajoute l'identifiant de la requête en cours (lu dans le contexte de l'appelant)"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Dépose les enregistrements dans la file sans jamais attendre"""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Message et exception mis en forme ici (arguments éventuellement mutables),
+        # l'encodage JSON est fait par le thread d'écriture
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+def configure_logging():
+    """Installe le pipeline de logs (handler de file sur le logger racine et thread d'écriture)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(parse_sampling(LOG_SAMPLING)))
+    queue_handler.addFilter(RequestIdFilter())
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(LOG_LEVEL)
+    root_logger.handlers = [queue_handler]
+    if SQL_ECHO:
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Écrit les logs en attente et arrête le thread d'écriture"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def new_request_id(header_value: Optional[str]) -> str:
+    """Identifiant reçu du proxy s'il est valide, sinon un nouvel identifiant"""
+    if header_value and REQUEST_ID_RE.match(header_value):
+        return header_value
+    return uuid.uuid4().hex
@@ -0,0 +1,90 @@
+"""
+Registre et métriques Prometheus partagés par l'application
+
+Avec plusieurs workers (gunicorn, uvicorn --workers), définir PROMETHEUS_MULTIPROC_DIR
+dans l'environnement des processus: chaque worker écrit ses valeurs dans ce répertoire
+partagé et /metrics agrège tous les workers. La variable doit être présente avant
+l'import de prometheus_client (variable d'environnement, pas seulement le .env).
+"""
+import os
+import glob
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR") or os.getenv("prometheus_multiproc_dir")
+
+# Prometheus metrics registry
+REGISTRY = CollectorRegistry()
+
+# Bornes des latences HTTP (secondes): la plupart des requêtes API sont sous 250 ms,
+# le scraping et les exports dépassent la seconde
+HTTP_LATENCY_BUCKETS = tuple(
+    float(b) for b in os.getenv("HTTP_LATENCY_BUCKETS", "0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,15,30").split(",") if b.strip()
+)
+# Valeur du label `path` pour les requêtes ne correspondant à aucune route
+UNMATCHED_PATH = "<unmatched>"
+
+# Requêtes HTTP entrantes, par modèle de route (/api/items/{id}) et non par URL
+REQUEST_COUNT = Counter('http_requests_total', 'Total HTTP requests', ['method', 'path', 'status'], registry=REGISTRY)
+REQUEST_LATENCY = Histogram(
+    'http_request_latency_seconds', 'HTTP request latency seconds', ['method', 'path'],
+    buckets=HTTP_LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+# Requêtes SQL par requête HTTP (app.core.query_stats)
+DB_QUERIES_PER_REQUEST = Histogram(
+    'db_queries_per_request', 'SQL queries per HTTP request', ['path'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+    registry=REGISTRY,
+)
+DB_TIME_PER_REQUEST = Histogram(
+    'db_time_per_request_seconds', 'Total SQL time per HTTP request seconds', ['path'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    registry=REGISTRY,
+)
+DB_SLOW_QUERIES = Counter('db_slow_queries_total', 'SQL queries slower than DB_SLOW_QUERY_MS', registry=REGISTRY)
+# Requêtes refusées par la limitation de débit (app.core.limits), par groupe de routes
+RATE_LIMITED = Counter('http_rate_limited_total', 'Requests rejected by rate limiting', ['group'], registry=REGISTRY)
+
+# Requêtes HTTP sortantes (scraping), par site cible
+SCRAPE_FETCH_LATENCY = Histogram(
+    'scrape_fetch_latency_seconds', 'Outbound scrape fetch latency seconds', ['host'],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15),
+    registry=REGISTRY,
+)
+SCRAPE_FETCH_COUNT = Counter('scrape_fetch_total', 'Outbound scrape fetches', ['host', 'outcome'], registry=REGISTRY)
+
+
+def generate_metrics() -> bytes:
+    """Exposition texte des métriques (agrégées sur tous les workers en mode multiprocessus)"""
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=PROMETHEUS_MULTIPROC_DIR)
+    return generate_latest(registry)
+
+
+def clear_multiprocess_dir():
+    """Vide le répertoire partagé au démarrage du serveur, avant le lancement des workers"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+        for path in glob.glob(os.path.join(PROMETHEUS_MULTIPROC_DIR, "*.db")):
+            os.remove(path)
+
+
+def mark_worker_dead(pid: int):
+    """Retire les jauges « live » d'un worker arrêté (ses compteurs restent comptabilisés)"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, PROMETHEUS_MULTIPROC_DIR)
+
+
+def route_template(scope, root_path: str) -> str:
+    """Modèle de la route qui a traité la requête (renseigné par le routeur dans le scope)"""
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path_format", None) or getattr(route, "path", UNMATCHED_PATH)
+    # Application montée (ex: /static): le routeur étend root_path du préfixe du montage
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:
+        return f"{mounted[len(root_path):]}/{{path}}"
+    return UNMATCHED_PATH
@@ -0,0 +1,197 @@
+"""
+Middleware ASGI unique pour les traitements communs à toutes les requêtes HTTP.
+
+En une seule couche (un seul passage sur les en-têtes, un seul `send` intercepté):
+identifiant de requête (X-Request-ID, contexte des logs), CORS (pré-requêtes OPTIONS
+traitées sans traverser l'application), limitation de débit globale par IP
+(RATE_LIMIT_DEFAULT, adresse du client résolue comme app.core.limits.client_address:
+X-Forwarded-For pris en compte derrière TRUSTED_PROXIES), métriques Prometheus par
+modèle de route et statistiques SQL.
+Les traces OpenTelemetry, optionnelles, restent un middleware séparé.
+
+Mesure du surcoût par requête: `python -m benchmarks.bench_middleware`.
+"""
+import math
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from app.core.limits import RATE_LIMITED_MESSAGE, check_rate_limit_group, resolve_client_address
+from app.core.logging_setup import REQUEST_ID_HEADER, dumps, new_request_id, request_id_var
+from app.core.metrics import REQUEST_COUNT, REQUEST_LATENCY, route_template
+from app.core.query_stats import QueryStats, query_stats_var, report_request
+
+# Valeur du label `path` des pré-requêtes CORS (aucune route n'est résolue)
+PREFLIGHT_PATH = "<preflight>"
+# Routes exclues de la limite globale (sondes, scrapes Prometheus)
+RATE_LIMIT_EXEMPT_PREFIXES = ("/metrics", "/api/health")
+CORS_MAX_AGE = 600
+# En-têtes toujours autorisés par les navigateurs (CORS-safelisted)
+SAFELISTED_HEADERS = frozenset({"accept", "accept-language", "content-language", "content-type"})
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class RequestMiddleware:
+    """Middleware ASGI: X-Request-ID, CORS, limite globale, métriques HTTP et SQL"""
+
+    def __init__(
+        self,
+        app,
+        allow_origins: Iterable[str] = (),
+        allow_methods: Iterable[str] = ("GET", "POST", "PUT", "DELETE", "PATCH"),
+        allow_headers: Iterable[str] = ("*",),
+        expose_headers: Iterable[str] = (),
+        allow_credentials: bool = True,
+        rate_limit_group: Optional[str] = "default",
+    ):
+        self.app = app
+        origins = [origin.strip() for origin in allow_origins if origin.strip()]
+        self.allow_all_origins = "*" in origins
+        self.allow_origins = frozenset(origins)
+        self.allow_methods = frozenset(method.upper() for method in allow_methods)
+        headers = [header.strip().lower() for header in allow_headers if header.strip()]
+        # "*": tous les en-têtes demandés par une pré-requête sont autorisés (renvoyés tels quels)
+        self.allow_all_headers = "*" in headers
+        self.allow_headers = SAFELISTED_HEADERS | frozenset(headers)
+        self.allow_credentials = allow_credentials
+        self.rate_limit_group = rate_limit_group
+
+        # En-têtes CORS constants, encodés une fois
+        self.simple_headers: Headers = []
+        if allow_credentials:
+            self.simple_headers.append((b"access-control-allow-credentials", b"true"))
+        if expose_headers:
+            self.simple_headers.append((b"access-control-expose-headers", ", ".join(expose_headers).encode()))
+        self.preflight_headers: Headers = [
+            (b"access-control-allow-methods", ", ".join(sorted(self.allow_methods)).encode()),
+            (b"access-control-max-age", str(CORS_MAX_AGE).encode()),
+        ]
+        if allow_credentials:
+            self.preflight_headers.append((b"access-control-allow-credentials", b"true"))
+        if not self.allow_all_headers:
+            self.preflight_headers.append((b"access-control-allow-headers", ", ".join(sorted(self.allow_headers)).encode()))
+
+    def is_allowed_origin(self, origin: bytes) -> bool:
+        return self.allow_all_origins or origin.decode("latin-1") in self.allow_origins
+
+    def cors_headers(self, origin: Optional[bytes]) -> Headers:
+        """En-têtes CORS d'une réponse (origine renvoyée telle quelle: cookies autorisés)"""
+        if origin is None or not self.is_allowed_origin(origin):
+            return []
+        return [(b"access-control-allow-origin", origin), (b"vary", b"Origin"), *self.simple_headers]
+
+    async def send_response(self, send, status: int, body: bytes, content_type: bytes, headers: Headers):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode()), *headers],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def preflight(self, send, origin: bytes, method: bytes, requested_headers: Optional[bytes], headers: Headers) -> int:
+        """Réponse à une pré-requête CORS, sans traverser l'application"""
+        failures = []
+        headers = headers + self.preflight_headers
+        if self.is_allowed_origin(origin):
+            headers += [(b"access-control-allow-origin", origin), (b"vary", b"Origin")]
+        else:
+            failures.append("origin")
+        if method.decode("latin-1").upper() not in self.allow_methods:
+            failures.append("method")
+        if self.allow_all_headers:
+            if requested_headers is not None:
+                headers.append((b"access-control-allow-headers", requested_headers))
+        elif requested_headers is not None:
+            requested = (header.strip().lower() for header in requested_headers.decode("latin-1").split(","))
+            if any(header and header not in self.allow_headers for header in requested):
+                failures.append("headers")
+        status, body = (400, ("Disallowed CORS " + ", ".join(failures)).encode()) if failures else (200, b"OK")
+        await self.send_response(send, status, body, b"text/plain; charset=utf-8", headers)
+        return status
+
+    def rate_limited_path(self, scope) -> bool:
+        if self.rate_limit_group is None:
+            return False
+        path = scope["path"]
+        return path.startswith("/api") and not path.startswith(RATE_LIMIT_EXEMPT_PREFIXES)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+
+        # Un seul parcours des en-têtes de la requête
+        request_id_header = origin = preflight_method = preflight_headers = forwarded_for = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                request_id_header = value
+            elif name == b"x-forwarded-for":
+                forwarded_for = value
+            elif name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                preflight_method = value
+            elif name == b"access-control-request-headers":
+                preflight_headers = value
+
+        request_id = new_request_id(request_id_header.decode("latin-1") if request_id_header else None)
+        request_id_headers = [(REQUEST_ID_HEADER, request_id.encode())]
+
+        if method == "OPTIONS" and origin is not None and preflight_method is not None:
+            status = await self.preflight(send, origin, preflight_method, preflight_headers, request_id_headers)
+            self.observe(method, PREFLIGHT_PATH, status, start)
+            return
+
+        cors_headers = self.cors_headers(origin)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                extra = request_id_headers + cors_headers
+                if cors_headers:
+                    # Vary: Origin ajouté à un Vary existant (ex: Accept des images)
+                    for index, (name, value) in enumerate(headers):
+                        if name.lower() == b"vary":
+                            headers[index] = (name, value + b", Origin")
+                            extra = [header for header in extra if header[0] != b"vary"]
+                            break
+                message["headers"] = headers + extra
+            await send(message)
+
+        stats = QueryStats()
+        request_id_token = request_id_var.set(request_id)
+        stats_token = query_stats_var.set(stats)
+        try:
+            if self.rate_limited_path(scope):
+                client = scope.get("client")
+                address = resolve_client_address(
+                    client[0] if client else None,
+                    forwarded_for.decode("latin-1") if forwarded_for else None,
+                )
+                retry_after = await check_rate_limit_group(self.rate_limit_group, address)
+                if retry_after > 0:
+                    body = dumps({"error": RATE_LIMITED_MESSAGE, "status_code": 429}).encode()
+                    await self.send_response(
+                        send_wrapper, 429, body, b"application/json",
+                        [(b"retry-after", str(math.ceil(retry_after)).encode())],
+                    )
+                    return
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_stats_var.reset(stats_token)
+            request_id_var.reset(request_id_token)
+            path = route_template(scope, root_path)
+            self.observe(method, path, status, start)
+            report_request(stats, method, path)
+
+    @staticmethod
+    def observe(method: str, path: str, status: int, start: float):
+        REQUEST_LATENCY.labels(method=method, path=path).observe(time.perf_counter() - start)
+        REQUEST_COUNT.labels(method=method, path=path, status=str(status)).inc()
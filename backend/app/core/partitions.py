@@ -0,0 +1,144 @@
+"""
+Gestion des partitions mensuelles PostgreSQL (PARTITION BY RANGE sur une date)
+"""
+import re
+import logging
+from datetime import date, datetime
+from typing import List, Optional
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+_IDENTIFIER_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+_PARTITION_SUFFIX_RE = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(value: date) -> date:
+    """Premier jour du mois de `value`"""
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Ajoute (ou retire) un nombre de mois à un premier jour de mois"""
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Nom de la partition mensuelle: <table>_pYYYYMM"""
+    return f"{table}_p{month:%Y%m}"
+
+
+def partition_month(table: str, name: str) -> Optional[date]:
+    """Retrouve le mois couvert par une partition à partir de son nom"""
+    if not name.startswith(table + "_p"):
+        return None
+    match = _PARTITION_SUFFIX_RE.search(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def _check_identifier(name: str) -> str:
+    # Les noms de tables sont interpolés dans du DDL: on n'accepte que des identifiants simples
+    if not _IDENTIFIER_RE.match(name):
+        raise ValueError(f"Identifiant SQL invalide: {name!r}")
+    return name
+
+
+async def is_partitioned(conn, table: str) -> bool:
+    """Vrai si `table` existe et est partitionnée (absente ou simple table: faux)"""
+    result = await conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = :table
+        )
+    """), {"table": _check_identifier(table)})
+    return bool(result.scalar())
+
+
+async def ensure_monthly_partitions(conn, table: str, start: date, months_ahead: int = 1,
+                                    column: Optional[str] = None) -> List[str]:
+    """
+    Crée (si besoin) les partitions mensuelles de `table` depuis le mois de `start`
+    jusqu'à `months_ahead` mois plus tard inclus.
+
+    Si la table possède une partition par défaut (<table>_default) et que `column`
+    (clé de partitionnement) est fourni, les lignes du mois déjà présentes dans la
+    partition par défaut y sont déplacées avant l'attachement.
+
+    Returns:
+        Liste des partitions existantes ou créées
+    """
+    _check_identifier(table)
+    default_name = f"{table}_default"
+    has_default = False
+    if column:
+        _check_identifier(column)
+        result = await conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": default_name})
+        has_default = bool(result.scalar())
+
+    first = month_start(start)
+    names = []
+    for offset in range(months_ahead + 1):
+        lower = add_months(first, offset)
+        upper = add_months(lower, 1)
+        name = partition_name(table, lower)
+        bounds = f"FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        names.append(name)
+
+        if not has_default:
+            await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES {bounds}"))
+            continue
+
+        result = await conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+        if result.scalar():
+            continue
+        # Créer la partition détachée, y déplacer les lignes égarées dans la partition
+        # par défaut, puis l'attacher (ATTACH vérifie que la partition par défaut est vide pour ce mois)
+        await conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        await conn.execute(text(
+            f"WITH moved AS (DELETE FROM {default_name} "
+            f"WHERE {column} >= '{lower.isoformat()}' AND {column} < '{upper.isoformat()}' RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ))
+        await conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+        logger.info("Partition créée: %s", name)
+    return names
+
+
+async def list_partitions(conn, table: str) -> List[str]:
+    """Liste les partitions attachées à une table partitionnée"""
+    result = await conn.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :table
+        ORDER BY c.relname
+    """), {"table": _check_identifier(table)})
+    return [row[0] for row in result.all()]
+
+
+async def drop_partitions_before(conn, table: str, cutoff: date) -> List[str]:
+    """
+    Supprime les partitions mensuelles dont toutes les lignes sont antérieures à `cutoff`.
+    Un DROP TABLE sur une partition est instantané, contrairement à un DELETE massif.
+
+    Returns:
+        Liste des partitions supprimées
+    """
+    dropped = []
+    for name in await list_partitions(conn, table):
+        month = partition_month(table, name)
+        if month is None:
+            continue
+        if add_months(month, 1) <= cutoff:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {_check_identifier(name)}"))
+            dropped.append(name)
+    if dropped:
+        logger.info("Partitions supprimées pour %s: %s", table, ", ".join(dropped))
+    return dropped
@@ -0,0 +1,95 @@
+"""
+Pools de processus pour les traitements CPU (analyse HTML, images...) hors de la boucle
+asyncio.
+
+Chaque pool borne le nombre de tâches en cours à son nombre de workers (les suivantes
+attendent côté asyncio, sans s'accumuler dans la file de l'executor) et applique un
+délai maximum par tâche. Un processus ne pouvant pas être interrompu proprement,
+un dépassement recycle le pool: ses workers sont arrêtés et les tâches encore en
+cours échouent avec BrokenProcessPool.
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_pools: List["ProcessPool"] = []
+
+
+def _mp_context():
+    # fork depuis un processus multi-threadé (asyncio, pools SQL, scheduler) est fragile
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ProcessPool:
+    """ProcessPoolExecutor créé à la demande, borné et avec délai par tâche"""
+
+    def __init__(self, name: str, max_workers: int, timeout: float):
+        self.name = name
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        _pools.append(self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_mp_context())
+            logger.info("Pool de processus %s démarré (%d workers)", self.name, self.max_workers)
+        return self._executor
+
+    def _recycle(self, executor: ProcessPoolExecutor):
+        if self._executor is not executor:
+            return  # déjà remplacé par une autre tâche
+        self._executor = None
+        # Pas d'API publique pour arrêter un worker bloqué avant Python 3.14
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Pool de processus %s recyclé", self.name)
+
+    async def run(self, func: Callable, *args):
+        """
+        Exécute `func(*args)` dans un worker (fonction et arguments picklables).
+        Sans workers (max_workers=0), s'exécute dans un thread.
+
+        Raises:
+            asyncio.TimeoutError si la tâche dépasse `timeout` secondes
+        """
+        if not self.enabled:
+            return await asyncio.wait_for(asyncio.to_thread(func, *args), self.timeout)
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        async with self._slots:
+            executor = self._get_executor()
+            future = asyncio.get_running_loop().run_in_executor(executor, func, *args)
+            try:
+                return await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Tâche %s interrompue après %.1fs", self.name, self.timeout)
+                self._recycle(executor)
+                raise
+            except BrokenProcessPool:
+                self._recycle(executor)
+                raise
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def shutdown_process_pools():
+    """Arrête tous les pools (shutdown de l'application)"""
+    for pool in _pools:
+        pool.shutdown()
@@ -0,0 +1,149 @@
+"""
+Instrumentation des requêtes SQL (engines sync et async).
+
+Pour chaque requête HTTP: nombre de requêtes SQL, temps total passé en base et requête
+la plus lente, exportés dans Prometheus (par modèle de route) et journalisés quand les
+seuils sont dépassés. Les requêtes SQL lentes sont journalisées (échantillonnées) avec
+leur SQL normalisé.
+
+Dans les tests, `track_queries()` permet de vérifier le budget de requêtes d'un endpoint:
+
+    with track_queries() as stats:
+        client.get("/api/wishlists/mine")
+    assert stats.count <= 3
+"""
+import os
+import re
+import time
+import random
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import event
+
+from app.core.metrics import DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST, DB_SLOW_QUERIES
+
+logger = logging.getLogger(__name__)
+
+# Requête SQL lente (ms)
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+# Requête HTTP signalée au-delà de ce nombre de requêtes SQL ou de ce temps en base (ms)
+DB_REQUEST_MAX_QUERIES = int(os.getenv("DB_REQUEST_MAX_QUERIES", "30"))
+DB_REQUEST_SLOW_MS = float(os.getenv("DB_REQUEST_SLOW_MS", "500"))
+# Part des dépassements journalisés (0 à 1)
+DB_SLOW_LOG_SAMPLE_RATE = float(os.getenv("DB_SLOW_LOG_SAMPLE_RATE", "1"))
+
+STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\([^)]*\)s|\$\d+|:\w+)\s*,?)+\)", re.IGNORECASE)
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+class QueryStats:
+    """Statistiques des requêtes SQL d'une requête HTTP (ou d'un bloc track_queries)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: List[str] = []
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.total_time += duration
+        self.statements.append(statement)
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+
+# Statistiques de la requête HTTP en cours (renseignées par app.core.middleware)
+query_stats_var: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+# Blocs track_queries() actifs (tests): reçoivent les requêtes de tous les contextes
+_trackers: List[QueryStats] = []
+
+
+def normalize_sql(statement: str) -> str:
+    """SQL sans valeurs littérales ni listes IN variables: regroupe les requêtes identiques"""
+    sql = STRING_LITERAL_RE.sub("?", statement)
+    sql = NUMBER_LITERAL_RE.sub("?", sql)
+    sql = IN_LIST_RE.sub("IN (...)", sql)
+    return WHITESPACE_RE.sub(" ", sql).strip()
+
+
+def sampled() -> bool:
+    return DB_SLOW_LOG_SAMPLE_RATE >= 1 or random.random() < DB_SLOW_LOG_SAMPLE_RATE
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    stats = query_stats_var.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    for tracker in _trackers:
+        tracker.record(statement, duration)
+
+    if duration * 1000 >= DB_SLOW_QUERY_MS:
+        DB_SLOW_QUERIES.inc()
+        if sampled():
+            logger.warning(
+                "Requête SQL lente (%.0f ms)", duration * 1000,
+                extra={"extra": {"duration_ms": round(duration * 1000, 1), "sql": normalize_sql(statement)}},
+            )
+
+
+def _handle_error(exception_context):
+    # Requête en échec: pas d'after_cursor_execute, la pile de départs doit rester alignée
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(engine):
+    """Branche les compteurs sur un engine (sync, ou AsyncEngine via son sync_engine)"""
+    target = getattr(engine, "sync_engine", engine)
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        event.listen(target, "handle_error", _handle_error)
+
+
+@contextmanager
+def track_queries():
+    """Compte les requêtes SQL exécutées dans le bloc (tous contextes confondus)"""
+    stats = QueryStats()
+    _trackers.append(stats)
+    try:
+        yield stats
+    finally:
+        _trackers.remove(stats)
+
+
+def report_request(stats: QueryStats, method: str, path: str):
+    """Exporte les statistiques SQL d'une requête HTTP (appelé par app.core.middleware)"""
+    DB_QUERIES_PER_REQUEST.labels(path=path).observe(stats.count)
+    DB_TIME_PER_REQUEST.labels(path=path).observe(stats.total_time)
+    too_many = stats.count > DB_REQUEST_MAX_QUERIES
+    too_slow = stats.total_time * 1000 > DB_REQUEST_SLOW_MS
+    if (too_many or too_slow) and sampled():
+        logger.warning(
+            "Requête HTTP coûteuse en base: %d requêtes SQL, %.0f ms (%s %s)",
+            stats.count, stats.total_time * 1000, method, path,
+            extra={"extra": {
+                "method": method,
+                "route": path,
+                "db_queries": stats.count,
+                "db_time_ms": round(stats.total_time * 1000, 1),
+                "slowest_ms": round(stats.slowest_time * 1000, 1),
+                "slowest_sql": normalize_sql(stats.slowest_statement or ""),
+            }},
+        )
@@ -0,0 +1,49 @@
+"""
+Rendu JSON rapide des réponses (optionnel, FAST_JSON_RESPONSES=true).
+
+Par défaut, une route avec `response_model` voit ses objets Pydantic convertis en dict,
+revalidés contre le modèle, passés dans jsonable_encoder puis encodés par json.dumps.
+Avec FAST_JSON_RESPONSES:
+
+- la classe de réponse par défaut de l'application devient ORJSONResponse;
+- `model_response(contenu, Type)` encode directement des objets construits par
+  l'application (ItemOut, ActivityResponse...) avec le sérialiseur compilé de
+  Pydantic pour ce type, sans revalidation. Le `response_model` de la route reste
+  déclaré pour la documentation OpenAPI.
+
+Désactivé, `model_response` renvoie le contenu tel quel: comportement FastAPI habituel.
+Mesure: `python -m benchmarks.bench_responses`.
+"""
+import os
+from functools import lru_cache
+from typing import Any, Optional
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import TypeAdapter
+
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() in ("true", "1", "yes", "on")
+
+DefaultResponse = ORJSONResponse if FAST_JSON_RESPONSES else JSONResponse
+
+
+@lru_cache(maxsize=None)
+def type_adapter(model_type) -> TypeAdapter:
+    """Validateur et sérialiseur compilés une seule fois par type"""
+    return TypeAdapter(model_type)
+
+
+def render_models(content: Any, model_type) -> bytes:
+    return type_adapter(model_type).dump_json(content)
+
+
+def model_response(content: Any, model_type, enabled: Optional[bool] = None):
+    """
+    Réponse JSON d'objets de confiance (construits par l'application), sans revalidation.
+
+    Args:
+        content: objet(s) Pydantic du type `model_type` (ex: liste de ItemOut)
+        model_type: type déclaré (ex: List[ItemOut]), identique au response_model de la route
+        enabled: force le rendu rapide (par défaut FAST_JSON_RESPONSES)
+    """
+    if not (FAST_JSON_RESPONSES if enabled is None else enabled):
+        return content
+    return Response(content=render_models(content, model_type), media_type="application/json")
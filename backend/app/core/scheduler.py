@@ -0,0 +1,114 @@
+"""
+Planificateur des tâches de fond (APScheduler)
+"""
+import os
+import zlib
+import logging
+from datetime import datetime, timezone
+from contextlib import asynccontextmanager
+from typing import Optional
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import text
+
+from app.core.async_db import async_engine
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() in ("true", "1", "yes", "on")
+NOTIFICATIONS_ARCHIVE_INTERVAL_MINUTES = int(os.getenv("NOTIFICATIONS_ARCHIVE_INTERVAL_MINUTES", "60"))
+ACTIVITY_MAINTENANCE_INTERVAL_MINUTES = int(os.getenv("ACTIVITY_MAINTENANCE_INTERVAL_MINUTES", "30"))
+SCRAPE_CACHE_PURGE_INTERVAL_MINUTES = int(os.getenv("SCRAPE_CACHE_PURGE_INTERVAL_MINUTES", "60"))
+PRICE_TRACKING_INTERVAL_MINUTES = int(os.getenv("PRICE_TRACKING_INTERVAL_MINUTES", "30"))
+
+scheduler: Optional[AsyncIOScheduler] = None
+
+
+@asynccontextmanager
+async def exclusive_job(name: str):
+    """
+    Ouvre une connexion et prend un verrou consultatif Postgres pour le job `name`.
+    Avec plusieurs workers, seul celui qui obtient le verrou exécute le job:
+    les autres reçoivent None et doivent abandonner.
+    """
+    key = zlib.crc32(name.encode())
+    async with async_engine.connect() as conn:
+        result = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})
+        locked = bool(result.scalar())
+        await conn.commit()
+        if not locked:
+            logger.debug("Job %s déjà en cours sur un autre worker", name)
+            yield None
+            return
+        try:
+            yield conn
+        finally:
+            await conn.rollback()
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+            await conn.commit()
+
+
+def register_jobs(sched: AsyncIOScheduler):
+    """Enregistre les tâches périodiques"""
+    from app.notifications.archive import archive_read_notifications
+    from app.activities.maintenance import run_activity_maintenance
+    from app.scrape.cache import purge_expired_results
+    from app.items.price_tracking import run_price_tracking
+
+    if NOTIFICATIONS_ARCHIVE_INTERVAL_MINUTES > 0:
+        sched.add_job(
+            archive_read_notifications,
+            "interval",
+            minutes=NOTIFICATIONS_ARCHIVE_INTERVAL_MINUTES,
+            id="notifications_archive",
+            coalesce=True,
+            max_instances=1,
+        )
+    if ACTIVITY_MAINTENANCE_INTERVAL_MINUTES > 0:
+        # Exécuté dès le démarrage pour garantir les partitions du mois courant
+        sched.add_job(
+            run_activity_maintenance,
+            "interval",
+            minutes=ACTIVITY_MAINTENANCE_INTERVAL_MINUTES,
+            id="activity_maintenance",
+            next_run_time=datetime.now(timezone.utc),
+            coalesce=True,
+            max_instances=1,
+        )
+    if SCRAPE_CACHE_PURGE_INTERVAL_MINUTES > 0:
+        sched.add_job(
+            purge_expired_results,
+            "interval",
+            minutes=SCRAPE_CACHE_PURGE_INTERVAL_MINUTES,
+            id="scrape_cache_purge",
+            coalesce=True,
+            max_instances=1,
+        )
+    if PRICE_TRACKING_INTERVAL_MINUTES > 0:
+        sched.add_job(
+            run_price_tracking,
+            "interval",
+            minutes=PRICE_TRACKING_INTERVAL_MINUTES,
+            id="price_tracking",
+            coalesce=True,
+            max_instances=1,
+        )
+
+
+async def start_scheduler():
+    """Démarre le planificateur si activé"""
+    global scheduler
+    if not SCHEDULER_ENABLED:
+        logger.info("Planificateur désactivé (SCHEDULER_ENABLED=false)")
+        return
+    scheduler = AsyncIOScheduler(timezone="UTC")
+    register_jobs(scheduler)
+    scheduler.start()
+    logger.info("Planificateur démarré (%d jobs)", len(scheduler.get_jobs()))
+
+
+async def shutdown_scheduler():
+    """Arrête le planificateur"""
+    global scheduler
+    if scheduler:
+        scheduler.shutdown(wait=False)
+        scheduler = None
@@ -0,0 +1,179 @@
+"""
+Configuration du site en mémoire.
+
+La table site_config est chargée au démarrage de chaque worker; les lectures
+(`get_config`, `get_config_bool`) ne touchent plus la base. Les modifications faites
+par l'administration émettent un NOTIFY Postgres (canal SITE_CONFIG_CHANNEL, envoyé au
+commit): chaque worker écoute ce canal sur une connexion dédiée et recharge sa copie.
+Après une reconnexion, et toutes les SITE_CONFIG_REFRESH_SECONDS secondes en secours,
+la configuration est rechargée sans attendre de notification.
+"""
+import os
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional
+from sqlalchemy import text
+
+from app.core.async_db import async_engine, ASYNC_DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+SITE_CONFIG_CHANNEL = "site_config_changed"
+# Rechargement de secours (0: uniquement sur notification)
+SITE_CONFIG_REFRESH_SECONDS = float(os.getenv("SITE_CONFIG_REFRESH_SECONDS", "300"))
+
+TRUE_VALUES = ("true", "1", "yes", "on")
+
+_snapshot: Optional[Dict[str, str]] = None
+_loading: Optional[asyncio.Task] = None
+_changed: Optional[asyncio.Event] = None
+_task: Optional[asyncio.Task] = None
+
+
+def is_loaded() -> bool:
+    return _snapshot is not None
+
+
+def cached_config(key: str, default: Optional[str] = None) -> Optional[str]:
+    """Lecture synchrone de la copie en mémoire (valeur par défaut si non chargée)"""
+    if _snapshot is None:
+        return default
+    return _snapshot.get(key, default)
+
+
+def as_bool(value: Optional[str], default: bool) -> bool:
+    if value is None:
+        return default
+    return value.lower() in TRUE_VALUES
+
+
+async def fetch_site_config() -> Dict[str, str]:
+    async with async_engine.connect() as conn:
+        result = await conn.execute(text("SELECT key, value FROM site_config"))
+        return {key: value for key, value in result.all()}
+
+
+async def _load() -> Dict[str, str]:
+    global _snapshot
+    _snapshot = await fetch_site_config()
+    return _snapshot
+
+
+def _load_done(_):
+    global _loading
+    _loading = None
+
+
+async def reload_site_config() -> Dict[str, str]:
+    """Recharge la configuration (les appels simultanés partagent la même requête)"""
+    global _loading
+    if _loading is None:
+        _loading = asyncio.ensure_future(_load())
+        _loading.add_done_callback(_load_done)
+    return await asyncio.shield(_loading)
+
+
+async def get_config(key: str, default: Optional[str] = None) -> Optional[str]:
+    """Valeur d'une configuration du site (chargée au premier appel si besoin)"""
+    if _snapshot is None:
+        try:
+            await reload_site_config()
+        except Exception as e:
+            # Base non initialisée ou injoignable: valeur par défaut, nouvel essai au prochain appel
+            logger.warning("Configuration du site non chargée: %s", e)
+            return default
+    return _snapshot.get(key, default)
+
+
+async def get_config_bool(key: str, default: bool = False) -> bool:
+    return as_bool(await get_config(key), default)
+
+
+def apply_updates(updates: Dict[str, str]):
+    """Met à jour la copie locale après une modification (les autres workers sont notifiés)"""
+    global _snapshot
+    if _snapshot is not None:
+        _snapshot = {**_snapshot, **updates}
+
+
+async def notify_site_config_changed(session, keys: Iterable[str]):
+    """Émet la notification dans la transaction de la session (envoyée au commit)"""
+    await session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": SITE_CONFIG_CHANNEL, "payload": ",".join(keys)[:7000]},
+    )
+
+
+def listen_dsn() -> str:
+    # asyncpg n'accepte pas le suffixe de driver SQLAlchemy
+    return ASYNC_DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def _on_notify(connection, pid, channel, payload):
+    if _changed is not None:
+        _changed.set()
+
+
+def _on_connection_lost(connection):
+    if _changed is not None:
+        _changed.set()
+
+
+async def _listen():
+    import asyncpg
+
+    delay = 1
+    timeout = SITE_CONFIG_REFRESH_SECONDS or None
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(listen_dsn(), timeout=10)
+            conn.add_termination_listener(_on_connection_lost)
+            await conn.add_listener(SITE_CONFIG_CHANNEL, _on_notify)
+            delay = 1
+            # Notifications éventuellement manquées pendant la déconnexion
+            _changed.set()
+            while not conn.is_closed():
+                try:
+                    await asyncio.wait_for(_changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                # Effacé avant le rechargement: une notification reçue pendant la
+                # requête déclenche un nouveau rechargement
+                _changed.clear()
+                await reload_site_config()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Écoute de la configuration du site interrompue: %s", e)
+        finally:
+            if conn is not None and not conn.is_closed():
+                try:
+                    await conn.close(timeout=5)
+                except Exception:
+                    conn.terminate()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 60)
+
+
+async def start_site_config_listener():
+    """Charge la configuration et écoute les modifications (démarrage de chaque worker)"""
+    global _task, _changed
+    try:
+        await reload_site_config()
+    except Exception as e:
+        logger.warning("Configuration du site non chargée au démarrage: %s", e)
+    if _task is None:
+        _changed = asyncio.Event()
+        _task = asyncio.get_running_loop().create_task(_listen())
+
+
+async def stop_site_config_listener():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,91 @@
+"""
+Traces OpenTelemetry (optionnelles).
+
+Activées par OTEL_ENABLED=true si les paquets OpenTelemetry sont installés
+(`poetry install -E tracing`). Désactivées, rien n'est importé ni instrumenté: aucun
+surcoût. Instrumente les routes FastAPI, les deux engines SQLAlchemy, le client
+redis.asyncio et les requêtes httpx sortantes (scraping, images), puis exporte en OTLP.
+
+L'échantillonnage et l'export suivent les variables standard du SDK:
+OTEL_TRACES_SAMPLER / OTEL_TRACES_SAMPLER_ARG, OTEL_EXPORTER_OTLP_ENDPOINT, etc.
+"""
+import os
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+OTEL_ENABLED = os.getenv("OTEL_ENABLED", "false").lower() in ("true", "1", "yes", "on")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "wisherr-backend")
+# Routes non tracées (sondes et scrapes Prometheus)
+OTEL_EXCLUDED_URLS = os.getenv("OTEL_EXCLUDED_URLS", "/metrics,/api/health")
+
+_provider = None
+_uninstrument = []
+
+
+def setup_tracing(app, exporter=None) -> bool:
+    """
+    Active les traces pour l'application (à appeler avant son démarrage).
+
+    Args:
+        exporter: exportateur de spans (OTLP/HTTP par défaut; ex: InMemorySpanExporter en test)
+
+    Returns:
+        True si l'instrumentation est active
+    """
+    global _provider
+    if not OTEL_ENABLED and exporter is None:
+        return False
+    if _provider is not None:
+        return True
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+        from opentelemetry.instrumentation.redis import RedisInstrumentor
+        from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+    except ImportError as e:
+        logger.warning("OpenTelemetry non installé (poetry install -E tracing), traces désactivées: %s", e)
+        return False
+
+    from app.core.db import engine
+    from app.core.async_db import async_engine
+
+    # Échantillonneur lu par le SDK depuis OTEL_TRACES_SAMPLER(_ARG)
+    provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    if exporter is None:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    else:
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _provider = provider
+
+    FastAPIInstrumentor.instrument_app(app, tracer_provider=provider, excluded_urls=OTEL_EXCLUDED_URLS)
+    _uninstrument.append(lambda: FastAPIInstrumentor.uninstrument_app(app))
+    sqlalchemy = SQLAlchemyInstrumentor()
+    sqlalchemy.instrument(engines=[engine, async_engine.sync_engine], tracer_provider=provider, enable_commenter=False)
+    # Client redis.asyncio de app.core.cache et client httpx partagé de app.core.http,
+    # créés au démarrage (après l'instrumentation)
+    redis = RedisInstrumentor()
+    redis.instrument(tracer_provider=provider)
+    httpx = HTTPXClientInstrumentor()
+    httpx.instrument(tracer_provider=provider)
+    _uninstrument.extend((sqlalchemy.uninstrument, redis.uninstrument, httpx.uninstrument))
+    logger.info("Traces OpenTelemetry actives (service %s)", OTEL_SERVICE_NAME)
+    return True
+
+
+def shutdown_tracing(timeout_millis: Optional[int] = 5000):
+    """Exporte les spans en attente et retire l'instrumentation (arrêt du worker)"""
+    global _provider
+    while _uninstrument:
+        _uninstrument.pop()()
+    if _provider is not None:
+        _provider.force_flush(timeout_millis)
+        _provider.shutdown()
+        _provider = None
@@ -3,13 +3,17 @@ import os
 from typing import Optional
 from sqlmodel import Session, select
 from app.core.db import engine
+from app.core import site_config
 
 
 def get_site_config(key: str, default: Optional[str] = None) -> Optional[str]:
     """
-    Récupère une configuration du site depuis la DB.
-    Si la config n'existe pas en DB, retourne la valeur par défaut.
+    Récupère une configuration du site (copie en mémoire, sinon depuis la DB).
+    Si la config n'existe pas, retourne la valeur par défaut.
+    Dans le code async, préférer `site_config.get_config`.
     """
+    if site_config.is_loaded():
+        return site_config.cached_config(key, default)
     try:
         from app.models import SiteConfig
         with Session(engine) as session:
@@ -25,10 +29,7 @@ def get_site_config(key: str, default: Optional[str] = None) -> Optional[str]:
 
 def get_site_config_bool(key: str, default: bool = False) -> bool:
     """
-    Récupère une configuration booléenne du site depuis la DB.
+    Récupère une configuration booléenne du site.
     """
     value = get_site_config(key, str(default).lower())
-    if value is None:
-        return default
-    return value.lower() in ("true", "1", "yes", "on")
-
+    return site_config.as_bool(value, default)
@@ -0,0 +1,241 @@
+"""
+Suivi des prix des articles (job planifié).
+
+Les articles disponibles ayant une URL sont revérifiés par lots, les plus proches de la
+date d'événement de leur liste en premier (et plus souvent). Les requêtes sont
+conditionnelles (ETag / Last-Modified) et espacées par domaine. Chaque changement de
+prix est ajouté à `item_price_history`; une baisse notifie le propriétaire de la liste.
+Le prix de référence est le premier prix observé (pas le prix saisi dans l'article): la
+première vérification réussie l'enregistre sans notifier.
+
+Le verrou du job n'est tenu que pour réserver le lot (prochaine vérification repoussée
+de PRICE_TRACKING_CLAIM_MINUTES): les téléchargements se font sans connexion ouverte,
+les résultats sont enregistrés ensuite dans une nouvelle session.
+"""
+import os
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Optional
+import httpx
+from sqlalchemy import bindparam, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.async_db import async_engine
+from app.core.http import registrable_domain
+from app.core.scheduler import exclusive_job
+from app.notifications.routes import create_notification
+from app.scrape.engine import fetch_and_parse
+
+logger = logging.getLogger(__name__)
+
+# Articles vérifiés par passage du job
+PRICE_TRACKING_BATCH_SIZE = int(os.getenv("PRICE_TRACKING_BATCH_SIZE", "50"))
+# Vérifications simultanées
+PRICE_TRACKING_CONCURRENCY = int(os.getenv("PRICE_TRACKING_CONCURRENCY", "4"))
+# Délai minimum entre deux requêtes vers un même domaine (secondes)
+PRICE_TRACKING_DOMAIN_DELAY = float(os.getenv("PRICE_TRACKING_DOMAIN_DELAY", "5"))
+# Fréquence de vérification, et fréquence renforcée à l'approche de l'événement
+PRICE_TRACKING_INTERVAL_HOURS = float(os.getenv("PRICE_TRACKING_INTERVAL_HOURS", "24"))
+PRICE_TRACKING_URGENT_HOURS = float(os.getenv("PRICE_TRACKING_URGENT_HOURS", "6"))
+PRICE_TRACKING_URGENT_DAYS = int(os.getenv("PRICE_TRACKING_URGENT_DAYS", "14"))
+# Baisse minimale (en %) pour notifier le propriétaire
+PRICE_DROP_MIN_PERCENT = float(os.getenv("PRICE_DROP_MIN_PERCENT", "1"))
+# Délai avant qu'un lot réservé mais non enregistré (worker arrêté) soit repris
+PRICE_TRACKING_CLAIM_MINUTES = int(os.getenv("PRICE_TRACKING_CLAIM_MINUTES", "60"))
+
+MAX_BACKOFF_HOURS = 7 * 24
+
+SEED_SQL = text("""
+    INSERT INTO item_price_tracking (item_id, url)
+    SELECT i.id, i.url
+    FROM items i
+    WHERE i.url IS NOT NULL AND i.url <> '' AND i.status = 'available'
+      AND NOT EXISTS (SELECT 1 FROM item_price_tracking t WHERE t.item_id = i.id)
+    ON CONFLICT (item_id) DO NOTHING
+""")
+
+DUE_SQL = text("""
+    SELECT t.item_id, i.url, t.url AS tracked_url, t.etag, t.last_modified,
+           t.last_price, t.currency, t.failures,
+           i.name, i.wishlist_id, w.owner_id, w.event_date
+    FROM item_price_tracking t
+    JOIN items i ON i.id = t.item_id
+    JOIN wishlists w ON w.id = i.wishlist_id
+    WHERE t.next_check_at <= :now
+      AND i.url IS NOT NULL AND i.url <> '' AND i.status = 'available'
+      AND (w.event_date IS NULL OR w.event_date >= :today)
+    ORDER BY w.event_date IS NULL, w.event_date, t.next_check_at
+    LIMIT :limit
+""")
+
+UPDATE_SQL = text("""
+    UPDATE item_price_tracking
+    SET url = :url, etag = :etag, last_modified = :last_modified,
+        last_price = COALESCE(:price, last_price), currency = COALESCE(:currency, currency),
+        last_checked_at = :now, next_check_at = :next_check_at, failures = :failures
+    WHERE item_id = :item_id
+""")
+
+HISTORY_SQL = text("""
+    INSERT INTO item_price_history (item_id, observed_at, price, currency)
+    VALUES (:item_id, :now, :price, :currency)
+    ON CONFLICT DO NOTHING
+""")
+
+CLAIM_SQL = text("""
+    UPDATE item_price_tracking SET next_check_at = :claimed_until
+    WHERE item_id IN :item_ids
+""").bindparams(bindparam("item_ids", expanding=True))
+
+
+class DomainThrottle:
+    """Espacement minimum entre deux requêtes vers un même domaine"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._next: Dict[str, float] = {}
+
+    async def wait(self, domain: str):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # Le créneau est réservé avant d'attendre: pas de verrou nécessaire
+        start = max(now, self._next.get(domain, 0.0))
+        self._next[domain] = start + self.delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def next_check_delay(event_date: Optional[date], today: date, failures: int = 0) -> timedelta:
+    """Délai avant la prochaine vérification (plus court près de l'événement, recul après échec)"""
+    urgent = event_date is not None and (event_date - today).days <= PRICE_TRACKING_URGENT_DAYS
+    hours = PRICE_TRACKING_URGENT_HOURS if urgent else PRICE_TRACKING_INTERVAL_HOURS
+    if failures:
+        hours = min(hours * 2 ** failures, MAX_BACKOFF_HOURS)
+    return timedelta(hours=hours)
+
+
+def is_price_drop(old: Optional[float], new: Optional[float]) -> bool:
+    return old is not None and new is not None and new < old * (1 - PRICE_DROP_MIN_PERCENT / 100)
+
+
+def format_price(value: float, currency: Optional[str]) -> str:
+    amount = f"{value:.2f}".replace(".", ",")
+    return f"{amount} €" if currency in (None, "EUR") else f"{amount} {currency}"
+
+
+async def check_item(row, throttle: DomainThrottle, slots: asyncio.Semaphore) -> dict:
+    """Revérifie une page produit; renvoie le statut (ok, unchanged, error) et les données utiles"""
+    url = row["url"]
+    headers = {}
+    # Les validateurs ne valent que pour l'URL qui les a produits
+    if row["tracked_url"] == url:
+        if row["etag"]:
+            headers["If-None-Match"] = row["etag"]
+        if row["last_modified"]:
+            headers["If-Modified-Since"] = row["last_modified"]
+
+    await throttle.wait(registrable_domain(url))
+    async with slots:
+        try:
+            response, data = await fetch_and_parse(url, headers=headers or None)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 304:
+                return {"status": "unchanged"}
+            return {"status": "error", "error": f"HTTP {e.response.status_code}"}
+        except Exception as e:
+            return {"status": "error", "error": str(e) or type(e).__name__}
+
+    return {
+        "status": "ok",
+        "price": data.get("price"),
+        "currency": (data.get("currency") or "")[:3] or None,
+        "etag": (response.headers.get("etag") or "")[:256] or None,
+        "last_modified": (response.headers.get("last-modified") or "")[:64] or None,
+    }
+
+
+async def record_check(session: AsyncSession, row, check: dict, now: datetime):
+    """Enregistre le résultat d'une vérification (état, historique, notification)"""
+    today = now.date()
+    params = {
+        "item_id": row["item_id"],
+        "url": row["url"],
+        "etag": row["etag"],
+        "last_modified": row["last_modified"],
+        "price": None,
+        "currency": None,
+        "now": now,
+        "failures": 0,
+    }
+
+    if check["status"] == "error":
+        params["failures"] = min(row["failures"] + 1, 10)
+        logger.info("Suivi de prix: échec pour l'article %s (%s)", row["item_id"], check["error"])
+    elif check["status"] == "ok":
+        params.update(etag=check["etag"], last_modified=check["last_modified"], currency=check["currency"])
+        price = check["price"]
+        old_price = float(row["last_price"]) if row["last_price"] is not None else None
+        if price is not None:
+            params["price"] = Decimal(str(round(price, 2)))
+            if old_price is None or round(price, 2) != round(old_price, 2):
+                await session.execute(HISTORY_SQL, {
+                    "item_id": row["item_id"], "now": now, "price": params["price"], "currency": check["currency"],
+                })
+            # Devises différentes, ou connue d'un seul côté: pas de comparaison possible
+            same_currency = row["currency"] == check["currency"]
+            if same_currency and is_price_drop(old_price, price):
+                await create_notification(
+                    session,
+                    user_id=row["owner_id"],
+                    type="price_drop",
+                    title=f"Baisse de prix : {row['name']}"[:256],
+                    message=(
+                        f"Le prix de « {row['name']} » est passé de {format_price(old_price, check['currency'])} "
+                        f"à {format_price(price, check['currency'])}"
+                    ),
+                    icon="trending-down",
+                    color="#22c55e",
+                    link="/wishlists/mine",
+                    target_type="item",
+                    target_id=row["item_id"],
+                )
+
+    params["next_check_at"] = now + next_check_delay(row["event_date"], today, params["failures"])
+    await session.execute(UPDATE_SQL, params)
+
+
+async def run_price_tracking():
+    """Job périodique: revérifie un lot d'articles dont la vérification est due"""
+    async with exclusive_job("price_tracking") as conn:
+        if conn is None:
+            return
+
+        now = datetime.utcnow()
+        await conn.execute(SEED_SQL)
+        result = await conn.execute(DUE_SQL, {"now": now, "today": now.date(), "limit": PRICE_TRACKING_BATCH_SIZE})
+        rows = result.mappings().all()
+        if rows:
+            # Lot réservé: un autre passage ne le reprend pas pendant les téléchargements
+            await conn.execute(CLAIM_SQL, {
+                "item_ids": [row["item_id"] for row in rows],
+                "claimed_until": now + timedelta(minutes=PRICE_TRACKING_CLAIM_MINUTES),
+            })
+        await conn.commit()
+    # Verrou et connexion rendus avant les téléchargements
+    if not rows:
+        return
+
+    throttle = DomainThrottle(PRICE_TRACKING_DOMAIN_DELAY)
+    slots = asyncio.Semaphore(PRICE_TRACKING_CONCURRENCY)
+    checks = await asyncio.gather(*(check_item(row, throttle, slots) for row in rows))
+
+    now = datetime.utcnow()
+    async with AsyncSession(async_engine) as session:
+        for row, check in zip(rows, checks):
+            await record_check(session, row, check, now)
+        await session.commit()
+
+    summary = {status: sum(1 for c in checks if c["status"] == status) for status in ("ok", "unchanged", "error")}
+    logger.info("Suivi de prix: %d articles vérifiés (%s)", len(rows), summary)
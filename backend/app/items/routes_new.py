@@ -7,7 +7,9 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 import json
 
 from app.core.async_db import async_engine
+from app.core.responses import model_response
 from app.auth.deps import get_current_user
+from app.media.remote import original_image_url, proxied_image_url
 from app.models import User, Item, Wishlist, WishlistCollaborator, ItemCategory, ItemPriority, Activity, WishlistShare, GroupMember, Notification
 
 router = APIRouter(prefix="/items", tags=["items"])
@@ -226,7 +228,7 @@ def item_to_response(item: Item, category: ItemCategory = None, priority: ItemPr
         wishlist_id=item.wishlist_id,
         name=item.name,
         url=item.url,
-        image_url=item.image_url,
+        image_url=proxied_image_url(item.image_url),
         description=item.description,
         price=item.price,
         category_id=item.category_id,
@@ -327,7 +329,7 @@ async def list_items(
             priority = prio_result.first()
         responses.append(item_to_response(item, category, priority, hide_reservation_status, current_user.id))
     
-    return responses
+    return model_response(responses, List[ItemOut])
 
 @router.post("", response_model=ItemOut)
 async def create_item(
@@ -353,7 +355,7 @@ async def create_item(
         name=payload.name,
         url=payload.url,
         description=payload.description,
-        image_url=payload.image_url,
+        image_url=original_image_url(payload.image_url),
         price=payload.price,
         category_id=payload.category_id,
         priority_id=payload.priority_id,
@@ -400,7 +402,7 @@ async def get_item(
         prio_result = await session.exec(select(ItemPriority).where(ItemPriority.id == item.priority_id))
         priority = prio_result.first()
     
-    return item_to_response(item, category, priority, hide_reservation_status, current_user.id)
+    return model_response(item_to_response(item, category, priority, hide_reservation_status, current_user.id), ItemOut)
 
 @router.put("/{item_id}", response_model=ItemOut)
 async def update_item(
@@ -427,7 +429,7 @@ async def update_item(
     if payload.description is not None:
         item.description = payload.description
     if payload.image_url is not None:
-        item.image_url = payload.image_url
+        item.image_url = original_image_url(payload.image_url)
     if payload.price is not None:
         item.price = payload.price
     if payload.category_id is not None:
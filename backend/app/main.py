@@ -2,15 +2,12 @@ from fastapi import FastAPI, Request, Response
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi import HTTPException
-from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
 import logging
-import sys
-import json
 import time
 import platform
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import CONTENT_TYPE_LATEST
 from sqlmodel import SQLModel
 from app.core.db import engine
 from app.auth.routes import router as auth_router
@@ -24,45 +21,24 @@ from app.shares.routes import router as shares_router
 from app.scrape.routes import router as scrape_router
 from app.activities.routes import router as activities_router
 from app.notifications.routes import router as notifications_router
+from app.media.routes import router as media_router
 from fastapi.staticfiles import StaticFiles
-from app.core.limits import limiter
-from slowapi.errors import RateLimitExceeded
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.middleware import SlowAPIMiddleware
-from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
-from prometheus_client import multiprocess as prom_multiprocess
+from app.core.metrics import generate_metrics, mark_worker_dead
+from app.core.middleware import RequestMiddleware
+from app.core.responses import DefaultResponse
+from app.core.tracing import setup_tracing
+from app.core.logging_setup import configure_logging
 
 load_dotenv()
 
 # Timestamp de démarrage pour calculer l'uptime
 START_TIME = time.time()
 
-# Prometheus metrics registry
-REGISTRY = CollectorRegistry()
-REQUEST_COUNT = Counter('http_requests_total', 'Total HTTP requests', ['method', 'path', 'status'], registry=REGISTRY)
-REQUEST_LATENCY = Histogram('http_request_latency_seconds', 'HTTP request latency seconds', ['method', 'path'], registry=REGISTRY)
-
-class JsonFormatter(logging.Formatter):
-    def format(self, record):
-        log_record = {
-            "level": record.levelname,
-            "message": record.getMessage(),
-            "logger": record.name,
-            "time": self.formatTime(record, self.datefmt),
-        }
-        if hasattr(record, "user_id"):
-            log_record["user_id"] = record.user_id
-        if hasattr(record, "extra"):
-            log_record.update(record.extra)
-        return json.dumps(log_record)
-
-handler = logging.StreamHandler(sys.stdout)
-handler.setFormatter(JsonFormatter())
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.INFO)
-root_logger.handlers = [handler]
-
-app = FastAPI(title="Wisherr API", version="0.1.0")
+# Logs JSON écrits par un thread dédié (app.core.logging_setup)
+configure_logging()
+
+# ORJSONResponse par défaut si FAST_JSON_RESPONSES=true (app.core.responses)
+app = FastAPI(title="Wisherr API", version="0.1.0", default_response_class=DefaultResponse)
 
 # Gestion centralisée des erreurs
 @app.exception_handler(HTTPException)
@@ -78,6 +54,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             "path": str(request.url),
             "teapot": exc.status_code == 404
         },
+        # Retry-After (limitation de débit), WWW-Authenticate...
+        headers=getattr(exc, "headers", None),
     )
 
 def sanitize_for_json(obj):
@@ -108,133 +86,70 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         },
     )
 
-# Configuration du rate limiter
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(SlowAPIMiddleware)
-
 # Serve uploaded static files
 if not os.path.exists("./static/uploads"):
     os.makedirs("./static/uploads", exist_ok=True)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Endpoint de santé avancé
-import asyncpg
-import socket
+# Endpoints de santé: résultats des vérifications en arrière-plan (app.core.health)
+from app.core import health as health_checks
+
+@app.get("/api/health/live")
+async def health_live():
+    """Liveness: le processus répond (aucune I/O)"""
+    return {"status": "ok"}
+
+@app.get("/api/health/ready")
+async def health_ready():
+    """Readiness: base de données joignable lors de la dernière vérification"""
+    report = await health_checks.get_report()
+    ready = health_checks.is_ready(report)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ok" if ready else "error", "db": report["db"], "checked_at": report["checked_at"]},
+    )
 
 @app.get("/api/health")
 async def health():
-    # Vérification DB
-    db_ok = False
-    db_error = None
-    db_latency = None
-    try:
-        raw_dsn = os.getenv("DATABASE_URL", "postgresql://wisherr:wisherr@db:5432/wisherr")
-        # Normalize DSN: remove driver suffixes (+asyncpg, +psycopg2, ...)
-        for suffix in ("+asyncpg", "+psycopg2", "+psycopg"):
-            if suffix in raw_dsn:
-                raw_dsn = raw_dsn.replace(suffix, "")
-        t0 = time.perf_counter()
-        conn = await asyncpg.connect(raw_dsn)
-        await conn.execute("SELECT 1")
-        await conn.close()
-        db_latency = max(0, time.perf_counter() - t0)
-        db_ok = True
-    except Exception as e:
-        db_error = str(e)
-
-    # Vérification cache (exemple Redis) avec latence
-    cache_ok = None
-    cache_error = None
-    cache_latency = None
-    redis_host = os.getenv("REDIS_HOST")
-    if redis_host:
-        try:
-            redis_port = int(os.getenv("REDIS_PORT", "6379"))
-            t0 = time.perf_counter()
-            sock = socket.create_connection((redis_host, redis_port), timeout=1)
-            cache_latency = max(0, time.perf_counter() - t0)
-            sock.close()
-            cache_ok = True
-        except Exception as e:
-            cache_ok = False
-            cache_error = str(e)
-
-    # Vérification des endpoints externes et latences (exemples)
-    external_checks = []
-    external_hosts = os.getenv("HEALTH_EXTERNAL_HOSTS", "doc.my-documents.be:80").split(",")
-    for hostpair in external_hosts:
-        hostpair = hostpair.strip()
-        if not hostpair:
-            continue
-        ext_host, _, ext_port = hostpair.partition(":")
-        try:
-            port = int(ext_port) if ext_port else 80
-            t0 = time.perf_counter()
-            sock = socket.create_connection((ext_host, port), timeout=2)
-            latency = max(0, time.perf_counter() - t0)
-            sock.close()
-            external_checks.append({"host": ext_host, "port": port, "ok": True, "latency": latency})
-        except Exception as e:
-            external_checks.append({"host": ext_host, "port": ext_port or 80, "ok": False, "error": str(e)})
-
-    # Infos complémentaires
-    uptime = int(time.time() - START_TIME)
-    routes_count = len(app.routes) if hasattr(app, 'routes') else None
-    python_version = platform.python_version()
-
-    overall_ok = db_ok and (cache_ok is None or cache_ok) and all((c.get("ok", True) for c in external_checks))
-
+    report = await health_checks.get_report()
     return {
-        "status": "ok" if overall_ok else "error",
-        "uptime_seconds": uptime,
-        "routes_count": routes_count,
-        "python_version": python_version,
-        "db": {"ok": db_ok, "error": db_error, "latency_seconds": db_latency},
-        "cache": {"ok": cache_ok, "error": cache_error, "latency_seconds": cache_latency},
-        "external": external_checks,
+        "status": "ok" if health_checks.is_healthy(report) else "error",
+        "uptime_seconds": int(time.time() - START_TIME),
+        "routes_count": len(app.routes) if hasattr(app, 'routes') else None,
+        "python_version": platform.python_version(),
+        "checked_at": report["checked_at"],
+        "age_seconds": max(0.0, time.time() - report["checked_at"]),
+        "db": report["db"],
+        "cache": report["cache"],
+        "external": report["external"],
     }
 
 @app.post("/__client_error__")
 async def client_error(payload: dict):
     # Log client-side runtime errors for easier debugging
-    import logging
     logging.error("CLIENT ERROR: %s", payload)
     return {"ok": True}
 
 
-# Middleware pour compter les requêtes et mesurer latence
-@app.middleware("http")
-async def prometheus_middleware(request: Request, call_next):
-    method = request.method
-    path = request.url.path
-    with REQUEST_LATENCY.labels(method=method, path=path).time():
-        try:
-            response = await call_next(request)
-            status = str(response.status_code)
-        except Exception as e:
-            # Count as 500
-            REQUEST_COUNT.labels(method=method, path=path, status='500').inc()
-            raise
-    REQUEST_COUNT.labels(method=method, path=path, status=status).inc()
-    return response
-
-
 @app.get('/metrics')
 def metrics():
-    # Export metrics in Prometheus format
-    data = generate_latest(REGISTRY)
-    return JSONResponse(content=data.decode('utf-8'), media_type=CONTENT_TYPE_LATEST)
-# CORS (configuré depuis .env)
+    # Export metrics in Prometheus format (texte brut, tous les workers en mode multiprocessus)
+    return Response(content=generate_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+# Middleware ASGI unique: X-Request-ID, CORS (configuré depuis .env), limite de débit
+# globale, métriques par route et statistiques SQL (app.core.middleware)
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:8080").split(",")
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[origin.strip() for origin in ALLOWED_ORIGINS],
-    allow_credentials=True,
+    RequestMiddleware,
+    allow_origins=ALLOWED_ORIGINS,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
-    allow_headers=["*"],
+    allow_headers=os.getenv("CORS_ALLOW_HEADERS", "*").split(","),
+    expose_headers=["X-Next-Cursor", "X-Request-ID"],
 )
 
+# Traces OpenTelemetry (OTEL_ENABLED=true), middleware le plus externe
+setup_tracing(app)
+
 @app.on_event("startup")
 async def on_startup():
     # Initialiser Redis si configuré
@@ -242,10 +157,15 @@ async def on_startup():
         from app.core.cache import init_redis
         await init_redis()
     except Exception as e:
-        import logging
         logging.warning("Redis initialization skipped: %s", e)
+
+    # Client HTTP sortant partagé (scraping)
+    from app.core.http import init_http_client
+    await init_http_client()
+
+    # Vérifications de santé périodiques (résultat servi par /api/health*)
+    health_checks.start_health_checks()
     
-    import logging as startup_logging
     
     # Vérifier si les tables existent déjà
     from sqlalchemy import inspect
@@ -256,7 +176,7 @@ async def on_startup():
         # Essayer d'exécuter schema.sql s'il existe (prioritaire)
         schema_path = "./schema.sql"
         if os.path.exists(schema_path):
-            startup_logging.info("Exécution du schema.sql pour initialiser la base de données...")
+            logging.info("Exécution du schema.sql pour initialiser la base de données...")
             try:
                 with open(schema_path, 'r') as f:
                     schema_sql = f.read()
@@ -269,25 +189,25 @@ async def on_startup():
                     cursor.execute(schema_sql)
                     raw_conn.commit()
                     cursor.close()
-                startup_logging.info("Schema SQL exécuté avec succès!")
+                logging.info("Schema SQL exécuté avec succès!")
             except Exception as e:
-                startup_logging.warning("Erreur schema.sql, fallback sur SQLModel: %s", e)
+                logging.warning("Erreur schema.sql, fallback sur SQLModel: %s", e)
                 # Fallback sur SQLModel
                 try:
                     SQLModel.metadata.create_all(engine, checkfirst=True)
-                    startup_logging.info("Tables créées avec succès par SQLModel")
+                    logging.info("Tables créées avec succès par SQLModel")
                 except Exception as e2:
-                    startup_logging.exception("Erreur création tables: %s", e2)
+                    logging.exception("Erreur création tables: %s", e2)
         else:
             # Pas de schema.sql, utiliser SQLModel
-            startup_logging.info("Pas de schema.sql trouvé, utilisation de SQLModel...")
+            logging.info("Pas de schema.sql trouvé, utilisation de SQLModel...")
             try:
                 SQLModel.metadata.create_all(engine, checkfirst=True)
-                startup_logging.info("Tables créées avec succès par SQLModel")
+                logging.info("Tables créées avec succès par SQLModel")
             except Exception as e:
-                startup_logging.exception("Erreur création tables: %s", e)
+                logging.exception("Erreur création tables: %s", e)
     else:
-        startup_logging.info("Tables déjà créées, initialisation ignorée")
+        logging.info("Tables déjà créées, initialisation ignorée")
 
     # Ensure uploads directory exists
     try:
@@ -299,7 +219,6 @@ async def on_startup():
     try:
         from sqlmodel import Session, select
         from .models import SiteConfig
-        import logging
 
         # Configuration mapping: (key, env_var, default_value, value_type, description)
         configs_to_init = [
@@ -329,16 +248,18 @@ async def on_startup():
             session.commit()
             logging.info("Site configuration initialized successfully")
     except Exception as e:
-        import logging
         logging.exception("Failed to initialize site_config: %s", e)
 
+    # Configuration du site en mémoire, rechargée sur notification des autres workers
+    from app.core.site_config import start_site_config_listener
+    await start_site_config_listener()
+
     # Create an initial admin user from environment variables if provided
     try:
         from sqlmodel import Session, select
         from .models import User
         from .auth.routes import get_password_hash
         from .core.utils import get_site_config_bool
-        import logging
 
         # Utiliser la config de la DB si disponible, sinon fallback sur .env
         enable_local_auth = get_site_config_bool("enable_local_auth", True)
@@ -359,18 +280,56 @@ async def on_startup():
                     logging.info("Admin user '%s' already exists", admin_username)
     except Exception as e:
         # Don't crash startup if user creation fails; just log
-        import logging
         logging.exception("Failed to ensure admin user: %s", e)
 
+    # Démarrer les tâches de fond (archivage, maintenance)
+    try:
+        from app.core.scheduler import start_scheduler
+        await start_scheduler()
+    except Exception as e:
+        logging.exception("Failed to start scheduler: %s", e)
+
 
 @app.on_event("shutdown")
 async def on_shutdown():
     """Fermer les connexions au shutdown"""
+    try:
+        await health_checks.stop_health_checks()
+    except Exception as e:
+        logging.warning("Health checks shutdown skipped: %s", e)
+    try:
+        from app.core.site_config import stop_site_config_listener
+        await stop_site_config_listener()
+    except Exception as e:
+        logging.warning("Site config listener shutdown skipped: %s", e)
+    try:
+        from app.core.http import close_http_client
+        await close_http_client()
+    except Exception as e:
+        logging.warning("HTTP client cleanup skipped: %s", e)
+    try:
+        from app.core.process_pool import shutdown_process_pools
+        shutdown_process_pools()
+    except Exception as e:
+        logging.warning("Process pools shutdown skipped: %s", e)
+    try:
+        mark_worker_dead(os.getpid())
+    except Exception as e:
+        logging.warning("Metrics worker cleanup skipped: %s", e)
+    try:
+        from app.core.tracing import shutdown_tracing
+        shutdown_tracing()
+    except Exception as e:
+        logging.warning("Tracing shutdown skipped: %s", e)
+    try:
+        from app.core.scheduler import shutdown_scheduler
+        await shutdown_scheduler()
+    except Exception as e:
+        logging.warning("Scheduler shutdown skipped: %s", e)
     try:
         from app.core.cache import close_redis
         await close_redis()
     except Exception as e:
-        import logging
         logging.warning("Redis cleanup skipped: %s", e)
 
 
@@ -385,6 +344,7 @@ app.include_router(shares_router, prefix="/api")
 app.include_router(scrape_router, prefix="/api")
 app.include_router(activities_router, prefix="/api")
 app.include_router(notifications_router, prefix="/api")
+app.include_router(media_router, prefix="/api")
 
 # metadata logging
 from .metadata import router as metadata_router
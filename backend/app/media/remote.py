@@ -0,0 +1,217 @@
+"""
+Proxy des images distantes (images produit des sites marchands).
+
+Les `image_url` distantes des articles sont réécrites en
+MEDIA_PUBLIC_PREFIX/remote?url=...&w=...&s=<signature>. La signature HMAC (clé dérivée
+de SECRET_KEY) empêche d'utiliser l'endpoint comme proxy ouvert. Seuls les hôtes publics
+sont contactés: l'hôte est résolu une seule fois, les adresses sont vérifiées (privées,
+loopback, link-local... refusées) et la connexion est faite vers l'adresse vérifiée, avec
+l'en-tête Host et le SNI d'origine (pas de seconde résolution exploitable par DNS
+rebinding). Chaque redirection est vérifiée de la même façon. L'image est téléchargée une seule
+fois, stockée par contenu; un fichier de référence MEDIA_DIR/remote/<sha256 de l'URL>
+contient l'empreinte du contenu (vide = échec, réessayé après IMAGE_RETRY_SECONDS).
+"""
+import os
+import time
+import hmac
+import socket
+import asyncio
+import hashlib
+import logging
+import ipaddress
+from typing import Dict, Optional
+from urllib.parse import urlencode, urljoin, urlsplit, urlunsplit, parse_qs
+import httpx
+
+from app.auth.routes import SECRET_KEY
+from app.core.http import fetch
+from app.media.storage import MEDIA_DIR, store_image, thumbnails_ready, write_atomic
+
+logger = logging.getLogger(__name__)
+
+MEDIA_PROXY_ENABLED = os.getenv("MEDIA_PROXY_ENABLED", "true").lower() in ("true", "1", "yes", "on")
+# Préfixe public des URLs servies (le frontend ne relaie que /api vers le backend)
+MEDIA_PUBLIC_PREFIX = os.getenv("MEDIA_PUBLIC_PREFIX", "/api/media").rstrip("/")
+# Largeur demandée par défaut dans les réponses des articles
+IMAGE_DEFAULT_WIDTH = int(os.getenv("IMAGE_DEFAULT_WIDTH", "320"))
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(15 * 1024 * 1024)))
+IMAGE_RETRY_SECONDS = int(os.getenv("IMAGE_RETRY_SECONDS", "3600"))
+IMAGE_MAX_REDIRECTS = 5
+
+# Clé propre aux signatures du proxy, dérivée de SECRET_KEY (validée par app.auth.routes)
+SIGNING_KEY = hmac.new(SECRET_KEY.encode(), b"media-proxy", hashlib.sha256).digest()
+
+class RemoteImageError(Exception):
+    """Image distante indisponible ou invalide"""
+
+
+class _Inflight:
+    """Téléchargement en cours pour une URL, partagé par tous ses appelants"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+_inflight: Dict[str, _Inflight] = {}
+
+
+def sign_url(url: str) -> str:
+    return hmac.new(SIGNING_KEY, url.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def verify_signature(url: str, signature: str) -> bool:
+    return hmac.compare_digest(sign_url(url), signature or "")
+
+
+def proxied_image_url(url: Optional[str], width: int = IMAGE_DEFAULT_WIDTH) -> Optional[str]:
+    """URL locale (miniature) pour une image distante; les autres valeurs sont inchangées"""
+    if not MEDIA_PROXY_ENABLED or not url or not url.startswith(("http://", "https://")):
+        return url
+    return f"{MEDIA_PUBLIC_PREFIX}/remote?{urlencode({'url': url, 'w': width, 's': sign_url(url)})}"
+
+
+def original_image_url(url: Optional[str]) -> Optional[str]:
+    """Inverse de proxied_image_url (formulaires d'édition renvoyant l'URL réécrite)"""
+    if not url or not url.startswith(f"{MEDIA_PUBLIC_PREFIX}/remote?"):
+        return url
+    params = parse_qs(urlsplit(url).query)
+    original = (params.get("url") or [""])[0]
+    if original and verify_signature(original, (params.get("s") or [""])[0]):
+        return original
+    return url
+
+
+def url_ref_path(url: str) -> str:
+    url_hash = hashlib.sha256(url.encode()).hexdigest()
+    return os.path.join(MEDIA_DIR, "remote", url_hash[:2], url_hash)
+
+
+def read_ref(path: str) -> Optional[str]:
+    """Empreinte déjà connue pour l'URL; RemoteImageError si échec récent"""
+    try:
+        with open(path, "rb") as f:
+            digest = f.read().decode().strip()
+        mtime = os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+    if digest:
+        return digest if thumbnails_ready(digest) else None
+    if time.time() - mtime < IMAGE_RETRY_SECONDS:
+        raise RemoteImageError("Échec récent")
+    return None
+
+
+def is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_public_url(url: str) -> str:
+    """
+    Adresse IP (publique) à laquelle se connecter pour `url`.
+
+    Raises:
+        RemoteImageError: URL non HTTP(S), hôte introuvable ou une des adresses résolues non publique
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise RemoteImageError(f"URL non autorisée: {url}")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, ValueError) as e:
+        raise RemoteImageError(f"Hôte introuvable: {parts.hostname}") from e
+    if not infos or not all(is_public_address(info[4][0]) for info in infos):
+        raise RemoteImageError(f"Adresse non autorisée: {parts.hostname}")
+    return infos[0][4][0]
+
+
+def pinned_url(url: str, address: str) -> str:
+    """`url` avec l'hôte remplacé par `address` (port, chemin et paramètres conservés)"""
+    parts = urlsplit(url)
+    host = f"[{address}]" if ":" in address else address
+    netloc = f"{host}:{parts.port}" if parts.port else host
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+async def download_image(url: str) -> str:
+    # Redirections suivies une à une pour vérifier chaque cible
+    for _ in range(IMAGE_MAX_REDIRECTS + 1):
+        address = await check_public_url(url)
+        parts = urlsplit(url)
+        try:
+            # Connexion vers l'adresse vérifiée; Host et SNI (certificat) restent ceux de l'URL
+            response = await fetch(
+                pinned_url(url, address),
+                headers={"Accept": "image/avif,image/webp,image/*;q=0.8",
+                         "Host": parts.netloc.rsplit("@", 1)[-1]},
+                max_bytes=IMAGE_MAX_BYTES, follow_redirects=False,
+                extensions={"sni_hostname": parts.hostname},
+            )
+            break
+        except httpx.HTTPStatusError as e:
+            location = e.response.headers.get("location")
+            if not e.response.is_redirect or not location:
+                raise
+            url = urljoin(url, location)
+    else:
+        raise RemoteImageError("Trop de redirections")
+    if response.truncated:
+        raise RemoteImageError("Image trop volumineuse")
+    content_type = response.headers.get("content-type", "")
+    if content_type and not content_type.startswith(("image/", "application/octet-stream")):
+        raise RemoteImageError(f"Type de contenu inattendu: {content_type}")
+    return await store_image(response.content)
+
+
+async def _download_and_store(url: str, ref: str) -> str:
+    try:
+        digest = await download_image(url)
+    except Exception as e:
+        logger.info("Image distante indisponible: %s (%s)", url, e)
+        # Écriture hors de la boucle d'événements
+        await asyncio.to_thread(write_atomic, ref, b"")
+        raise RemoteImageError(str(e) or type(e).__name__) from e
+    await asyncio.to_thread(write_atomic, ref, digest.encode())
+    return digest
+
+
+async def ingest_remote_image(url: str) -> str:
+    """
+    Empreinte du contenu de l'image distante, téléchargée et réduite au premier appel.
+    Les appels simultanés pour une même URL partagent le même téléchargement, abandonné
+    seulement quand le dernier appelant est annulé.
+
+    Raises:
+        RemoteImageError
+    """
+    ref = url_ref_path(url)
+    digest = read_ref(ref)
+    if digest:
+        return digest
+
+    entry = _inflight.get(ref)
+    if entry is None:
+        entry = _inflight[ref] = _Inflight(asyncio.create_task(_download_and_store(url, ref)))
+
+        def release(_task, entry=entry):
+            if _inflight.get(ref) is entry:
+                del _inflight[ref]
+
+        entry.task.add_done_callback(release)
+
+    entry.waiters += 1
+    try:
+        return await asyncio.shield(entry.task)
+    except asyncio.CancelledError:
+        # Dernier appelant annulé: plus personne n'attend l'image, abandonner le téléchargement
+        if entry.waiters == 1 and not entry.task.done():
+            entry.task.cancel()
+            if _inflight.get(ref) is entry:
+                del _inflight[ref]
+        raise
+    finally:
+        entry.waiters -= 1
@@ -0,0 +1,105 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse
+import os
+import re
+
+from app.auth.deps import get_current_user_async
+from app.core.limits import rate_limit
+from app.models import User
+from app.media.storage import (
+    MEDIA_DIR, MEDIA_TYPES, THUMBNAIL_SIZES, digest_dir, ensure_thumbnails, schedule_thumbnails, select_variant,
+)
+from app.media.remote import MEDIA_PUBLIC_PREFIX, RemoteImageError, ingest_remote_image, verify_signature
+from app.media.uploads import receive_upload
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+# Préfixe d'une location nginx `internal` pointant sur MEDIA_DIR: si défini, nginx
+# envoie les fichiers (X-Accel-Redirect) au lieu du backend
+MEDIA_X_ACCEL_PREFIX = os.getenv("MEDIA_X_ACCEL_PREFIX", "").rstrip("/")
+
+# Fichiers adressés par contenu: jamais modifiés
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+THUMBNAIL_NAME_RE = re.compile(r"^\d+\.(webp|avif)$")
+
+
+def media_response(path: str, media_type: str, negotiated: bool = False) -> Response:
+    headers = {"Cache-Control": IMMUTABLE_CACHE}
+    if negotiated:
+        headers["Vary"] = "Accept"
+    if MEDIA_X_ACCEL_PREFIX:
+        relative = os.path.relpath(path, MEDIA_DIR).replace(os.sep, "/")
+        headers["X-Accel-Redirect"] = f"{MEDIA_X_ACCEL_PREFIX}/{relative}"
+        return Response(media_type=media_type, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+async def stored_thumbnails(digest: str):
+    """Attend les miniatures d'un contenu stocké (générées au besoin)"""
+    if not DIGEST_RE.match(digest) or not os.path.exists(os.path.join(digest_dir(digest), "source")):
+        raise HTTPException(status_code=404, detail="Fichier introuvable")
+    try:
+        await ensure_thumbnails(digest)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail="Miniature introuvable") from e
+
+
+@router.post("/uploads", status_code=201, dependencies=[Depends(rate_limit("upload"))])
+async def upload_image(request: Request, current_user: User = Depends(get_current_user_async)):
+    """Envoi d'une image (multipart, champ `file`) pour un article ou une couverture de liste"""
+    digest, fmt, size, created = await receive_upload(request)
+    schedule_thumbnails(digest)
+    url = f"{MEDIA_PUBLIC_PREFIX}/{digest}"
+    return {
+        "digest": digest,
+        "format": fmt,
+        "size": size,
+        "created": created,
+        "url": url,
+        "thumbnails": {str(s): f"{url}?w={s}" for s in THUMBNAIL_SIZES},
+    }
+
+
+@router.get("/remote")
+async def remote_image(
+    request: Request,
+    url: str = Query(...),
+    w: int | None = Query(None, ge=1, le=4096),
+    s: str = Query(...),
+):
+    """Miniature d'une image distante (téléchargée et réduite au premier appel)"""
+    if not verify_signature(url, s):
+        raise HTTPException(status_code=403, detail="Signature invalide")
+    try:
+        digest = await ingest_remote_image(url)
+    except RemoteImageError:
+        # Repli: le navigateur charge l'image d'origine
+        return RedirectResponse(url, status_code=302, headers={"Cache-Control": "public, max-age=300"})
+
+    variant = select_variant(digest, w, request.headers.get("accept", ""))
+    if variant is None:
+        raise HTTPException(status_code=404, detail="Miniature introuvable")
+    return media_response(*variant, negotiated=True)
+
+
+@router.get("/{digest}")
+async def stored_image_variant(request: Request, digest: str, w: int | None = Query(None, ge=1, le=4096)):
+    """Miniature d'une image stockée, au format accepté par le navigateur"""
+    await stored_thumbnails(digest)
+    variant = select_variant(digest, w, request.headers.get("accept", ""))
+    if variant is None:
+        raise HTTPException(status_code=404, detail="Miniature introuvable")
+    return media_response(*variant, negotiated=True)
+
+
+@router.get("/{digest}/{name}")
+async def stored_image(digest: str, name: str):
+    """Miniature adressée par contenu"""
+    if not THUMBNAIL_NAME_RE.match(name):
+        raise HTTPException(status_code=404, detail="Fichier introuvable")
+    await stored_thumbnails(digest)
+    path = os.path.join(digest_dir(digest), name)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Fichier introuvable")
+    return media_response(path, MEDIA_TYPES[name.rsplit(".", 1)[1]])
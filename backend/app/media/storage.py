@@ -0,0 +1,160 @@
+"""
+Stockage des images par contenu et génération des miniatures.
+
+Chaque image est rangée sous MEDIA_DIR/<2 premiers caractères>/<sha256>/ avec
+l'original (`source`) et ses miniatures `<taille>.<format>` (WebP, et AVIF si Pillow
+le supporte). Un même contenu n'est stocké et réduit qu'une fois; les fichiers ne
+changent jamais et peuvent être servis avec un cache de longue durée.
+"""
+import os
+import asyncio
+import hashlib
+import logging
+import tempfile
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.process_pool import ProcessPool
+
+logger = logging.getLogger(__name__)
+
+MEDIA_DIR = os.getenv("MEDIA_DIR", "./static/media")
+THUMBNAIL_SIZES = sorted({int(s) for s in os.getenv("THUMBNAIL_SIZES", "160,320,640").split(",") if s.strip().isdigit()})
+THUMBNAIL_FORMATS = [f.strip().lower() for f in os.getenv("THUMBNAIL_FORMATS", "avif,webp").split(",") if f.strip()]
+# Limite anti "decompression bomb" (pixels)
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(40_000_000)))
+# Workers de génération des miniatures (0 = dans un thread) et durée maximale par image
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_TIMEOUT = float(os.getenv("IMAGE_TIMEOUT", "30"))
+
+SAVE_OPTIONS = {
+    "webp": {"quality": 80, "method": 4},
+    "avif": {"quality": 55, "speed": 8},
+}
+MEDIA_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+COMPLETE_MARKER = ".complete"
+
+thumbnail_pool = ProcessPool("thumbnails", IMAGE_WORKERS, IMAGE_TIMEOUT)
+
+# Générations en cours (par empreinte) et tâches lancées en arrière-plan
+_pending: Dict[str, asyncio.Future] = {}
+_background: Set[asyncio.Future] = set()
+
+
+def content_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def digest_dir(digest: str) -> str:
+    return os.path.join(MEDIA_DIR, digest[:2], digest)
+
+
+def write_atomic(path: str, data: bytes):
+    """Écrit via un fichier temporaire renommé: jamais de fichier partiel visible"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def supported_formats() -> List[str]:
+    from PIL import features
+    return [f for f in THUMBNAIL_FORMATS if f in SAVE_OPTIONS and features.check(f)]
+
+
+def generate_thumbnails(source_path: str, out_dir: str) -> List[str]:
+    """
+    Génère les miniatures de `source_path` dans `out_dir` (exécuté dans un worker).
+
+    Raises:
+        PIL.UnidentifiedImageError, Image.DecompressionBombError
+    """
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+    formats = supported_formats() or ["webp"]
+    largest = max(THUMBNAIL_SIZES)
+    names = []
+    with Image.open(source_path) as img:
+        # JPEG: décodage directement à une résolution réduite
+        img.draft("RGB", (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        img = img.convert("RGBA" if has_alpha else "RGB")
+        for size in sorted(THUMBNAIL_SIZES, reverse=True):
+            # Réduire depuis la taille précédente est plus rapide et visuellement équivalent
+            img.thumbnail((size, size), Image.Resampling.LANCZOS)
+            for fmt in formats:
+                name = f"{size}.{fmt}"
+                fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=".tmp-")
+                with os.fdopen(fd, "wb") as f:
+                    img.save(f, format=fmt.upper(), **SAVE_OPTIONS[fmt])
+                os.replace(tmp, os.path.join(out_dir, name))
+                names.append(name)
+    write_atomic(os.path.join(out_dir, COMPLETE_MARKER), "\n".join(names).encode())
+    return names
+
+
+def thumbnails_ready(digest: str) -> bool:
+    return os.path.exists(os.path.join(digest_dir(digest), COMPLETE_MARKER))
+
+
+async def store_image(content: bytes, digest: Optional[str] = None) -> str:
+    """Stocke une image et ses miniatures (si absentes); renvoie son empreinte"""
+    digest = digest or content_digest(content)
+    if thumbnails_ready(digest):
+        return digest
+    source = os.path.join(digest_dir(digest), "source")
+    if not os.path.exists(source):
+        await asyncio.to_thread(write_atomic, source, content)
+    await ensure_thumbnails(digest)
+    return digest
+
+
+async def ensure_thumbnails(digest: str):
+    """Génère les miniatures d'un original stocké; les appels simultanés partagent la génération"""
+    if thumbnails_ready(digest):
+        return
+    task = _pending.get(digest)
+    if task is None:
+        directory = digest_dir(digest)
+        task = asyncio.ensure_future(thumbnail_pool.run(generate_thumbnails, os.path.join(directory, "source"), directory))
+        _pending[digest] = task
+        task.add_done_callback(lambda _: _pending.pop(digest, None))
+    await asyncio.shield(task)
+
+
+def _background_done(task: asyncio.Future):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Génération des miniatures impossible: %s", task.exception())
+
+
+def schedule_thumbnails(digest: str):
+    """Lance la génération des miniatures sans l'attendre"""
+    task = asyncio.ensure_future(ensure_thumbnails(digest))
+    _background.add(task)
+    task.add_done_callback(_background_done)
+
+
+def select_variant(digest: str, width: Optional[int], accept: str = "") -> Optional[Tuple[str, str]]:
+    """
+    Miniature à servir: plus petite taille >= `width`, AVIF si le navigateur l'accepte.
+
+    Returns:
+        (chemin, type MIME) ou None si aucune miniature n'existe
+    """
+    directory = digest_dir(digest)
+    sizes = [s for s in THUMBNAIL_SIZES if width is None or s >= width] or [max(THUMBNAIL_SIZES)]
+    size = min(sizes) if width is not None else max(sizes)
+    formats = ["avif", "webp"] if "image/avif" in accept else ["webp"]
+    for fmt in formats:
+        path = os.path.join(directory, f"{size}.{fmt}")
+        if os.path.exists(path):
+            return path, MEDIA_TYPES[fmt]
+    return None
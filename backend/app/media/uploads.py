@@ -0,0 +1,171 @@
+"""
+Envoi d'images par les utilisateurs (images d'articles, couvertures de listes).
+
+Le corps multipart est analysé au fil de l'eau: la partie `file` est écrite sur disque
+par morceaux pendant le calcul de son empreinte, sans être chargée en mémoire. Le
+fichier rejoint ensuite le stockage par contenu (un contenu déjà envoyé n'est pas
+stocké une seconde fois) et ses miniatures sont générées en arrière-plan.
+"""
+import os
+import asyncio
+import hashlib
+import tempfile
+from typing import Dict, Tuple
+from fastapi import HTTPException, Request
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from app.media.storage import IMAGE_MAX_PIXELS, MEDIA_DIR, digest_dir
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_ALLOWED_FORMATS = {
+    f.strip().upper() for f in os.getenv("UPLOAD_ALLOWED_FORMATS", "jpeg,png,webp,gif,avif").split(",") if f.strip()
+}
+UPLOAD_FIELD = "file"
+# Données accumulées avant chaque écriture sur disque
+UPLOAD_FLUSH_BYTES = 256 * 1024
+# Marge pour les en-têtes multipart dans la vérification du Content-Length
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+class MultipartFileReader:
+    """Extrait la partie `field` d'un corps multipart: taille, empreinte et données à écrire"""
+
+    def __init__(self, boundary: bytes, field: str = UPLOAD_FIELD, max_bytes: int = UPLOAD_MAX_BYTES):
+        self.field = field.encode()
+        self.max_bytes = max_bytes
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.found = False
+        self.buffer = bytearray()
+        self._in_file = False
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._headers: Dict[bytes, bytes] = {}
+        self.parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": lambda data, start, end: self._header_field.extend(data[start:end]),
+            "on_header_value": lambda data, start, end: self._header_value.extend(data[start:end]),
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def write(self, chunk: bytes):
+        self.parser.write(chunk)
+
+    def finalize(self):
+        self.parser.finalize()
+
+    def take(self) -> bytes:
+        """Données reçues depuis le dernier appel"""
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_end(self):
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        # Seule la première partie du champ attendu est conservée
+        self._in_file = options.get(b"name") == self.field and not self.found
+        self.found = self.found or self._in_file
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if not self._in_file:
+            return
+        self.size += end - start
+        if self.size > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"Fichier trop volumineux (maximum {self.max_bytes // (1024 * 1024)} Mo)")
+        chunk = data[start:end]
+        self.hasher.update(chunk)
+        self.buffer.extend(chunk)
+
+    def _on_part_end(self):
+        self._in_file = False
+
+
+def identify_image(path: str) -> str:
+    """Format de l'image (lecture de l'en-tête seulement)"""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as img:
+            fmt, (width, height) = img.format, img.size
+    except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+        raise HTTPException(status_code=415, detail="Fichier image invalide") from e
+    if fmt not in UPLOAD_ALLOWED_FORMATS:
+        raise HTTPException(status_code=415, detail=f"Format d'image non supporté: {fmt}")
+    if width * height > IMAGE_MAX_PIXELS:
+        raise HTTPException(status_code=413, detail="Image trop grande")
+    return fmt.lower()
+
+
+def create_upload_file() -> Tuple[int, str]:
+    """Fichier temporaire de réception (descripteur, chemin)"""
+    # Même système de fichiers que le stockage: le renommage final est atomique
+    tmp_dir = os.path.join(MEDIA_DIR, ".uploads")
+    os.makedirs(tmp_dir, exist_ok=True)
+    return tempfile.mkstemp(dir=tmp_dir)
+
+
+def commit_upload(tmp_path: str, digest: str) -> bool:
+    """Range le fichier reçu dans le stockage par contenu; False si ce contenu existait déjà"""
+    source = os.path.join(digest_dir(digest), "source")
+    if os.path.exists(source):
+        os.unlink(tmp_path)
+        return False
+    os.makedirs(os.path.dirname(source), exist_ok=True)
+    os.replace(tmp_path, source)
+    return True
+
+
+async def receive_upload(request: Request) -> Tuple[str, str, int, bool]:
+    """
+    Lit l'image envoyée dans le champ `file` et la stocke par contenu.
+
+    Returns:
+        (empreinte, format, taille, nouveau contenu)
+
+    Raises:
+        HTTPException (400, 413, 415)
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type.lower() != b"multipart/form-data" or not options.get(b"boundary"):
+        raise HTTPException(status_code=415, detail="Corps multipart/form-data attendu")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD:
+        raise HTTPException(status_code=413, detail=f"Fichier trop volumineux (maximum {UPLOAD_MAX_BYTES // (1024 * 1024)} Mo)")
+
+    reader = MultipartFileReader(options[b"boundary"])
+    fd, tmp_path = await asyncio.to_thread(create_upload_file)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            try:
+                async for chunk in request.stream():
+                    reader.write(chunk)
+                    if len(reader.buffer) >= UPLOAD_FLUSH_BYTES:
+                        await asyncio.to_thread(f.write, reader.take())
+                reader.finalize()
+            except MultipartParseError as e:
+                raise HTTPException(status_code=400, detail="Corps multipart invalide") from e
+            if reader.buffer:
+                await asyncio.to_thread(f.write, reader.take())
+
+        if not reader.found or reader.size == 0:
+            raise HTTPException(status_code=400, detail=f"Fichier manquant (champ '{UPLOAD_FIELD}')")
+        fmt = await asyncio.to_thread(identify_image, tmp_path)
+        digest = reader.hasher.hexdigest()
+        created = await asyncio.to_thread(commit_upload, tmp_path, digest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return digest, fmt, reader.size, created
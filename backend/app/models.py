@@ -165,6 +165,8 @@ class Reservation(SQLModel, table=True):
 # ACTIVITÉS (FEED)
 # =====================================================
 
+# Table partitionnée par mois sur created_at côté PostgreSQL (clé primaire (id, created_at)),
+# voir db/migrations/010_partition_activities.sql
 class Activity(SQLModel, table=True):
     __tablename__ = "activities"
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -228,6 +230,7 @@ class Invitation(SQLModel, table=True):
 # AUDIT LOG
 # =====================================================
 
+# Table partitionnée par mois sur created_at côté PostgreSQL
 class AuditLog(SQLModel, table=True):
     __tablename__ = "audit_log"
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -0,0 +1,85 @@
+"""
+Archivage des notifications lues vers la table partitionnée `notifications_archive`
+"""
+import os
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+from app.core.partitions import add_months, month_start, ensure_monthly_partitions, drop_partitions_before
+from app.core.scheduler import exclusive_job
+
+logger = logging.getLogger(__name__)
+
+# Nombre de jours après lecture avant archivage (0 = désactivé)
+NOTIFICATIONS_ARCHIVE_AFTER_DAYS = int(os.getenv("NOTIFICATIONS_ARCHIVE_AFTER_DAYS", "30"))
+# Durée de conservation des archives en mois (0 = illimitée)
+NOTIFICATIONS_ARCHIVE_RETENTION_MONTHS = int(os.getenv("NOTIFICATIONS_ARCHIVE_RETENTION_MONTHS", "12"))
+NOTIFICATIONS_ARCHIVE_BATCH_SIZE = int(os.getenv("NOTIFICATIONS_ARCHIVE_BATCH_SIZE", "5000"))
+
+# Déplacement par lots: DELETE ... RETURNING alimente directement l'INSERT,
+# sans jamais remonter les lignes côté Python.
+ARCHIVE_BATCH_SQL = text("""
+    WITH moved AS (
+        DELETE FROM notifications
+        WHERE id IN (
+            SELECT id FROM notifications
+            WHERE is_read = TRUE AND read_at < :cutoff
+            ORDER BY id
+            LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, user_id, type, title, message, icon, color, link,
+                  target_type, target_id, is_read, created_at, read_at
+    )
+    INSERT INTO notifications_archive (
+        id, user_id, type, title, message, icon, color, link,
+        target_type, target_id, is_read, created_at, read_at, archived_at
+    )
+    SELECT id, user_id, type, title, message, icon, color, link,
+           target_type, target_id, is_read, created_at, read_at, :archived_at
+    FROM moved
+""")
+
+
+async def archive_read_notifications() -> int:
+    """
+    Déplace les notifications lues depuis plus de NOTIFICATIONS_ARCHIVE_AFTER_DAYS jours
+    vers `notifications_archive`, puis supprime les partitions d'archive expirées.
+
+    Returns:
+        Nombre de notifications archivées
+    """
+    if NOTIFICATIONS_ARCHIVE_AFTER_DAYS <= 0:
+        return 0
+
+    async with exclusive_job("notifications_archive") as conn:
+        if conn is None:
+            return 0
+
+        now = datetime.utcnow()
+        cutoff = now - timedelta(days=NOTIFICATIONS_ARCHIVE_AFTER_DAYS)
+        await ensure_monthly_partitions(conn, "notifications_archive", now, months_ahead=1)
+        await conn.commit()
+
+        total = 0
+        while True:
+            result = await conn.execute(ARCHIVE_BATCH_SQL, {
+                "cutoff": cutoff,
+                "batch_size": NOTIFICATIONS_ARCHIVE_BATCH_SIZE,
+                "archived_at": now,
+            })
+            await conn.commit()
+            moved = result.rowcount or 0
+            total += moved
+            if moved < NOTIFICATIONS_ARCHIVE_BATCH_SIZE:
+                break
+
+        if NOTIFICATIONS_ARCHIVE_RETENTION_MONTHS > 0:
+            retention_cutoff = add_months(month_start(now), -NOTIFICATIONS_ARCHIVE_RETENTION_MONTHS)
+            await drop_partitions_before(conn, "notifications_archive", retention_cutoff)
+            await conn.commit()
+
+        if total:
+            logger.info("Notifications archivées: %d", total)
+        return total
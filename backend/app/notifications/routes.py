@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import select, func
+from sqlalchemy import update, delete
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional
 from datetime import datetime
@@ -44,6 +45,15 @@ async def get_async_session():
     async with AsyncSession(async_engine) as session:
         yield session
 
+async def count_affected(session: AsyncSession, statement) -> int:
+    """
+    Exécute un UPDATE/DELETE en une seule requête et renvoie le nombre de lignes touchées
+    (WITH affected AS (... RETURNING id) SELECT count(*) FROM affected).
+    """
+    affected = statement.returning(Notification.id).cte("affected")
+    result = await session.exec(select(func.count()).select_from(affected))
+    return result.first() or 0
+
 async def create_notification(
     session: AsyncSession,
     user_id: int,
@@ -136,20 +146,20 @@ async def mark_notifications_read(
     session: AsyncSession = Depends(get_async_session)
 ):
     """Marquer des notifications comme lues"""
-    for notif_id in payload.notification_ids:
-        result = await session.exec(
-            select(Notification)
-            .where(Notification.id == notif_id)
-            .where(Notification.user_id == current_user.id)
-        )
-        notification = result.first()
-        if notification and not notification.is_read:
-            notification.is_read = True
-            notification.read_at = datetime.utcnow()
-            session.add(notification)
+    if not payload.notification_ids:
+        return {"ok": True, "marked": 0}
+    
+    marked = await count_affected(
+        session,
+        update(Notification)
+        .where(Notification.id.in_(payload.notification_ids))
+        .where(Notification.user_id == current_user.id)
+        .where(Notification.is_read == False)
+        .values(is_read=True, read_at=datetime.utcnow())
+    )
     
     await session.commit()
-    return {"ok": True, "marked": len(payload.notification_ids)}
+    return {"ok": True, "marked": marked}
 
 @router.post("/mark-all-read")
 async def mark_all_notifications_read(
@@ -157,19 +167,13 @@ async def mark_all_notifications_read(
     session: AsyncSession = Depends(get_async_session)
 ):
     """Marquer toutes les notifications comme lues"""
-    result = await session.exec(
-        select(Notification)
+    count = await count_affected(
+        session,
+        update(Notification)
         .where(Notification.user_id == current_user.id)
         .where(Notification.is_read == False)
+        .values(is_read=True, read_at=datetime.utcnow())
     )
-    notifications = result.all()
-    
-    count = 0
-    for notification in notifications:
-        notification.is_read = True
-        notification.read_at = datetime.utcnow()
-        session.add(notification)
-        count += 1
     
     await session.commit()
     return {"ok": True, "marked": count}
@@ -202,15 +206,10 @@ async def delete_all_notifications(
     session: AsyncSession = Depends(get_async_session)
 ):
     """Supprimer toutes les notifications de l'utilisateur"""
-    result = await session.exec(
-        select(Notification).where(Notification.user_id == current_user.id)
+    count = await count_affected(
+        session,
+        delete(Notification).where(Notification.user_id == current_user.id)
     )
-    notifications = result.all()
-    
-    count = 0
-    for notification in notifications:
-        await session.delete(notification)
-        count += 1
     
     await session.commit()
     return {"ok": True, "deleted": count}
@@ -1,8 +1,7 @@
 from fastapi import APIRouter
-from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.async_db import async_engine
-from app.models import SiteConfig
+from app.core.site_config import get_config, get_config_bool
 from typing import Optional
 from pydantic import BaseModel
 
@@ -23,19 +22,8 @@ def test_public():
 @router.get("/public/site-info", response_model=SiteInfoResponse)
 async def get_site_info():
     """Récupérer les informations publiques du site (titre, etc.)"""
-    async with AsyncSession(async_engine) as session:
-        # Site title
-        result = await session.exec(select(SiteConfig).where(SiteConfig.key == "site_title"))
-        site_title_config = result.first()
-        site_title = site_title_config.value if site_title_config else "Wisherr"
-        
-        # Allow registration
-        reg_result = await session.exec(select(SiteConfig).where(SiteConfig.key == "allow_registration"))
-        allow_reg_config = reg_result.first()
-        allow_registration = allow_reg_config.value.lower() == "true" if allow_reg_config else True
-        
-        return SiteInfoResponse(
-            site_title=site_title,
-            allow_registration=allow_registration
-        )
+    return SiteInfoResponse(
+        site_title=await get_config("site_title", "Wisherr"),
+        allow_registration=await get_config_bool("allow_registration", True)
+    )
 
@@ -0,0 +1,187 @@
+"""
+Cache des résultats de scraping, indexé par URL canonique.
+
+Stockage dans Redis si configuré, sinon dans la table PostgreSQL `scrape_cache`.
+Les requêtes simultanées pour une même URL sont regroupées en un seul fetch, exécuté
+dans une tâche commune: l'annulation d'un appelant (client déconnecté) n'interrompt
+pas les autres, le fetch n'est annulé que lorsque plus personne ne l'attend.
+"""
+import os
+import re
+import json
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from sqlalchemy import text
+
+from app.core import cache
+from app.core.async_db import async_engine
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_CACHE_TTL = int(os.getenv("SCRAPE_CACHE_TTL", str(6 * 3600)))
+
+# Paramètres de suivi / d'affiliation retirés sur tous les sites: uniquement des noms
+# propres aux outils de suivi (un nom générique peut choisir le produit ou la variante)
+TRACKING_PARAMS = {
+    "gclid", "gbraid", "wbraid", "fbclid", "msclkid", "dclid", "yclid", "igshid", "ttclid",
+    "mc_cid", "mc_eid", "srsltid", "_ga", "_gl", "awc", "ranmid", "raneaid", "ransiteid",
+    "cm_mmc", "mkt_tok",
+}
+TRACKING_PREFIXES = ("utm_", "_hs")
+
+# Paramètres de suivi propres à certains sites (motif d'hôte -> noms, préfixes)
+SITE_TRACKING_PARAMS = {
+    "amazon.": (
+        {"ref", "ref_", "tag", "linkcode", "linkid", "camp", "creative", "creativeasin", "ascsubtag",
+         "psc", "smid", "qid", "sr", "keywords", "crid", "sprefix", "dib", "dib_tag", "content-id",
+         "_encoding"},
+        ("pd_rd_", "pf_rd_"),
+    ),
+    "aliexpress.": ({"spm", "scm", "algo_pvid", "algo_exp_id", "aff_fcid", "aff_fsk", "aff_platform",
+                     "aff_trace_key", "terminal_id"}, ()),
+}
+
+AMAZON_ASIN_RE = re.compile(r"/(?:dp|gp/product|gp/aw/d|exec/obidos/asin|o/asin)/([A-Z0-9]{10})(?:[/?]|$)", re.IGNORECASE)
+
+
+
+class _Inflight:
+    """Scrape en cours pour une clé, partagé par tous ses appelants"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+_inflight: Dict[str, _Inflight] = {}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    URL canonique pour le cache: schéma et hôte en minuscules, fragment et paramètres
+    de suivi supprimés (noms génériques comme `ref` ou `tag` seulement sur les sites
+    où ils ne servent qu'au suivi), paramètres restants triés. Les pages produit Amazon sont
+    ramenées à https://<hôte>/dp/<ASIN>.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+
+    if ".amazon." in f".{host}" or host.startswith("amazon."):
+        match = AMAZON_ASIN_RE.search(parts.path)
+        if match:
+            return f"https://{host}/dp/{match.group(1).upper()}"
+
+    path = re.sub(r"/{2,}", "/", parts.path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    names, prefixes = set(TRACKING_PARAMS), TRACKING_PREFIXES
+    for pattern, (site_names, site_prefixes) in SITE_TRACKING_PARAMS.items():
+        if pattern in host:
+            names |= site_names
+            prefixes += site_prefixes
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in names and not k.lower().startswith(prefixes)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def cache_key(canonical_url: str) -> str:
+    return hashlib.sha256(canonical_url.encode()).hexdigest()
+
+
+async def get_cached_result(canonical_url: str) -> Optional[dict]:
+    key = cache_key(canonical_url)
+    if cache.redis_client:
+        return await cache.get_cached(f"scrape:{key}")
+    try:
+        async with async_engine.connect() as conn:
+            result = await conn.execute(
+                text("SELECT data FROM scrape_cache WHERE url_key = :key AND expires_at > :now"),
+                {"key": key, "now": datetime.utcnow()},
+            )
+            data = result.scalar()
+    except Exception as e:
+        logger.warning("Lecture du cache de scraping impossible: %s", e)
+        return None
+    if isinstance(data, str):
+        data = json.loads(data)
+    return data
+
+
+async def set_cached_result(canonical_url: str, data: dict, ttl: int = SCRAPE_CACHE_TTL):
+    key = cache_key(canonical_url)
+    if cache.redis_client:
+        await cache.set_cached(f"scrape:{key}", data, ttl)
+        return
+    try:
+        async with async_engine.begin() as conn:
+            await conn.execute(text("""
+                INSERT INTO scrape_cache (url_key, url, data, expires_at)
+                VALUES (:key, :url, CAST(:data AS JSONB), :expires_at)
+                ON CONFLICT (url_key) DO UPDATE
+                SET data = EXCLUDED.data, expires_at = EXCLUDED.expires_at
+            """), {
+                "key": key,
+                "url": canonical_url[:2048],
+                "data": json.dumps(data),
+                "expires_at": datetime.utcnow() + timedelta(seconds=ttl),
+            })
+    except Exception as e:
+        logger.warning("Écriture du cache de scraping impossible: %s", e)
+
+
+async def purge_expired_results() -> int:
+    """Supprime les entrées expirées de la table de cache (job planifié)"""
+    async with async_engine.begin() as conn:
+        result = await conn.execute(text("DELETE FROM scrape_cache WHERE expires_at <= :now"), {"now": datetime.utcnow()})
+        return result.rowcount or 0
+
+
+async def _scrape_and_store(key: str, url: str, scrape: Callable[[str], Awaitable[dict]]) -> dict:
+    data = await scrape(url)
+    if data.get("success"):
+        await set_cached_result(key, data)
+    return data
+
+
+async def cached_scrape(key: str, url: str, scrape: Callable[[str], Awaitable[dict]]) -> dict:
+    """
+    Renvoie le résultat en cache pour `key` (URL canonique), ou exécute `scrape(url)`
+    une seule fois même si plusieurs requêtes concurrentes arrivent pour la même clé.
+    L'URL d'origine est celle qui est récupérée: la forme canonique ne sert que de clé.
+    Seuls les résultats réussis (`success`) sont mis en cache.
+    """
+    cached = await get_cached_result(key)
+    if cached is not None:
+        return cached
+
+    entry = _inflight.get(key)
+    if entry is None:
+        entry = _inflight[key] = _Inflight(asyncio.create_task(_scrape_and_store(key, url, scrape)))
+
+        def release(_task, entry=entry):
+            if _inflight.get(key) is entry:
+                del _inflight[key]
+
+        entry.task.add_done_callback(release)
+
+    entry.waiters += 1
+    try:
+        return await asyncio.shield(entry.task)
+    except asyncio.CancelledError:
+        # Dernier appelant annulé: plus personne n'attend le résultat, abandonner le fetch
+        if entry.waiters == 1 and not entry.task.done():
+            entry.task.cancel()
+            if _inflight.get(key) is entry:
+                del _inflight[key]
+        raise
+    finally:
+        entry.waiters -= 1
@@ -0,0 +1,185 @@
+"""
+Moteur d'extraction produit commun à /api/scrape et /metadata/fetch.
+
+`extract_product` analyse une page déjà téléchargée; `scrape_page` la télécharge
+via le client HTTP partagé puis l'analyse dans un pool de processus, pour qu'une
+page lourde ne bloque pas la boucle asyncio. Priorité des sources lors de la fusion:
+extracteur du site > JSON-LD > Open Graph > balises meta.
+"""
+import os
+import asyncio
+import logging
+from typing import Optional, Tuple
+from urllib.parse import urljoin
+import httpx
+
+from app.core.http import fetch, FetchResult, SCRAPE_MAX_BYTES
+from app.core.process_pool import ProcessPool
+from app.scrape.parser import parse_html
+from app.scrape.stream import SCRAPE_EARLY_STOP, MetadataProbe, detect_html_encoding
+from app.scrape.extractors import (
+    clean_price, extract_json_ld, extract_opengraph, extract_meta_tags,
+    extract_generic, get_extractor, search_text_price,
+)
+
+logger = logging.getLogger(__name__)
+
+# Workers d'analyse HTML (0 = analyse dans un thread du processus principal)
+SCRAPE_PARSE_WORKERS = int(os.getenv("SCRAPE_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Durée maximale d'analyse d'une page (secondes)
+SCRAPE_PARSE_TIMEOUT = float(os.getenv("SCRAPE_PARSE_TIMEOUT", "10"))
+# Taille maximale de HTML transmise au parseur (octets)
+SCRAPE_PARSE_MAX_BYTES = int(os.getenv("SCRAPE_PARSE_MAX_BYTES", str(2 * 1024 * 1024)))
+
+parse_pool = ProcessPool("scrape_parse", SCRAPE_PARSE_WORKERS, SCRAPE_PARSE_TIMEOUT)
+
+AVAILABILITY_LABELS = {
+    'InStock': 'En stock',
+    'OutOfStock': 'Rupture de stock',
+}
+
+
+def scrape_result(url: str, success: bool = True, **fields) -> dict:
+    """Résultat vide au format ScrapeResponse"""
+    result = {
+        'success': success,
+        'url': url,
+        'title': None,
+        'description': None,
+        'price': None,
+        'currency': None,
+        'image_url': None,
+        'images': [],
+        'brand': None,
+        'availability': None,
+        'error': None,
+    }
+    result.update(fields)
+    return result
+
+
+def first_offer(json_ld: dict) -> dict:
+    offers = json_ld.get('offers')
+    if isinstance(offers, list):
+        offers = offers[0] if offers else None
+    return offers if isinstance(offers, dict) else {}
+
+
+def first_image(value) -> Optional[str]:
+    """Image JSON-LD: chaîne, liste ou ImageObject"""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get('url') or value.get('contentUrl')
+    return str(value) if value else None
+
+
+def extract_product(html: str, url: str, parser: Optional[str] = None) -> dict:
+    """Analyser une page produit et fusionner les différentes sources"""
+    page = parse_html(html, parser)
+
+    json_ld = extract_json_ld(page)
+    og_data = extract_opengraph(page)
+    meta_data = extract_meta_tags(page)
+    extractor = get_extractor(url)
+    site_data = extractor(page, url)
+    offer = first_offer(json_ld)
+
+    result = scrape_result(url)
+
+    title = site_data.get('title') or json_ld.get('name') or og_data.get('title') or meta_data.get('title')
+    result['title'] = title[:256] if title else None
+
+    description = (
+        site_data.get('description') or json_ld.get('description')
+        or og_data.get('description') or meta_data.get('description')
+    )
+    result['description'] = description[:1000] if description else None
+
+    price = site_data.get('price')
+    if not price and offer:
+        amount = offer.get('price') or (offer.get('priceSpecification') or {}).get('price')
+        price = clean_price(str(amount or ''))
+    if not price:
+        price = clean_price(og_data.get('price', '')) or clean_price(meta_data.get('price', ''))
+    if not price and extractor is not extract_generic:
+        # L'extracteur générique a déjà parcouru le texte de la page
+        price = search_text_price(page)
+    result['price'] = price
+
+    result['currency'] = site_data.get('currency') or og_data.get('currency') or offer.get('priceCurrency') or 'EUR'
+
+    image = (
+        site_data.get('image') or first_image(json_ld.get('image'))
+        or og_data.get('image') or meta_data.get('image')
+    )
+    result['image_url'] = urljoin(url, image) if image else None
+
+    images = list(site_data.get('images', []))
+    if result['image_url'] and result['image_url'] not in images:
+        images.insert(0, result['image_url'])
+    result['images'] = images
+
+    brand = json_ld.get('brand')
+    if isinstance(brand, dict):
+        brand = brand.get('name')
+    result['brand'] = site_data.get('brand') or (str(brand) if brand else None)
+
+    availability = str(offer.get('availability') or '')
+    for marker, label in AVAILABILITY_LABELS.items():
+        if marker in availability:
+            result['availability'] = label
+            break
+
+    return result
+
+
+def extract_product_bytes(content: bytes, encoding: str, url: str) -> dict:
+    """Point d'entrée des workers: décodage et analyse hors du processus principal"""
+    return extract_product(content.decode(encoding, errors="replace"), url)
+
+
+async def parse_product(content: bytes, encoding: str, url: str) -> dict:
+    """Analyser une page dans le pool (tronquée à SCRAPE_PARSE_MAX_BYTES)"""
+    return await parse_pool.run(extract_product_bytes, content[:SCRAPE_PARSE_MAX_BYTES], encoding, url)
+
+
+async def fetch_and_parse(url: str, headers: Optional[dict] = None) -> Tuple[FetchResult, dict]:
+    """
+    Télécharger (lecture arrêtée dès que les données attendues sont reçues) et analyser une page.
+
+    Raises:
+        httpx.HTTPError, asyncio.TimeoutError
+    """
+    markers = get_extractor(url).markers if SCRAPE_EARLY_STOP else None
+    probe = MetadataProbe(markers) if markers else None
+    response = await fetch(
+        url,
+        headers=headers,
+        max_bytes=min(SCRAPE_MAX_BYTES, SCRAPE_PARSE_MAX_BYTES),
+        stop=probe.feed if probe else None,
+    )
+    encoding = detect_html_encoding(response.content, response.charset)
+    result = await parse_product(response.content, encoding, response.url)
+    result['url'] = url
+    return response, result
+
+
+async def scrape_page(url: str) -> dict:
+    """Télécharger et analyser une page produit (sans cache)"""
+    try:
+        _, result = await fetch_and_parse(url)
+        logger.info(f"Scrape successful: {url}")
+        return result
+    except httpx.TimeoutException:
+        logger.warning(f"Scrape timeout: {url}")
+        return scrape_result(url, success=False, error="Délai d'attente dépassé")
+    except asyncio.TimeoutError:
+        logger.warning(f"Scrape parse timeout: {url}")
+        return scrape_result(url, success=False, error="Analyse de la page trop longue")
+    except httpx.HTTPStatusError as e:
+        logger.warning(f"Scrape HTTP error: {url} - {e.response.status_code}")
+        return scrape_result(url, success=False, error=f"Erreur HTTP {e.response.status_code}")
+    except Exception as e:
+        logger.error(f"Scrape error: {url} - {str(e)}")
+        return scrape_result(url, success=False, error=str(e))
@@ -0,0 +1,301 @@
+"""
+Extracteurs de données produit: sources génériques (JSON-LD, Open Graph, meta)
+et registre d'extracteurs spécifiques par site.
+
+Un extracteur de site reçoit la page parsée (app.scrape.parser.ParsedPage) et l'URL,
+et renvoie un dict partiel (title, description, price, currency, image, images, brand).
+Pour ajouter un site:
+
+    @register_extractor("exemple.", markers=(rb'id="prix"',))
+    def extract_exemple(page, url):
+        ...
+
+`markers` (motifs binaires, un par donnée lue par l'extracteur) permet d'arrêter le
+téléchargement dès qu'ils sont tous passés (app.scrape.stream); sans marqueurs,
+les pages du site sont lues en entier.
+"""
+import re
+import json
+from typing import Callable, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from app.core.http import register_metric_hosts
+from app.scrape.parser import ParsedPage
+from app.scrape.stream import GENERIC_MARKERS
+
+Extractor = Callable[[ParsedPage, str], dict]
+
+# (motifs d'hôte, extracteur) dans l'ordre d'enregistrement
+SITE_EXTRACTORS: List[Tuple[Tuple[str, ...], Extractor]] = []
+
+PRICE_PATTERNS = [
+    re.compile(r'(\d+[.,]\d{2})\s*€'),
+    re.compile(r'€\s*(\d+[.,]\d{2})'),
+    re.compile(r'\$\s*(\d+[.,]\d{2})'),
+    re.compile(r'(\d+[.,]\d{2})\s*\$'),
+    re.compile(r'price["\s:]+(\d+[.,]\d{2})', re.IGNORECASE),
+]
+
+IGNORED_IMAGE_WORDS = ('logo', 'icon', 'banner', 'ad', 'tracking')
+
+
+def register_extractor(*host_patterns: str, markers: Optional[Sequence[bytes]] = None):
+    """Décorateur: enregistre un extracteur pour les hôtes contenant l'un des motifs"""
+    def decorator(func: Extractor) -> Extractor:
+        func.markers = markers
+        SITE_EXTRACTORS.append((tuple(p.lower() for p in host_patterns), func))
+        register_metric_hosts(*host_patterns)
+        return func
+    return decorator
+
+
+def get_extractor(url: str) -> Extractor:
+    """Extracteur du site de `url`, ou l'extracteur générique"""
+    host = (urlsplit(url).hostname or "").lower()
+    for patterns, func in SITE_EXTRACTORS:
+        if any(pattern in host for pattern in patterns):
+            return func
+    return extract_generic
+
+
+# =====================================================
+# SOURCES GÉNÉRIQUES
+# =====================================================
+
+def clean_price(price_str: str) -> Optional[float]:
+    """Nettoyer et convertir un prix en float"""
+    if not price_str:
+        return None
+    # Supprimer tout sauf chiffres, virgules et points
+    cleaned = re.sub(r'[^\d,.\s]', '', price_str)
+    cleaned = cleaned.strip()
+    if not cleaned:
+        return None
+
+    # Gérer les formats européens (1.234,56) et US (1,234.56)
+    if ',' in cleaned and '.' in cleaned:
+        if cleaned.rfind(',') > cleaned.rfind('.'):
+            # Format européen: 1.234,56
+            cleaned = cleaned.replace('.', '').replace(',', '.')
+        else:
+            # Format US: 1,234.56
+            cleaned = cleaned.replace(',', '')
+    elif ',' in cleaned:
+        # Pourrait être 1234,56 (européen) ou 1,234 (US)
+        parts = cleaned.split(',')
+        if len(parts) == 2 and len(parts[1]) == 2:
+            cleaned = cleaned.replace(',', '.')
+        else:
+            cleaned = cleaned.replace(',', '')
+
+    try:
+        return round(float(cleaned), 2)
+    except ValueError:
+        return None
+
+def find_product(json_data) -> Optional[dict]:
+    """Premier objet schema.org Product d'un bloc JSON-LD (dict, liste ou @graph)"""
+    if isinstance(json_data, list):
+        for item in json_data:
+            found = find_product(item)
+            if found:
+                return found
+    elif isinstance(json_data, dict):
+        item_type = json_data.get('@type')
+        if item_type == 'Product' or (isinstance(item_type, list) and 'Product' in item_type):
+            return json_data
+        if '@graph' in json_data:
+            return find_product(json_data['@graph'])
+    return None
+
+def extract_json_ld(page: ParsedPage) -> dict:
+    """Extraire les données JSON-LD (schema.org)"""
+    for script in page.json_ld:
+        try:
+            product = find_product(json.loads(script))
+        except (json.JSONDecodeError, TypeError):
+            continue
+        if product:
+            return product
+    return {}
+
+def extract_opengraph(page: ParsedPage) -> dict:
+    """Extraire les métadonnées Open Graph"""
+    data = {}
+
+    og_tags = {
+        'og:title': 'title',
+        'og:description': 'description',
+        'og:image': 'image',
+        'og:price:amount': 'price',
+        'og:price:currency': 'currency',
+        'product:price:amount': 'price',
+        'product:price:currency': 'currency',
+    }
+
+    for og_prop, key in og_tags.items():
+        if og_prop in page.meta and key not in data:
+            data[key] = page.meta[og_prop]
+
+    return data
+
+def extract_meta_tags(page: ParsedPage) -> dict:
+    """Extraire les métadonnées standards (title, description, twitter:image, price)"""
+    data = {}
+
+    if page.title:
+        data['title'] = page.title
+
+    for name, key in (('description', 'description'), ('twitter:image', 'image'), ('price', 'price')):
+        if name in page.meta:
+            data[key] = page.meta[name]
+
+    return data
+
+def search_text_price(page: ParsedPage) -> Optional[float]:
+    """Premier prix repéré dans le texte de la page"""
+    text = page.text
+    for pattern in PRICE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return clean_price(match.group(1))
+    return None
+
+# =====================================================
+# EXTRACTEURS PAR SITE
+# =====================================================
+
+@register_extractor("amazon.", markers=(
+    rb'id=["\']?productTitle',
+    rb'class=["\']?a-price-whole',
+    rb'id=["\']?(?:landingImage|imgTagWrapperId)',
+    rb'id=["\']?bylineInfo',
+))
+def extract_amazon(page: ParsedPage, url: str) -> dict:
+    """Extraction spécifique Amazon"""
+    data = {}
+
+    # Titre
+    title = page.select_text('span#productTitle')
+    if title:
+        data['title'] = title
+
+    # Prix: bloc a-price, puis anciens identifiants priceblock_*
+    price_whole = page.select_text('span.a-price-whole')
+    if price_whole:
+        price_frac = page.select_text('span.a-price-fraction')
+        price_str = price_whole.rstrip(',.')
+        if price_frac:
+            price_str += '.' + price_frac
+        data['price'] = clean_price(price_str)
+    if not data.get('price'):
+        for price_id in ('priceblock_ourprice', 'priceblock_dealprice', 'priceblock_saleprice'):
+            block = page.select_text(f'#{price_id}')
+            if block:
+                data['price'] = clean_price(block)
+                if data['price']:
+                    break
+
+    # Image: haute résolution (data-old-hires / data-a-dynamic-image) puis src
+    img_el = page.select_attrs('img#landingImage') or page.select_attrs('#imgTagWrapperId img')
+    if img_el:
+        image = img_el.get('data-old-hires')
+        if not image and img_el.get('data-a-dynamic-image'):
+            try:
+                dynamic = json.loads(img_el['data-a-dynamic-image'])
+                image = next(iter(dynamic), None) if isinstance(dynamic, dict) else None
+            except (json.JSONDecodeError, TypeError):
+                image = None
+        image = image or img_el.get('src')
+        if image:
+            data['image'] = image
+
+    # Marque
+    brand = page.select_text('a#bylineInfo')
+    if brand:
+        data['brand'] = brand.replace('Marque :', '').replace('Visite la boutique', '').strip()
+
+    return data
+
+@register_extractor("cdiscount.")
+def extract_cdiscount(page: ParsedPage, url: str) -> dict:
+    """Extraction spécifique Cdiscount"""
+    data = {}
+
+    title = page.select_text('h1.fpDesCol')
+    if title:
+        data['title'] = title
+
+    price = page.select_text('span.hideFromPro')
+    if price:
+        data['price'] = clean_price(price)
+
+    return data
+
+@register_extractor("fnac.")
+def extract_fnac(page: ParsedPage, url: str) -> dict:
+    """Extraction spécifique Fnac"""
+    data = {}
+
+    title = page.select_text('h1.f-productHeader-Title')
+    if title:
+        data['title'] = title
+
+    price = page.select_text('span.f-priceBox-price')
+    if price:
+        data['price'] = clean_price(price)
+
+    return data
+
+@register_extractor("bol.com")
+def extract_bol(page: ParsedPage, url: str) -> dict:
+    """Extraction spécifique bol.com (JSON-LD et Open Graph, prix en attribut)"""
+    data = {}
+
+    price = page.select_text('[data-test="price"]')
+    if price:
+        # Les centimes sont dans un élément séparé: "24 99"
+        data['price'] = clean_price(price.replace(' ', ','))
+
+    return data
+
+@register_extractor("vinted.")
+def extract_vinted(page: ParsedPage, url: str) -> dict:
+    """Extraction spécifique Vinted (prix affiché dans la page)"""
+    data = {}
+
+    price = page.select_text('[data-testid*="item-price"]')
+    if price:
+        data['price'] = clean_price(price)
+
+    return data
+
+def extract_generic(page: ParsedPage, url: str) -> dict:
+    """Extraction générique pour sites non supportés"""
+    data = {}
+
+    # Chercher des prix
+    price = search_text_price(page)
+    if price:
+        data['price'] = price
+
+    # Chercher images de produit (collectées lors du parcours unique)
+    images = []
+    for src, width, height in page.images:
+        if not any(x in src.lower() for x in IGNORED_IMAGE_WORDS):
+            src = urljoin(url, src)
+            # Préférer les grandes images
+            if width.isdigit() and int(width) > 200:
+                images.insert(0, src)
+            elif height.isdigit() and int(height) > 200:
+                images.insert(0, src)
+            else:
+                images.append(src)
+
+    if images:
+        data['images'] = images[:5]  # Max 5 images
+
+    return data
+
+
+extract_generic.markers = GENERIC_MARKERS
@@ -0,0 +1,141 @@
+"""
+Analyse HTML des pages produit.
+
+Le document est parcouru une seule fois pour collecter ce dont l'extraction a besoin:
+<title>, balises <meta> (property / name / itemprop), blocs JSON-LD et images candidates.
+Les extracteurs de site interrogent ensuite la page par sélecteur CSS (arrêt au premier
+élément trouvé) et le texte complet n'est calculé qu'à la demande.
+
+Backend: selectolax (Lexbor) si installé, sinon BeautifulSoup (lxml si disponible,
+sinon html.parser). Forçable avec SCRAPE_HTML_PARSER=selectolax|bs4.
+"""
+import os
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_HTML_PARSER = os.getenv("SCRAPE_HTML_PARSER", "auto").lower()
+
+COLLECTED_TAGS = ("title", "meta", "script", "img")
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # pragma: no cover - dépend de l'installation
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    SOUP_FEATURES = "lxml"
+except ImportError:  # pragma: no cover - dépend de l'installation
+    SOUP_FEATURES = "html.parser"
+
+if SCRAPE_HTML_PARSER == "selectolax" and LexborHTMLParser is None:
+    logger.warning("SCRAPE_HTML_PARSER=selectolax mais selectolax n'est pas installé, repli sur BeautifulSoup")
+
+
+class ParsedPage(ABC):
+    """Données collectées en un seul parcours du document (une sous-classe par backend)"""
+
+    backend = ""
+
+    def __init__(self):
+        self.title: Optional[str] = None
+        self.meta: Dict[str, str] = {}
+        self.json_ld: List[str] = []
+        self.images: List[Tuple[str, str, str]] = []  # (src, width, height)
+        self._text: Optional[str] = None
+
+    def collect(self, tag: str, attrs: dict, text):
+        """Traite un élément du parcours; `text` est appelé seulement si nécessaire"""
+        if tag == "meta":
+            key = attrs.get("property") or attrs.get("name") or attrs.get("itemprop")
+            content = attrs.get("content")
+            if key and content:
+                self.meta.setdefault(key.strip().lower(), content.strip())
+        elif tag == "img":
+            src = attrs.get("src") or attrs.get("data-src")
+            if src:
+                self.images.append((src, str(attrs.get("width") or ""), str(attrs.get("height") or "")))
+        elif tag == "script":
+            if (attrs.get("type") or "").strip().lower() == "application/ld+json":
+                self.json_ld.append(text())
+        elif tag == "title" and self.title is None:
+            self.title = text().strip()
+
+    @property
+    def text(self) -> str:
+        """Texte complet de la page (calculé une fois, à la demande)"""
+        if self._text is None:
+            self._text = self.full_text()
+        return self._text
+
+    @abstractmethod
+    def full_text(self) -> str:
+        """Texte complet du document"""
+
+    @abstractmethod
+    def select_text(self, css: str) -> Optional[str]:
+        """Texte du premier élément correspondant au sélecteur"""
+
+    @abstractmethod
+    def select_attrs(self, css: str) -> Optional[dict]:
+        """Attributs du premier élément correspondant au sélecteur"""
+
+
+class LexborPage(ParsedPage):
+    backend = "selectolax"
+
+    def __init__(self, html: str):
+        super().__init__()
+        self.tree = LexborHTMLParser(html)
+        for node in self.tree.css(", ".join(COLLECTED_TAGS)):
+            self.collect(node.tag, node.attributes, lambda node=node: node.text(deep=True) or "")
+
+    def full_text(self) -> str:
+        root = self.tree.body or self.tree.root
+        return root.text(separator=" ") if root is not None else ""
+
+    def select_text(self, css: str) -> Optional[str]:
+        node = self.tree.css_first(css)
+        return node.text(separator=" ", strip=True) if node is not None else None
+
+    def select_attrs(self, css: str) -> Optional[dict]:
+        node = self.tree.css_first(css)
+        return dict(node.attributes) if node is not None else None
+
+
+class SoupPage(ParsedPage):
+    backend = "bs4"
+
+    def __init__(self, html: str):
+        from bs4 import BeautifulSoup
+
+        super().__init__()
+        self.soup = BeautifulSoup(html, SOUP_FEATURES)
+        for tag in self.soup.find_all(COLLECTED_TAGS):
+            self.collect(tag.name, tag.attrs, lambda tag=tag: tag.string or tag.get_text())
+
+    def full_text(self) -> str:
+        return self.soup.get_text(" ")
+
+    def select_text(self, css: str) -> Optional[str]:
+        tag = self.soup.select_one(css)
+        return tag.get_text(" ", strip=True) if tag is not None else None
+
+    def select_attrs(self, css: str) -> Optional[dict]:
+        tag = self.soup.select_one(css)
+        return dict(tag.attrs) if tag is not None else None
+
+
+def available_backends() -> List[str]:
+    return (["selectolax"] if LexborHTMLParser is not None else []) + ["bs4"]
+
+
+def parse_html(html: str, backend: Optional[str] = None) -> ParsedPage:
+    """Parse le document avec le backend demandé (ou SCRAPE_HTML_PARSER)"""
+    backend = backend or SCRAPE_HTML_PARSER
+    if backend in ("auto", "selectolax") and LexborHTMLParser is not None:
+        return LexborPage(html)
+    return SoupPage(html)
@@ -0,0 +1,115 @@
+"""
+Lecture en flux des pages produit: arrêt anticipé et détection du charset.
+
+Le téléchargement s'arrête dès que les marqueurs des données attendues (titre, image,
+prix: balises Open Graph, JSON-LD, ou éléments lus par l'extracteur du site) sont
+passés: à la fermeture du <head>, ou après SCRAPE_EARLY_STOP_SLACK octets
+supplémentaires pour laisser les éléments concernés se terminer.
+"""
+import os
+import re
+import codecs
+from typing import Optional, Pattern, Sequence
+
+SCRAPE_EARLY_STOP = os.getenv("SCRAPE_EARLY_STOP", "true").lower() in ("true", "1", "yes", "on")
+SCRAPE_EARLY_STOP_SLACK = int(os.getenv("SCRAPE_EARLY_STOP_SLACK", "32768"))
+
+# Un marqueur par donnée nécessaire (alternatives dans le même motif)
+GENERIC_MARKERS = (
+    rb'<title[\s>]|["\']og:title["\']',
+    rb'["\'](?:og:image|twitter:image)["\']',
+    rb'["\'](?:og|product):price:amount["\']|application/ld\+json["\']?[^>]*>[^<]*"price"\s*:',
+)
+
+HEAD_END_RE = re.compile(rb"</head\s*>", re.IGNORECASE)
+META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_:.\-]+)""", re.IGNORECASE)
+# Zone du document où chercher la déclaration <meta charset> (pré-analyse HTML)
+CHARSET_PRESCAN_BYTES = 4096
+# Longueur maximale d'un marqueur à cheval sur deux morceaux
+WINDOW_OVERLAP = 512
+
+# Étiquettes que les navigateurs décodent en windows-1252 (WHATWG Encoding)
+WINDOWS_1252_LABELS = {"iso-8859-1", "iso8859-1", "latin1", "latin-1", "l1", "ascii", "us-ascii", "cp819", "windows-1252"}
+
+
+class MetadataProbe:
+    """Observe les morceaux reçus et indique quand la lecture peut s'arrêter"""
+
+    def __init__(self, markers: Sequence[bytes], slack: int = SCRAPE_EARLY_STOP_SLACK):
+        self.pending: list[Pattern] = [re.compile(m, re.IGNORECASE) for m in markers]
+        self.slack = slack
+        self.size = 0
+        self.last_marker = 0  # position (octets) de la fin du dernier marqueur trouvé
+        self.head_end: Optional[int] = None
+        self._tail = b""
+
+    def feed(self, chunk: bytes) -> bool:
+        """Ajoute un morceau; True quand les données attendues sont complètes"""
+        window = self._tail + chunk
+        offset = self.size - len(self._tail)  # position de `window` dans le document
+        self.size += len(chunk)
+        self._tail = window[-WINDOW_OVERLAP:]
+
+        if self.pending:
+            remaining = []
+            for pattern in self.pending:
+                match = pattern.search(window)
+                if match:
+                    self.last_marker = max(self.last_marker, offset + match.end())
+                else:
+                    remaining.append(pattern)
+            self.pending = remaining
+        if self.head_end is None:
+            match = HEAD_END_RE.search(window)
+            if match:
+                self.head_end = offset + match.start()
+
+        if self.pending:
+            return False
+        # Marqueurs tous dans le <head> refermé: les balises concernées sont complètes
+        if self.head_end is not None and self.head_end >= self.last_marker:
+            return True
+        return self.size - self.last_marker >= self.slack
+
+
+def normalize_charset(label: Optional[str]) -> Optional[str]:
+    """Nom de codec Python pour une étiquette de charset, None si inconnue"""
+    if not label:
+        return None
+    label = label.strip().strip("\"'").lower()
+    if label in WINDOWS_1252_LABELS:
+        return "cp1252"
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        return None
+
+
+def detect_html_encoding(content: bytes, header_charset: Optional[str] = None) -> str:
+    """
+    Encodage d'une page HTML, dans l'ordre des navigateurs: BOM, charset de l'en-tête
+    Content-Type, <meta charset> en début de document, puis UTF-8 s'il est valide
+    et windows-1252 sinon.
+    """
+    if content.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if content.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+
+    encoding = normalize_charset(header_charset)
+    if encoding:
+        return encoding
+
+    match = META_CHARSET_RE.search(content[:CHARSET_PRESCAN_BYTES])
+    encoding = normalize_charset(match.group(1).decode("ascii", "ignore")) if match else None
+    # Une page servie en octets ne peut pas être réellement en UTF-16
+    if encoding and not encoding.startswith("utf-16"):
+        return encoding
+
+    try:
+        content.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # Seul le dernier caractère est invalide: coupé par l'arrêt de la lecture
+        truncated = e.reason == "unexpected end of data" and e.start >= len(content) - 3
+        return "utf-8" if truncated else "cp1252"
@@ -13,7 +13,9 @@ from app.models import (
 )
 from app.auth.deps import get_current_user
 from app.core.async_db import async_engine
-from app.core.utils import get_site_config
+from app.core.limits import rate_limit
+from app.core.site_config import get_config
+from app.media.remote import proxied_image_url
 
 router = APIRouter(prefix="/shares", tags=["shares"])
 pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
@@ -136,6 +138,7 @@ async def list_my_shares(
         .order_by(WishlistShare.created_at.desc())
     )
     
+    wisherr_url = await get_config('wisherr_url', 'http://localhost:8080')
     shares = []
     for share, wishlist in result.all():
         response = ShareResponse(
@@ -147,7 +150,7 @@ async def list_my_shares(
             target_group_id=share.target_group_id,
             target_user_id=share.target_user_id,
             share_token=share.share_token,
-            share_url=f"{get_site_config('wisherr_url', 'http://localhost:8080')}/shared/{share.share_token}" if share.share_token else None,
+            share_url=f"{wisherr_url}/shared/{share.share_token}" if share.share_token else None,
             created_at=share.created_at,
             expires_at=share.expires_at,
             is_active=share.is_active
@@ -476,7 +479,7 @@ async def create_external_share(
     await session.commit()
     await session.refresh(share)
     
-    wisherr_url = get_site_config('wisherr_url', 'http://localhost:8080')
+    wisherr_url = await get_config('wisherr_url', 'http://localhost:8080')
     share_url = f"{wisherr_url}/shared/{share.share_token}"
     await log_activity(
         session, current_user.id, "list_shared_external", "share", share.id,
@@ -634,7 +637,7 @@ async def update_share_permission(
 # ROUTES - ACCÈS EXTERNE (SANS AUTH)
 # =====================================================
 
-@router.get("/external/{token}")
+@router.get("/external/{token}", dependencies=[Depends(rate_limit("share"))])
 async def get_external_share_info(
     token: str,
     session: AsyncSession = Depends(get_async_session)
@@ -668,7 +671,7 @@ async def get_external_share_info(
         "owner_name": owner.username
     }
 
-@router.post("/external/{token}/access", response_model=ExternalAccessResponse)
+@router.post("/external/{token}/access", response_model=ExternalAccessResponse, dependencies=[Depends(rate_limit("share"))])
 async def access_external_share(
     token: str,
     payload: ExternalAccessRequest,
@@ -724,7 +727,7 @@ async def access_external_share(
                 "name": item.name,
                 "description": item.description,
                 "url": item.url,
-                "image_url": item.image_url,
+                "image_url": proxied_image_url(item.image_url),
                 "price": item.price,
                 "status": item.status,
                 "reserved_by_name": item.reserved_by_name,
@@ -734,7 +737,7 @@ async def access_external_share(
         ]
     )
 
-@router.post("/external/{token}/reserve/{item_id}")
+@router.post("/external/{token}/reserve/{item_id}", dependencies=[Depends(rate_limit("share"))])
 async def reserve_item_external(
     token: str,
     item_id: int,
@@ -812,7 +815,7 @@ async def reserve_item_external(
     
     return {"ok": True, "message": f"Article réservé par {reserver_name}"}
 
-@router.post("/external/{token}/purchase/{item_id}")
+@router.post("/external/{token}/purchase/{item_id}", dependencies=[Depends(rate_limit("share"))])
 async def mark_purchased_external(
     token: str,
     item_id: int,
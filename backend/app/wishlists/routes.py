@@ -35,6 +35,7 @@ class WishlistOut(BaseModel):
     title: str
     description: Optional[str] = None
     occasion: Optional[str] = None
+    image_url: Optional[str] = None
     item_count: int = 0
     created_at: Optional[str] = None
     role: Optional[str] = None
@@ -44,6 +45,7 @@ class CreateWishlistRequest(BaseModel):
     title: str
     description: Optional[str] = None
     occasion: Optional[str] = None
+    image_url: Optional[str] = None  # Couverture (URL renvoyée par POST /media/uploads)
 
 
 @router.get("/wishlists/test")
@@ -59,7 +61,7 @@ def list_my_wishlists(
 ):
     """Lister les wishlists de l'utilisateur courant"""
     sql = """
-    SELECT w.id, w.owner_id, w.title, w.description, w.occasion, w.created_at,
+    SELECT w.id, w.owner_id, w.title, w.description, w.occasion, w.image_url, w.created_at,
            (SELECT COUNT(*) FROM items i WHERE i.wishlist_id = w.id) as item_count
     FROM wishlists w
     WHERE w.owner_id = :uid
@@ -76,6 +78,7 @@ def list_my_wishlists(
                 "title": r["title"],
                 "description": r.get("description"),
                 "occasion": r.get("occasion"),
+                "image_url": r.get("image_url"),
                 "item_count": r.get("item_count", 0),
                 "created_at": str(r["created_at"]) if r.get("created_at") else None,
                 "role": "owner"
@@ -110,7 +113,7 @@ def get_wishlist(id: int, current_user: User = Depends(get_current_user)):
     with Session(engine) as session:
         # Récupérer la wishlist
         wl = session.execute(text("""
-            SELECT w.id, w.owner_id, w.title, w.description, w.occasion, w.created_at,
+            SELECT w.id, w.owner_id, w.title, w.description, w.occasion, w.image_url, w.created_at,
                    (SELECT COUNT(*) FROM items i WHERE i.wishlist_id = w.id) as item_count
             FROM wishlists w WHERE w.id = :id
         """), {"id": id}).mappings().first()
@@ -165,6 +168,7 @@ def get_wishlist(id: int, current_user: User = Depends(get_current_user)):
             "title": wl["title"],
             "description": wl.get("description"),
             "occasion": wl.get("occasion"),
+            "image_url": wl.get("image_url"),
             "item_count": wl.get("item_count", 0),
             "created_at": str(wl["created_at"]) if wl.get("created_at") else None,
             "role": role
@@ -173,9 +177,9 @@ def get_wishlist(id: int, current_user: User = Depends(get_current_user)):
 
 @router.post("/wishlists", response_model=WishlistOut)
 def create_wishlist(payload: CreateWishlistRequest, current_user: User = Depends(get_current_user)):
-    sql = text("INSERT INTO wishlists (owner_id, title, description, occasion, is_public, is_archived, cover_color) VALUES (:owner_id, :title, :description, :occasion, :is_public, :is_archived, :cover_color) RETURNING id, owner_id, title, description, occasion, created_at")
+    sql = text("INSERT INTO wishlists (owner_id, title, description, occasion, image_url, is_public, is_archived, cover_color) VALUES (:owner_id, :title, :description, :occasion, :image_url, :is_public, :is_archived, :cover_color) RETURNING id, owner_id, title, description, occasion, image_url, created_at")
     with Session(engine) as session:
-        result = session.execute(sql, {"owner_id": current_user.id, "title": payload.title, "description": payload.description, "occasion": payload.occasion, "is_public": False, "is_archived": False, "cover_color": "#6366f1"})
+        result = session.execute(sql, {"owner_id": current_user.id, "title": payload.title, "description": payload.description, "occasion": payload.occasion, "image_url": payload.image_url, "is_public": False, "is_archived": False, "cover_color": "#6366f1"})
         session.commit()
         row = result.mappings().first()
         
@@ -189,6 +193,7 @@ def create_wishlist(payload: CreateWishlistRequest, current_user: User = Depends
             "title": row["title"], 
             "description": row.get("description"),
             "occasion": row.get("occasion"),
+            "image_url": row.get("image_url"),
             "item_count": 0,
             "created_at": str(row["created_at"]) if row.get("created_at") else None,
             "role": "owner"
@@ -227,14 +232,14 @@ def update_wishlist(id: int, payload: CreateWishlistRequest, current_user: User
         role = coll["role"] if coll else None
         if current_user.id != owner_id and not current_user.is_admin and role not in ("editor", "owner"):
             raise HTTPException(status_code=403, detail="Forbidden")
-        session.execute(text("UPDATE wishlists SET title = :title, description = :description, updated_at = NOW() WHERE id = :id"), {"id": id, "title": payload.title, "description": payload.description})
+        session.execute(text("UPDATE wishlists SET title = :title, description = :description, image_url = COALESCE(:image_url, image_url), updated_at = NOW() WHERE id = :id"), {"id": id, "title": payload.title, "description": payload.description, "image_url": payload.image_url})
         
         # Log l'activité avant le commit
         log_activity_sync(session, current_user.id, "wishlist_updated", "wishlist", id, payload.title)
         session.commit()
         
-        updated = session.execute(text("SELECT id, owner_id, title, description FROM wishlists WHERE id = :id"), {"id": id}).mappings().first()
-        return {"id": updated["id"], "owner_id": updated["owner_id"], "title": updated["title"], "description": updated.get("description"), "role": ("owner" if current_user.id == owner_id else role)}
+        updated = session.execute(text("SELECT id, owner_id, title, description, image_url FROM wishlists WHERE id = :id"), {"id": id}).mappings().first()
+        return {"id": updated["id"], "owner_id": updated["owner_id"], "title": updated["title"], "description": updated.get("description"), "image_url": updated.get("image_url"), "role": ("owner" if current_user.id == owner_id else role)}
 
 # --- Collaborators & sharing endpoints ---
 class AddCollaboratorRequest(BaseModel):
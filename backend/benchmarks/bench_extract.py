@@ -0,0 +1,109 @@
+"""
+Benchmark de l'extraction produit sur un corpus de pages enregistrées.
+
+    cd backend
+    python -m benchmarks.bench_extract ~/pages-produit --repeat 5
+
+Chaque fichier *.html du corpus est analysé avec chaque backend disponible
+(selectolax, bs4). L'URL d'origine, qui détermine l'extracteur de site, est lue dans
+le commentaire `<!-- saved from url=(NNNN)https://... -->` ajouté par les navigateurs,
+à défaut dans un fichier voisin `<page>.url`. Sans corpus, des pages synthétiques
+de type Amazon (~2 Mo) sont générées.
+"""
+import re
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+from typing import List, Tuple
+
+from app.scrape.engine import extract_product
+from app.scrape.parser import available_backends
+
+SAVED_FROM_RE = re.compile(r"<!--\s*saved from url=\(\d+\)(\S+?)\s*-->", re.IGNORECASE)
+
+
+def load_corpus(directory: Path) -> List[Tuple[str, str, str]]:
+    """(nom, url, html) pour chaque page du corpus"""
+    pages = []
+    for path in sorted(directory.glob("*.htm*")):
+        html = path.read_text(encoding="utf-8", errors="replace")
+        url_file = path.with_suffix(".url")
+        match = SAVED_FROM_RE.search(html[:2048])
+        if url_file.exists():
+            url = url_file.read_text().strip()
+        elif match:
+            url = match.group(1)
+        else:
+            url = f"https://{path.stem}/"
+        pages.append((path.name, url, html))
+    return pages
+
+
+def synthetic_corpus(count: int = 3) -> List[Tuple[str, str, str]]:
+    """Pages de type Amazon: en-tête riche, beaucoup de scripts et d'images"""
+    filler = "".join(
+        f'<div class="a-row"><img src="https://m.media-amazon.com/images/I/{i}.jpg" width="{i % 400}">'
+        f'<span>Article recommandé {i} à {i % 90},99 €</span><script>var x{i} = {{"a": {i}}};</script></div>'
+        for i in range(12000)
+    )
+    pages = []
+    for n in range(count):
+        html = f"""<html><head><title>Produit {n}</title>
+        <meta property="og:title" content="Produit {n}"><meta property="og:image" content="/images/{n}.jpg">
+        <meta name="description" content="Description du produit {n}">
+        <script type="application/ld+json">{{"@type": "Product", "name": "Produit {n}",
+          "offers": {{"price": "{n + 10}.99", "priceCurrency": "EUR"}}}}</script>
+        </head><body><span id="productTitle">Produit {n}</span>
+        <span class="a-price-whole">{n + 10},</span><span class="a-price-fraction">99</span>
+        <img id="landingImage" src="https://m.media-amazon.com/images/I/main{n}.jpg">{filler}</body></html>"""
+        pages.append((f"synthetic-{n}", f"https://www.amazon.fr/dp/B00000000{n}", html))
+    return pages
+
+
+def run(pages: List[Tuple[str, str, str]], repeat: int):
+    results = {}
+    for backend in available_backends():
+        timings = []
+        results[backend] = {}
+        for name, url, html in pages:
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                data = extract_product(html, url, parser=backend)
+                timings.append((time.perf_counter() - t0) * 1000)
+            results[backend][name] = data
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{backend:<11} pages={len(pages):<4} médiane={statistics.median(timings):8.1f} ms  "
+              f"p95={p95:8.1f} ms  total={sum(timings):9.1f} ms")
+
+    # Les backends doivent produire les mêmes données
+    backends = list(results)
+    for name, _, _ in pages:
+        reference = results[backends[0]][name]
+        for backend in backends[1:]:
+            other = results[backend][name]
+            diff = [k for k in reference if reference[k] != other.get(k)]
+            if diff:
+                print(f"  différences {backends[0]}/{backend} sur {name}: {', '.join(diff)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", type=Path, help="répertoire de pages .html enregistrées")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    pages = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    if not pages:
+        print(f"Aucune page .html dans {args.corpus}", file=sys.stderr)
+        return 1
+    size = sum(len(html) for _, _, html in pages) / len(pages) / 1024
+    print(f"{len(pages)} pages, {size:.0f} Ko en moyenne, {args.repeat} passages")
+    run(pages, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Benchmark du surcoût des middlewares par requête.
+
+    cd backend
+    python -m benchmarks.bench_middleware --requests 20000
+
+Une route triviale (GET /api/ping) est appelée directement en ASGI, sans réseau, avec
+trois piles de middlewares:
+
+- aucune: l'application seule (référence);
+- http-middleware: l'ancienne pile (couches BaseHTTPMiddleware pour la limitation de
+  débit, les métriques Prometheus et l'identifiant de requête, puis CORSMiddleware);
+- asgi: le middleware unique app.core.middleware.RequestMiddleware.
+
+Le surcoût affiché est la différence de temps médian par requête avec la référence.
+"""
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Callable, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+
+from app.core import cache
+from app.core.logging_setup import new_request_id, request_id_var
+from app.core.metrics import REQUEST_COUNT, REQUEST_LATENCY
+from app.core.middleware import RequestMiddleware
+
+ORIGINS = ["http://localhost:3000"]
+EXPOSE_HEADERS = ["X-Next-Cursor", "X-Request-ID"]
+
+
+def base_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def bare_app() -> FastAPI:
+    return base_app()
+
+
+def http_middleware_app() -> FastAPI:
+    """Pile d'avant: une couche BaseHTTPMiddleware par traitement, puis CORS"""
+    app = base_app()
+
+    @app.middleware("http")
+    async def prometheus_middleware(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        path = request.scope["route"].path_format if "route" in request.scope else "<unmatched>"
+        REQUEST_LATENCY.labels(method=request.method, path=path).observe(time.perf_counter() - start)
+        REQUEST_COUNT.labels(method=request.method, path=path, status=str(response.status_code)).inc()
+        return response
+
+    @app.middleware("http")
+    async def rate_limit_middleware(request: Request, call_next):
+        # Équivalent de SlowAPIMiddleware sans limite par défaut
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def request_id_middleware(request: Request, call_next):
+        request_id = new_request_id(request.headers.get("x-request-id"))
+        token = request_id_var.set(request_id)
+        try:
+            response = await call_next(request)
+        finally:
+            request_id_var.reset(token)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=ORIGINS,
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
+        allow_headers=["*"],
+        expose_headers=EXPOSE_HEADERS,
+    )
+    return app
+
+
+def asgi_app() -> FastAPI:
+    """Pile actuelle: middleware ASGI unique"""
+    app = base_app()
+    app.add_middleware(RequestMiddleware, allow_origins=ORIGINS, expose_headers=EXPOSE_HEADERS)
+    return app
+
+
+STACKS: Dict[str, Callable[[], FastAPI]] = {
+    "aucune": bare_app,
+    "http-middleware": http_middleware_app,
+    "asgi": asgi_app,
+}
+
+
+def make_scope() -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/ping",
+        "raw_path": b"/api/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"localhost:8000"),
+            (b"origin", ORIGINS[0].encode()),
+            (b"accept", b"application/json"),
+            (b"user-agent", b"bench"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+
+
+async def measure(app: FastAPI, requests: int) -> List[float]:
+    """Durée (µs) de chaque requête"""
+    def make_receive():
+        received = False
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Client toujours connecté: comme un serveur, attendre la déconnexion
+            await asyncio.Event().wait()
+        return receive
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"Statut inattendu: {message['status']}")
+
+    timings = []
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        await app(make_scope(), make_receive(), send)
+        timings.append((time.perf_counter() - t0) * 1e6)
+    return timings
+
+
+async def run(requests: int, warmup: int):
+    # Limitation de débit en mémoire (pas de Redis dans le benchmark)
+    cache.redis_client = None
+    medians = {}
+    for name, factory in STACKS.items():
+        app = factory()
+        await measure(app, warmup)
+        timings = sorted(await measure(app, requests))
+        medians[name] = statistics.median(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        overhead = medians[name] - medians["aucune"]
+        print(f"{name:<16} médiane={medians[name]:8.1f} µs  p95={p95:8.1f} µs  surcoût={overhead:+8.1f} µs")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    print(f"{args.requests} requêtes GET /api/ping par pile")
+    asyncio.run(run(args.requests, args.warmup))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
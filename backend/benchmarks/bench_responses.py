@@ -0,0 +1,169 @@
+"""
+Benchmark du rendu JSON d'une liste de 500 articles.
+
+    cd backend
+    python -m benchmarks.bench_responses --items 500 --requests 200
+
+La route GET /api/items/wishlist/{id} est reproduite sans base de données: elle
+renvoie des ItemOut déjà construits (comme item_to_response), rendus de trois façons:
+
+- fastapi: response_model, revalidation, jsonable_encoder et json.dumps (défaut);
+- orjson: idem avec ORJSONResponse comme classe de réponse par défaut;
+- model_response: sérialiseur compilé de List[ItemOut], sans revalidation
+  (FAST_JSON_RESPONSES=true).
+
+Les trois corps de réponse décodés doivent être identiques.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+
+from app.core.responses import model_response
+from app.items.routes_new import ItemOut
+
+
+def make_items(count: int) -> List[ItemOut]:
+    """Articles représentatifs: URL, description, attributs personnalisés, dates"""
+    now = datetime(2024, 11, 1, 12, 30, 15, 123456)
+    return [
+        ItemOut(
+            id=i,
+            wishlist_id=1,
+            name=f"Article {i} - Casque audio sans fil à réduction de bruit",
+            url=f"https://www.example.com/produit/{i}?ref=wishlist",
+            image_url=f"/api/media/remote?url=https%3A%2F%2Fcdn.example.com%2F{i}.jpg&w=320&s={i:032x}",
+            description="Autonomie 30 h, Bluetooth 5.3, coloris noir. " * 3,
+            price=round(19.99 + i * 1.5, 2),
+            category_id=i % 5 or None,
+            category_name=f"Catégorie {i % 5}" if i % 5 else None,
+            priority_id=i % 3 + 1,
+            priority_name="Haute",
+            priority_color="#ef4444",
+            status=("available", "reserved", "purchased")[i % 3],
+            custom_attributes={"taille": "M", "couleur": "noir", "quantité": i % 4 + 1},
+            sort_order=i,
+            reserved_by_name="Alice" if i % 3 == 1 else None,
+            reserved_at=now - timedelta(days=i % 30) if i % 3 == 1 else None,
+            purchased_at=now - timedelta(days=i % 10) if i % 3 == 2 else None,
+            created_at=now - timedelta(days=i),
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def fastapi_app(items: List[ItemOut]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/items/wishlist/{wishlist_id}", response_model=List[ItemOut])
+    async def list_items(wishlist_id: int):
+        return list(items)
+
+    return app
+
+
+def orjson_app(items: List[ItemOut]) -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.get("/api/items/wishlist/{wishlist_id}", response_model=List[ItemOut])
+    async def list_items(wishlist_id: int):
+        return list(items)
+
+    return app
+
+
+def model_response_app(items: List[ItemOut]) -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.get("/api/items/wishlist/{wishlist_id}", response_model=List[ItemOut])
+    async def list_items(wishlist_id: int):
+        return model_response(list(items), List[ItemOut], enabled=True)
+
+    return app
+
+
+MODES: Dict[str, Callable[[List[ItemOut]], FastAPI]] = {
+    "fastapi": fastapi_app,
+    "orjson": orjson_app,
+    "model_response": model_response_app,
+}
+
+
+def make_scope() -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/items/wishlist/1",
+        "raw_path": b"/api/items/wishlist/1",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost:8000"), (b"accept", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+
+
+async def request(app: FastAPI) -> bytes:
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(make_scope(), receive, send)
+    return b"".join(body)
+
+
+async def run(count: int, requests: int):
+    items = make_items(count)
+    bodies = {}
+    medians = {}
+    for name, factory in MODES.items():
+        app = factory(items)
+        bodies[name] = await request(app)
+        timings = []
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            await request(app)
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        medians[name] = statistics.median(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        speedup = medians["fastapi"] / medians[name]
+        print(f"{name:<15} médiane={medians[name]:7.2f} ms  p95={p95:7.2f} ms  "
+              f"x{speedup:4.1f}  ({len(bodies[name]) / 1024:.0f} Ko)")
+
+    reference = json.loads(bodies["fastapi"])
+    for name, body in bodies.items():
+        if json.loads(body) != reference:
+            print(f"  corps différent pour {name}", file=sys.stderr)
+            return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    print(f"{args.items} articles, {args.requests} requêtes par mode")
+    return asyncio.run(run(args.items, args.requests))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+"""
+Configuration gunicorn (plusieurs workers uvicorn):
+
+    PROMETHEUS_MULTIPROC_DIR=/tmp/wisherr-metrics gunicorn -c gunicorn.conf.py app.main:app
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+
+
+def on_starting(server):
+    # Valeurs d'une exécution précédente: repartir de zéro avant de lancer les workers
+    from app.core.metrics import clear_multiprocess_dir
+    clear_multiprocess_dir()
+
+
+def child_exit(server, worker):
+    from app.core.metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)
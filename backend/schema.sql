@@ -57,6 +57,7 @@ CREATE TABLE IF NOT EXISTS group_members (
 
 CREATE INDEX IF NOT EXISTS ix_group_members_group_id ON group_members(group_id);
 CREATE INDEX IF NOT EXISTS ix_group_members_user_id ON group_members(user_id);
+CREATE INDEX IF NOT EXISTS ix_group_members_user_group ON group_members(user_id, group_id);
 
 -- =====================================================
 -- LISTES DE SOUHAITS
@@ -119,6 +120,10 @@ CREATE TABLE IF NOT EXISTS wishlist_shares (
 );
 
 CREATE INDEX IF NOT EXISTS ix_wishlist_shares_wishlist_id ON wishlist_shares(wishlist_id);
+CREATE INDEX IF NOT EXISTS ix_wishlist_shares_target_user ON wishlist_shares(target_user_id, wishlist_id)
+    WHERE share_type = 'internal' AND is_active = TRUE;
+CREATE INDEX IF NOT EXISTS ix_wishlist_shares_target_group ON wishlist_shares(target_group_id, wishlist_id)
+    WHERE share_type = 'internal' AND is_active = TRUE;
 
 -- =====================================================
 -- CATÉGORIES ET PRIORITÉS
@@ -191,8 +196,26 @@ CREATE INDEX IF NOT EXISTS ix_reservations_item_id ON reservations(item_id);
 -- ACTIVITÉS (FEED)
 -- =====================================================
 
+-- Crée les partitions mensuelles de `tbl` couvrant [from_ts, to_ts]
+-- (les suivantes sont créées par le planificateur du backend)
+CREATE OR REPLACE FUNCTION wisherr_create_monthly_partitions(tbl TEXT, from_ts TIMESTAMP, to_ts TIMESTAMP)
+RETURNS VOID AS $$
+DECLARE
+    m DATE := date_trunc('month', from_ts)::date;
+BEGIN
+    WHILE m <= to_ts LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            tbl || '_p' || to_char(m, 'YYYYMM'), tbl, m, (m + INTERVAL '1 month')::date
+        );
+        m := (m + INTERVAL '1 month')::date;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitionnée par mois (la clé de partitionnement fait partie de la clé primaire)
 CREATE TABLE IF NOT EXISTS activities (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
     action_type VARCHAR(32) NOT NULL,
     target_type VARCHAR(32) NOT NULL,
@@ -201,10 +224,47 @@ CREATE TABLE IF NOT EXISTS activities (
     extra_data JSONB DEFAULT '{}',
     created_at TIMESTAMP NOT NULL DEFAULT NOW(),
     wishlist_id INTEGER REFERENCES wishlists(id) ON DELETE SET NULL,
-    is_public BOOLEAN NOT NULL DEFAULT FALSE
+    is_public BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE IF NOT EXISTS activities_default PARTITION OF activities DEFAULT;
+SELECT wisherr_create_monthly_partitions('activities', NOW()::timestamp, (NOW() + INTERVAL '2 months')::timestamp);
+
+CREATE INDEX IF NOT EXISTS ix_activities_created_at ON activities(created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_activities_user_created ON activities(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_activities_wishlist_created ON activities(wishlist_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_activities_action_created ON activities(action_type, created_at);
+CREATE INDEX IF NOT EXISTS ix_activities_target_created ON activities(target_type, target_id, created_at DESC);
+
+-- Agrégats journaliers (statistiques admin)
+CREATE TABLE IF NOT EXISTS activity_daily_stats (
+    day DATE NOT NULL,
+    action_type VARCHAR(32) NOT NULL,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    user_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, action_type)
+);
+
+CREATE TABLE IF NOT EXISTS activity_daily_users (
+    day DATE NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    PRIMARY KEY (day, user_id)
+);
+
+-- Timelines matérialisées (ACTIVITY_FEED_STRATEGY=write)
+CREATE TABLE IF NOT EXISTS user_timeline (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    activity_id INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, created_at, activity_id)
 );
 
-CREATE INDEX IF NOT EXISTS ix_activities_user_id ON activities(user_id);
+-- Timelines initialisées avec l'historique existant (rattrapage à la première lecture)
+CREATE TABLE IF NOT EXISTS user_timeline_backfill (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    backfilled_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
 
 -- =====================================================
 -- CONFIGURATION DU SITE (ADMIN)
@@ -259,13 +319,22 @@ CREATE INDEX IF NOT EXISTS ix_invitations_wishlist_id ON invitations(wishlist_id
 -- =====================================================
 
 CREATE TABLE IF NOT EXISTS audit_log (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
     action VARCHAR(64) NOT NULL,
     target_type VARCHAR(32) NOT NULL,
     target_id INTEGER,
-    created_at TIMESTAMP NOT NULL DEFAULT NOW()
-);
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE IF NOT EXISTS audit_log_default PARTITION OF audit_log DEFAULT;
+SELECT wisherr_create_monthly_partitions('audit_log', NOW()::timestamp, (NOW() + INTERVAL '2 months')::timestamp);
+
+CREATE INDEX IF NOT EXISTS ix_audit_log_created_at ON audit_log(created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_audit_log_user_created ON audit_log(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_audit_log_action_created ON audit_log(action, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_audit_log_target_created ON audit_log(target_type, target_id, created_at DESC);
 
 -- =====================================================
 -- NOTIFICATIONS
@@ -288,6 +357,70 @@ CREATE TABLE IF NOT EXISTS notifications (
 );
 
 CREATE INDEX IF NOT EXISTS ix_notifications_user_id ON notifications(user_id);
+CREATE INDEX IF NOT EXISTS ix_notifications_user_unread ON notifications(user_id) WHERE is_read = FALSE;
+CREATE INDEX IF NOT EXISTS ix_notifications_read_at ON notifications(read_at) WHERE is_read = TRUE;
+
+-- Archive des notifications lues, partitionnée par mois d'archivage
+-- (partitions notifications_archive_pYYYYMM gérées par le planificateur du backend)
+CREATE TABLE IF NOT EXISTS notifications_archive (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    type VARCHAR(32) NOT NULL,
+    title VARCHAR(256) NOT NULL,
+    message TEXT,
+    icon VARCHAR(32),
+    color VARCHAR(7),
+    link VARCHAR(512),
+    target_type VARCHAR(32),
+    target_id INTEGER,
+    is_read BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP NOT NULL,
+    read_at TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW()
+) PARTITION BY RANGE (archived_at);
+
+CREATE INDEX IF NOT EXISTS ix_notifications_archive_user_id ON notifications_archive(user_id);
+
+-- =====================================================
+-- CACHE DE SCRAPING (si Redis n'est pas configuré)
+-- =====================================================
+
+CREATE UNLOGGED TABLE IF NOT EXISTS scrape_cache (
+    url_key CHAR(64) PRIMARY KEY,
+    url VARCHAR(2048) NOT NULL,
+    data JSONB NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_scrape_cache_expires_at ON scrape_cache(expires_at);
+
+-- =====================================================
+-- SUIVI DES PRIX
+-- =====================================================
+
+-- État du suivi par article (validateurs HTTP, prochaine vérification)
+CREATE TABLE IF NOT EXISTS item_price_tracking (
+    item_id INTEGER PRIMARY KEY REFERENCES items(id) ON DELETE CASCADE,
+    url TEXT,
+    etag VARCHAR(256),
+    last_modified VARCHAR(64),
+    last_price NUMERIC(10,2),
+    currency CHAR(3),
+    last_checked_at TIMESTAMP,
+    next_check_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    failures SMALLINT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_item_price_tracking_next_check ON item_price_tracking(next_check_at);
+
+-- Historique: une ligne par changement de prix observé
+CREATE TABLE IF NOT EXISTS item_price_history (
+    item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    observed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    price NUMERIC(10,2) NOT NULL,
+    currency CHAR(3),
+    PRIMARY KEY (item_id, observed_at)
+);
 
 -- =====================================================
 -- DONNÉES INITIALES (optionnel)
@@ -7,6 +7,7 @@ from typing import AsyncGenerator
 from sqlmodel import SQLModel, create_engine
 from sqlmodel.pool import StaticPool
 from app.core.db import engine as production_engine
+from app.core.query_stats import instrument_engine
 
 
 # Override engine for tests with in-memory SQLite
@@ -19,6 +20,8 @@ def engine_fixture():
         poolclass=StaticPool,
     )
     SQLModel.metadata.create_all(engine)
+    # Budgets de requêtes vérifiables avec track_queries()
+    instrument_engine(engine)
     yield engine
     SQLModel.metadata.drop_all(engine)
 
@@ -0,0 +1,8 @@
+from app.activities.maintenance import parse_retention
+
+
+def test_parse_retention():
+    """Test du parsing de la rétention par type d'action"""
+    assert parse_retention("login_failed:30, user_login:90") == {"login_failed": 30, "user_login": 90}
+    assert parse_retention("") == {}
+    assert parse_retention("broken,user_logout:abc,item_added:0") == {}
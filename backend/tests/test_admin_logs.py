@@ -0,0 +1,32 @@
+import pytest
+from datetime import datetime
+from app.admin.utils import build_logs_query, encode_log_cursor, decode_log_cursor
+
+
+def test_log_cursor_roundtrip():
+    """Test de l'encodage du curseur de pagination des logs"""
+    ts = datetime(2026, 5, 4, 12, 30, 15, 120000)
+    cursor = encode_log_cursor(ts, "audit", 42)
+    assert decode_log_cursor(cursor) == (ts, "audit", 42)
+
+
+def test_log_cursor_invalid():
+    """Test d'un curseur invalide"""
+    with pytest.raises(ValueError):
+        decode_log_cursor("not-a-cursor")
+
+
+def test_build_logs_query_filters():
+    """Test des filtres du journal unifié"""
+    query, params = build_logs_query(51, source="audit", action="config_updated", user_id=3)
+    sql = str(query)
+    assert "FROM audit_log" in sql
+    assert "FROM activities" not in sql
+    assert "l.action = :action" in sql
+    assert params == {"limit": 51, "action": "config_updated", "user_id": 3}
+
+    query, params = build_logs_query(10, cursor=(datetime(2026, 1, 1), "activity", 7))
+    sql = str(query)
+    assert "UNION ALL" in sql
+    assert "l.action_type = :action" not in sql
+    assert params["cursor_id"] == 7
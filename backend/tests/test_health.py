@@ -0,0 +1,30 @@
+import asyncio
+import pytest
+from app.core import health
+
+
+@pytest.mark.asyncio
+async def test_run_checks_concurrent_with_timeout(monkeypatch):
+    """Test des sondes exécutées en parallèle avec délai maximum"""
+    async def slow_db():
+        await asyncio.sleep(5)
+
+    async def tcp(host, port):
+        if host == "down.example":
+            raise OSError("Connection refused")
+
+    monkeypatch.setattr(health, "HEALTH_CHECK_TIMEOUT", 0.1)
+    monkeypatch.setattr(health, "HEALTH_EXTERNAL_HOSTS", "up.example:443,down.example")
+    monkeypatch.setattr(health, "probe_db", slow_db)
+    monkeypatch.setattr(health, "probe_tcp", tcp)
+    monkeypatch.delenv("REDIS_HOST", raising=False)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    report = await health.run_checks()
+    assert loop.time() - start < 1
+    assert report["db"]["ok"] is False and "Délai" in report["db"]["error"]
+    assert report["cache"]["ok"] is None
+    assert [(c["host"], c["port"], c["ok"]) for c in report["external"]] == [("up.example", 443, True), ("down.example", 80, False)]
+    assert not health.is_ready(report)
+    assert not health.is_healthy(report)
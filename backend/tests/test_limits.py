@@ -0,0 +1,75 @@
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from app.core import cache, limits
+
+
+def test_parse_rate():
+    """Test de la lecture des limites de débit"""
+    assert limits.parse_rate("10/minute") == limits.Rate(10, 60)
+    assert limits.parse_rate("5 / 10 seconds") == limits.Rate(5, 10)
+    assert limits.parse_rate("") is None
+    with pytest.raises(ValueError):
+        limits.parse_rate("10 per minute")
+
+
+def test_rate_limit_dependency_without_redis(monkeypatch):
+    """Test de la limite locale (sans Redis): 429 avec Retry-After"""
+    monkeypatch.setattr(cache, "redis_client", None)
+    monkeypatch.setitem(limits.RATE_LIMITS, "auth", limits.Rate(2, 60))
+    monkeypatch.setattr(limits, "limiter", limits.RateLimiter())
+    app = FastAPI()
+
+    @app.get("/login", dependencies=[Depends(limits.rate_limit("auth"))])
+    def login():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/login").status_code == 200
+    assert client.get("/login").status_code == 200
+    response = client.get("/login")
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 30
+
+
+@pytest.mark.asyncio
+async def test_leases_avoid_redis_round_trips(monkeypatch):
+    """Test des jetons réservés par lot: moins d'appels Redis, limite globale respectée"""
+    remaining = {"tokens": 50}
+    requested = []
+
+    async def reserve(redis, rate, key, count, minimum=1):
+        requested.append(count)
+        granted = min(count, remaining["tokens"]) if remaining["tokens"] >= minimum else 0
+        remaining["tokens"] -= granted
+        return granted, (0 if granted else rate.emission)
+
+    limiter = limits.RateLimiter()
+    monkeypatch.setattr(cache, "redis_client", object())
+    monkeypatch.setattr(limiter, "_reserve", reserve)
+    rate = limits.Rate(100, 60)
+
+    results = [await limiter.hit(rate, "scrape:1.2.3.4") for _ in range(60)]
+    assert results[:50] == [0.0] * 50
+    assert all(r > 0 for r in results[50:])
+    assert max(requested) == rate.max_lease
+    assert len(requested) < 20
+
+
+def test_rate_limit_cost_per_url(monkeypatch):
+    """Test du décompte par URL: une requête coûteuse consomme plusieurs jetons, tous ou aucun"""
+    monkeypatch.setattr(cache, "redis_client", None)
+    monkeypatch.setitem(limits.RATE_LIMITS, "scrape_batch", limits.Rate(10, 60))
+    monkeypatch.setattr(limits, "limiter", limits.RateLimiter())
+    app = FastAPI()
+
+    @app.post("/batch")
+    async def batch(request: Request, urls: int):
+        await limits.enforce_rate_limit("scrape_batch", request, cost=urls)
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.post("/batch?urls=6").status_code == 200
+    assert client.post("/batch?urls=6").status_code == 429
+    assert client.post("/batch?urls=4").status_code == 200
+    assert client.post("/batch?urls=1").status_code == 429
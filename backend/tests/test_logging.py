@@ -0,0 +1,45 @@
+import json
+import logging
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.logging_setup import JsonFormatter, SamplingFilter, request_id_var
+from app.core.middleware import RequestMiddleware
+
+
+def make_record(name: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, "message %s", ("ok",), None)
+
+
+def test_sampling_filter_by_logger_prefix():
+    """Test de l'échantillonnage par logger (avertissements toujours conservés)"""
+    sampling = SamplingFilter({"sqlalchemy.engine": 0.0, "app": 1.0})
+    assert not sampling.filter(make_record("sqlalchemy.engine.Engine"))
+    assert sampling.filter(make_record("sqlalchemy.engine.Engine", logging.WARNING))
+    assert sampling.filter(make_record("sqlalchemy.pool"))
+    assert sampling.filter(make_record("app.scrape.engine"))
+
+
+def test_request_id_propagated_to_logs_and_response():
+    """Test de l'identifiant de requête (en-tête de réponse et logs)"""
+    app = FastAPI()
+    seen = []
+
+    @app.get("/ping")
+    async def ping():
+        seen.append(request_id_var.get())
+        return {"ok": True}
+
+    app.add_middleware(RequestMiddleware)
+    client = TestClient(app)
+
+    response = client.get("/ping", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["x-request-id"] == "abc-123" == seen[-1]
+    generated = client.get("/ping", headers={"X-Request-ID": "bad id\n"}).headers["x-request-id"]
+    assert generated != "bad id\n" and len(generated) == 32
+
+    record = make_record("app")
+    record.request_id = "abc-123"
+    record.extra = {"route": "/ping"}
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "message ok"
+    assert payload["request_id"] == "abc-123" and payload["route"] == "/ping"
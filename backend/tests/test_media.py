@@ -0,0 +1,106 @@
+import io
+import os
+import asyncio
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+from app.media import remote, storage
+from app.media.uploads import MultipartFileReader
+from app.media.remote import (
+    RemoteImageError, check_public_url, ingest_remote_image, is_public_address, original_image_url,
+    pinned_url, proxied_image_url, verify_signature,
+)
+
+
+def test_proxied_image_url_roundtrip():
+    """Test de la réécriture signée des URLs d'images distantes"""
+    url = "https://shop.example.com/img/produit.jpg?size=large"
+    proxied = proxied_image_url(url)
+    assert proxied.startswith("/api/media/remote?")
+    assert original_image_url(proxied) == url
+    assert not verify_signature(url, "0" * 32)
+    assert proxied_image_url(None) is None
+    assert proxied_image_url("/static/local.png") == "/static/local.png"
+
+
+@pytest.mark.asyncio
+async def test_remote_images_reject_private_hosts():
+    """Test du refus des hôtes non publics par le proxy d'images (SSRF)"""
+    for url in ("http://localhost/a.png", "http://127.0.0.1:8000/a.png", "http://[::1]/a.png",
+                "http://169.254.169.254/latest/meta-data", "http://10.0.0.5/a.jpg",
+                "http://[::ffff:192.168.1.1]/a.jpg", "file:///etc/passwd"):
+        with pytest.raises(RemoteImageError):
+            await check_public_url(url)
+    assert is_public_address("93.184.216.34")
+    assert not is_public_address("100.64.0.1")
+    # La connexion vise l'adresse vérifiée, pas une nouvelle résolution
+    assert await check_public_url("https://93.184.216.34/a.png") == "93.184.216.34"
+    assert pinned_url("https://shop.example.com:8443/a.jpg?x=1", "93.184.216.34") == "https://93.184.216.34:8443/a.jpg?x=1"
+    assert pinned_url("http://shop.example.com/a.jpg", "2606:2800:220:1::1") == "http://[2606:2800:220:1::1]/a.jpg"
+
+
+@pytest.mark.asyncio
+async def test_remote_image_survives_first_caller_cancellation(tmp_path, monkeypatch):
+    """Test du téléchargement partagé: l'annulation du premier appelant n'affecte pas les autres"""
+    monkeypatch.setattr(remote, "MEDIA_DIR", str(tmp_path))
+    release = asyncio.Event()
+    calls = []
+
+    async def fake_download(url):
+        calls.append(url)
+        await release.wait()
+        return "abc123"
+
+    monkeypatch.setattr(remote, "download_image", fake_download)
+    first = asyncio.create_task(ingest_remote_image("https://shop.example.com/a.jpg"))
+    second = asyncio.create_task(ingest_remote_image("https://shop.example.com/a.jpg"))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    await asyncio.sleep(0.01)
+    release.set()
+    assert await second == "abc123"
+    assert first.cancelled()
+    assert len(calls) == 1
+
+
+def test_generate_thumbnails_and_select_variant(tmp_path, monkeypatch):
+    """Test de la génération des miniatures et du choix de la variante servie"""
+    monkeypatch.setattr(storage, "MEDIA_DIR", str(tmp_path))
+    buffer = io.BytesIO()
+    Image.new("RGB", (1200, 800), "red").save(buffer, format="JPEG")
+    content = buffer.getvalue()
+    digest = storage.content_digest(content)
+    directory = storage.digest_dir(digest)
+    storage.write_atomic(os.path.join(directory, "source"), content)
+
+    names = storage.generate_thumbnails(os.path.join(directory, "source"), directory)
+    assert "640.webp" in names
+    assert storage.thumbnails_ready(digest)
+
+    path, media_type = storage.select_variant(digest, 200, "image/webp,*/*")
+    assert path.endswith("320.webp") and media_type == "image/webp"
+    with Image.open(path) as thumb:
+        assert thumb.width == 320
+
+
+def test_multipart_file_reader_streams_file_part():
+    """Test de l'extraction en flux de la partie `file` d'un corps multipart"""
+    content = os.urandom(300_000)
+    body = (
+        b"--xyz\r\nContent-Disposition: form-data; name=\"title\"\r\n\r\nCouverture\r\n"
+        b"--xyz\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.png\"\r\n"
+        b"Content-Type: image/png\r\n\r\n" + content + b"\r\n--xyz--\r\n"
+    )
+    reader = MultipartFileReader(b"xyz")
+    received = bytearray()
+    for start in range(0, len(body), 4096):
+        reader.write(body[start:start + 4096])
+        received += reader.take()
+    reader.finalize()
+    assert reader.found and bytes(received) == content
+    assert reader.hasher.hexdigest() == storage.content_digest(content)
+
+    small = MultipartFileReader(b"xyz", max_bytes=1000)
+    with pytest.raises(HTTPException) as exc:
+        small.write(body)
+    assert exc.value.status_code == 413
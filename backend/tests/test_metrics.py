@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from app.core import metrics
+from app.core.metrics import REGISTRY, UNMATCHED_PATH
+from app.core.middleware import RequestMiddleware
+
+
+def test_prometheus_middleware_labels_route_template():
+    """Test des métriques HTTP étiquetées par modèle de route"""
+    app = FastAPI()
+    router = APIRouter(prefix="/things")
+
+    @router.get("/{thing_id}")
+    async def get_thing(thing_id: int):
+        return {"id": thing_id}
+
+    app.include_router(router, prefix="/api")
+    app.add_middleware(RequestMiddleware)
+    client = TestClient(app)
+
+    for thing_id in (1, 2, 3):
+        assert client.get(f"/api/things/{thing_id}").status_code == 200
+    assert client.get("/api/unknown/42").status_code == 404
+
+    labels = {"method": "GET", "path": "/api/things/{thing_id}", "status": "200"}
+    assert REGISTRY.get_sample_value("http_requests_total", labels) == 3
+    assert REGISTRY.get_sample_value("http_requests_total", {**labels, "path": "/api/things/1"}) is None
+    assert REGISTRY.get_sample_value("http_requests_total", {"method": "GET", "path": UNMATCHED_PATH, "status": "404"}) == 1
+
+
+def test_generate_metrics_aggregates_workers(tmp_path, monkeypatch):
+    """Test de l'agrégation des métriques de plusieurs workers (mode multiprocessus)"""
+    worker = (
+        "import sys; from app.core.metrics import REQUEST_COUNT; "
+        "REQUEST_COUNT.labels(method='GET', path='/api/x', status='200').inc(int(sys.argv[1]))"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for count in ("2", "5"):
+        subprocess.run([sys.executable, "-c", worker, count], env=env, cwd=backend_dir, check=True)
+
+    monkeypatch.setattr(metrics, "PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    exposition = metrics.generate_metrics().decode()
+    assert 'http_requests_total{method="GET",path="/api/x",status="200"} 7.0' in exposition
+
+    metrics.clear_multiprocess_dir()
+    assert not list(tmp_path.glob("*.db"))
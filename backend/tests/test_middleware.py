@@ -0,0 +1,103 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core import cache, limits
+from app.core.metrics import REGISTRY
+from app.core.middleware import PREFLIGHT_PATH, RequestMiddleware
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    calls = []
+
+    @app.get("/api/ping")
+    async def ping():
+        calls.append(1)
+        return {"ok": True}
+
+    @app.get("/api/health/live")
+    async def live():
+        return {"status": "ok"}
+
+    app.add_middleware(
+        RequestMiddleware,
+        allow_origins=["http://localhost:3000"],
+        expose_headers=["X-Request-ID"],
+    )
+    client = TestClient(app)
+    client.calls = calls
+    return client
+
+
+def test_cors_preflight_short_circuit():
+    """Test des pré-requêtes CORS traitées sans traverser l'application"""
+    client = make_client()
+    before = REGISTRY.get_sample_value("http_requests_total", {"method": "OPTIONS", "path": PREFLIGHT_PATH, "status": "200"}) or 0
+    response = client.options("/api/ping", headers={
+        "Origin": "http://localhost:3000",
+        "Access-Control-Request-Method": "POST",
+        "Access-Control-Request-Headers": "authorization, content-type",
+    })
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert response.headers["access-control-allow-headers"] == "authorization, content-type"
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert "x-request-id" in response.headers
+    assert REGISTRY.get_sample_value("http_requests_total", {"method": "OPTIONS", "path": PREFLIGHT_PATH, "status": "200"}) == before + 1
+
+    denied = client.options("/api/ping", headers={"Origin": "http://evil.example", "Access-Control-Request-Method": "GET"})
+    assert denied.status_code == 400
+    assert "access-control-allow-origin" not in denied.headers
+
+    response = client.get("/api/ping", headers={"Origin": "http://localhost:3000"})
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert response.headers["access-control-expose-headers"] == "X-Request-ID"
+    assert response.headers["vary"] == "Origin"
+    assert "access-control-allow-origin" not in client.get("/api/ping", headers={"Origin": "http://evil.example"}).headers
+
+
+def test_default_rate_limit(monkeypatch):
+    """Test de la limite globale: 429 sans appeler la route, sondes exclues"""
+    monkeypatch.setattr(cache, "redis_client", None)
+    monkeypatch.setitem(limits.RATE_LIMITS, "default", limits.Rate(2, 60))
+    monkeypatch.setattr(limits, "limiter", limits.RateLimiter())
+    client = make_client()
+
+    assert [client.get("/api/ping").status_code for _ in range(3)] == [200, 200, 429]
+    response = client.get("/api/ping")
+    assert response.headers["retry-after"] and response.json()["status_code"] == 429
+    assert len(client.calls) == 2
+    assert client.get("/api/health/live").status_code == 200
+
+
+def test_preflight_allow_headers_list():
+    """Test de la liste d'en-têtes autorisés dans les pré-requêtes CORS"""
+    app = FastAPI()
+    app.add_middleware(
+        RequestMiddleware,
+        allow_origins=["http://localhost:3000"],
+        allow_headers=["Authorization", "X-Request-ID"],
+    )
+    client = TestClient(app)
+    preflight = {"Origin": "http://localhost:3000", "Access-Control-Request-Method": "POST"}
+
+    response = client.options("/api/ping", headers={**preflight, "Access-Control-Request-Headers": "authorization, content-type"})
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-headers"] == (
+        "accept, accept-language, authorization, content-language, content-type, x-request-id"
+    )
+    denied = client.options("/api/ping", headers={**preflight, "Access-Control-Request-Headers": "x-custom"})
+    assert denied.status_code == 400
+
+
+def test_rate_limit_client_behind_trusted_proxy(monkeypatch):
+    """Test de l'adresse du client derrière un proxy de confiance (X-Forwarded-For)"""
+    monkeypatch.setattr(limits, "TRUSTED_NETWORKS", limits.parse_networks("10.0.0.0/8"))
+    limits.is_trusted_proxy.cache_clear()
+    try:
+        assert limits.resolve_client_address("10.0.0.2", "203.0.113.7, 10.0.0.9") == "203.0.113.7"
+        # En-tête falsifié par le client: seule l'entrée ajoutée par le proxy compte
+        assert limits.resolve_client_address("10.0.0.2", "1.2.3.4, 198.51.100.1") == "198.51.100.1"
+        assert limits.resolve_client_address("198.51.100.1", "203.0.113.7") == "198.51.100.1"
+        assert limits.resolve_client_address(None) == "unknown"
+    finally:
+        limits.is_trusted_proxy.cache_clear()
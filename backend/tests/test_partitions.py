@@ -0,0 +1,18 @@
+from datetime import date, datetime
+from app.core.partitions import add_months, month_start, partition_name, partition_month
+
+
+def test_month_arithmetic():
+    """Test du calcul des bornes de partitions mensuelles"""
+    assert month_start(datetime(2026, 3, 17, 12, 30)) == date(2026, 3, 1)
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_partition_name_roundtrip():
+    """Test du nommage des partitions"""
+    name = partition_name("activities", date(2026, 2, 1))
+    assert name == "activities_p202602"
+    assert partition_month("activities", name) == date(2026, 2, 1)
+    assert partition_month("audit_log", name) is None
+    assert partition_month("activities", "activities_default") is None
@@ -0,0 +1,31 @@
+import asyncio
+import pytest
+from datetime import date, timedelta
+from app.items.price_tracking import DomainThrottle, is_price_drop, next_check_delay
+
+
+def test_next_check_delay_prioritizes_event():
+    """Test de la fréquence de vérification selon la date d'événement"""
+    today = date(2024, 12, 1)
+    assert next_check_delay(date(2024, 12, 10), today) < next_check_delay(date(2025, 6, 1), today)
+    assert next_check_delay(None, today) == next_check_delay(date(2025, 6, 1), today)
+    assert next_check_delay(None, today, failures=2) == next_check_delay(None, today) * 4
+    assert next_check_delay(None, today, failures=10) == timedelta(days=7)
+
+
+def test_is_price_drop():
+    """Test de la détection d'une baisse de prix"""
+    assert is_price_drop(100.0, 80.0)
+    assert not is_price_drop(100.0, 99.5)
+    assert not is_price_drop(None, 80.0)
+    assert not is_price_drop(80.0, None)
+
+
+@pytest.mark.asyncio
+async def test_domain_throttle_spaces_requests():
+    """Test de l'espacement des requêtes vers un même domaine"""
+    throttle = DomainThrottle(0.05)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.gather(*(throttle.wait("example.com") for _ in range(3)), throttle.wait("other.com"))
+    assert loop.time() - start >= 0.1
@@ -0,0 +1,22 @@
+from sqlalchemy import create_engine, text
+from app.core.query_stats import instrument_engine, normalize_sql, track_queries
+
+
+def test_normalize_sql():
+    """Test de la normalisation du SQL journalisé"""
+    sql = "SELECT *  FROM items\n WHERE id IN (%(id_1)s, %(id_2)s) AND name = 'l''ours' AND price > 12.5"
+    assert normalize_sql(sql) == "SELECT * FROM items WHERE id IN (...) AND name = ? AND price > ?"
+
+
+def test_track_queries_counts_statements():
+    """Test du comptage des requêtes SQL (budget par endpoint)"""
+    engine = create_engine("sqlite:///:memory:")
+    instrument_engine(engine)
+    with engine.connect() as conn:
+        with track_queries() as stats:
+            for value in range(3):
+                conn.execute(text("SELECT :v"), {"v": value})
+        conn.execute(text("SELECT 1"))
+    assert stats.count == 3
+    assert stats.total_time >= stats.slowest_time > 0
+    assert stats.slowest_statement == "SELECT ?"
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import List
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.activities.routes import ActivityResponse
+from app.core.responses import model_response
+
+
+def test_model_response_matches_fastapi_rendering():
+    """Test du rendu rapide: même JSON que la sérialisation FastAPI habituelle"""
+    activities = [
+        ActivityResponse(
+            id=i, user_id=1, username="alice", action_type="item_added", action_label="Article ajouté",
+            target_type="item", target_id=i, target_name=f"Livre « {i} »", wishlist_id=None,
+            created_at=datetime(2024, 12, 24, 18, 0, i, 250000), icon="plus-circle", color="green",
+        )
+        for i in range(3)
+    ]
+    app = FastAPI()
+
+    @app.get("/default", response_model=List[ActivityResponse])
+    def default():
+        return activities
+
+    @app.get("/fast", response_model=List[ActivityResponse])
+    def fast():
+        return model_response(activities, List[ActivityResponse], enabled=True)
+
+    client = TestClient(app)
+    fast_response = client.get("/fast")
+    assert fast_response.headers["content-type"] == "application/json"
+    assert fast_response.json() == client.get("/default").json()
+    assert model_response(activities, List[ActivityResponse], enabled=False) is activities
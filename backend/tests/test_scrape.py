@@ -0,0 +1,149 @@
+import asyncio
+import pytest
+from app.core.http import HostLimiter, metric_host, registrable_domain
+import app.scrape.extractors  # noqa: F401  (enregistre les sites connus)
+
+
+def test_registrable_domain():
+    """Test du domaine utilisé pour espacer les requêtes vers un même site"""
+    assert registrable_domain("https://www.amazon.fr/dp/B0TEST") == "amazon.fr"
+    assert registrable_domain("https://www.amazon.co.uk/dp/B0TEST") == "amazon.co.uk"
+    assert registrable_domain("https://fnac.com/a123") == "fnac.com"
+
+
+def test_metric_host_is_bounded():
+    """Test du label d'hôte des métriques de scraping: sites connus, sinon "other" """
+    assert metric_host("https://www.amazon.co.uk/dp/B0TEST") == "amazon"
+    assert metric_host("https://www.bol.com/nl/p/123") == "bol.com"
+    assert metric_host("https://shop.example.org/produit") == "other"
+
+
+@pytest.mark.asyncio
+async def test_host_limiter_caps_concurrency():
+    """Test de la limite de requêtes simultanées par hôte"""
+    limiter = HostLimiter(2)
+    running = 0
+    peak = 0
+
+    async def job():
+        nonlocal running, peak
+        async with limiter.acquire("example.com"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(job() for _ in range(6)))
+    assert peak == 2
+    assert limiter._slots == {}
+
+
+def test_canonicalize_url_strips_tracking():
+    """Test de la canonicalisation des URLs pour le cache"""
+    from app.scrape.cache import canonicalize_url
+    assert canonicalize_url("HTTPS://WWW.Fnac.com/a123/?utm_source=x&b=2&a=1#avis") == "https://www.fnac.com/a123?a=1&b=2"
+    assert canonicalize_url("https://shop.example.com:443/p?gclid=abc") == "https://shop.example.com/p"
+    # Noms génériques conservés hors des sites où ils ne servent qu'au suivi
+    assert canonicalize_url("https://shop.example.com/p?ref=42&tag=xl") == "https://shop.example.com/p?ref=42&tag=xl"
+    assert canonicalize_url("https://www.amazon.fr/s?k=lampe&ref=nb_sb_noss&tag=aff-21") == "https://www.amazon.fr/s?k=lampe"
+
+
+def test_canonicalize_url_amazon_asin():
+    """Test de la normalisation des URLs produit Amazon"""
+    from app.scrape.cache import canonicalize_url
+    expected = "https://www.amazon.fr/dp/B08N5WRWNW"
+    assert canonicalize_url("https://www.amazon.fr/Echo-Dot/dp/B08N5WRWNW/ref=sr_1_1?keywords=echo&qid=1") == expected
+    assert canonicalize_url("https://www.amazon.fr/gp/product/b08n5wrwnw?psc=1") == expected
+
+
+def test_extract_product_merges_sources():
+    """Test de la fusion JSON-LD / Open Graph par le moteur d'extraction"""
+    from app.scrape.engine import extract_product
+    from app.scrape.parser import available_backends
+    html = """<html><head><title>Titre page</title>
+    <meta property="og:image" content="/img/p.jpg">
+    <script type="application/ld+json">{"@graph": [{"@type": "Product", "name": "Lampe",
+      "brand": "Acme", "offers": {"price": "24.90", "availability": "https://schema.org/InStock"}}]}</script>
+    </head><body></body></html>"""
+    for backend in available_backends():
+        data = extract_product(html, "https://www.bol.com/fr/p/lampe/123/", parser=backend)
+        assert data["title"] == "Lampe"
+        assert data["price"] == 24.9
+        assert data["brand"] == "Acme"
+        assert data["image_url"] == "https://www.bol.com/img/p.jpg"
+        assert data["availability"] == "En stock"
+
+
+def test_get_extractor_by_host():
+    """Test de la sélection de l'extracteur par site"""
+    from app.scrape.extractors import get_extractor, extract_amazon, extract_vinted, extract_generic
+    assert get_extractor("https://www.amazon.fr/dp/B08N5WRWNW") is extract_amazon
+    assert get_extractor("https://www.vinted.fr/items/1") is extract_vinted
+    assert get_extractor("https://example.com/amazon.fr") is extract_generic
+
+
+@pytest.mark.asyncio
+async def test_process_pool_timeout_recycles():
+    """Test du délai maximum par tâche du pool de processus"""
+    import time
+    from app.core.process_pool import ProcessPool
+    pool = ProcessPool("test", 1, 0.5)
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(time.sleep, 5)
+        assert await pool.run(pow, 2, 10) == 1024
+    finally:
+        pool.shutdown()
+
+
+def test_metadata_probe_stops_after_head():
+    """Test de l'arrêt anticipé une fois titre, image et prix reçus dans le <head>"""
+    from app.scrape.stream import MetadataProbe, GENERIC_MARKERS
+    probe = MetadataProbe(GENERIC_MARKERS)
+    assert not probe.feed(b'<html><head><title>Lampe</title><meta property="og:image" content="/p.jpg">')
+    assert not probe.feed(b'<meta property="product:price:amount" content="24.90">')
+    assert probe.feed(b'</head><body>')
+
+
+def test_detect_html_encoding():
+    """Test de la détection du charset (en-tête, meta, repli windows-1252)"""
+    from app.scrape.stream import detect_html_encoding
+    assert detect_html_encoding(b"<html>", "ISO-8859-1") == "cp1252"
+    assert detect_html_encoding(b'<meta charset="shift_jis"><p>') == "shift_jis"
+    assert detect_html_encoding("Théière".encode("latin-1")) == "cp1252"
+    assert detect_html_encoding("Théière".encode()[:-1] + "é".encode()[:1]) == "utf-8"
+
+
+@pytest.mark.asyncio
+async def test_cached_scrape_survives_leader_cancellation(monkeypatch):
+    """Test du regroupement des scrapes: l'annulation du premier appelant n'atteint pas les autres"""
+    from app.scrape import cache as scrape_cache
+
+    async def no_cache(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(scrape_cache, "get_cached_result", no_cache)
+    monkeypatch.setattr(scrape_cache, "set_cached_result", no_cache)
+    release = asyncio.Event()
+    fetched = []
+
+    async def scrape(url):
+        fetched.append(url)
+        await release.wait()
+        return {"success": True, "title": "Lampe"}
+
+    url = "https://www.fnac.com/a123?utm_source=x"
+    key = scrape_cache.canonicalize_url(url)
+    leader = asyncio.create_task(scrape_cache.cached_scrape(key, url, scrape))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(scrape_cache.cached_scrape(key, url, scrape)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    release.set()
+    assert await asyncio.gather(*waiters) == [{"success": True, "title": "Lampe"}] * 2
+    # URL d'origine récupérée une seule fois, la forme canonique ne sert que de clé
+    assert fetched == [url]
+    assert key not in scrape_cache._inflight
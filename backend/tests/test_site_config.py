@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from app.core import site_config
+from app.core.utils import get_site_config_bool
+
+
+@pytest.mark.asyncio
+async def test_config_loaded_once_and_updated_locally(monkeypatch):
+    """Test de la configuration chargée une seule fois puis lue en mémoire"""
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"site_title": "Ma liste", "enable_local_auth": "false"}
+
+    monkeypatch.setattr(site_config, "fetch_site_config", fetch)
+    monkeypatch.setattr(site_config, "_snapshot", None)
+
+    titles = await asyncio.gather(*(site_config.get_config("site_title") for _ in range(5)))
+    assert titles == ["Ma liste"] * 5
+    assert await site_config.get_config("locale", "fr") == "fr"
+    assert await site_config.get_config_bool("enable_local_auth", True) is False
+    assert get_site_config_bool("enable_local_auth", True) is False
+    assert len(calls) == 1
+
+    site_config.apply_updates({"enable_local_auth": "true"})
+    assert await site_config.get_config_bool("enable_local_auth") is True
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_config_default_when_db_unavailable(monkeypatch):
+    """Test de la valeur par défaut quand la base est injoignable"""
+    async def fetch():
+        raise OSError("Connection refused")
+
+    monkeypatch.setattr(site_config, "fetch_site_config", fetch)
+    monkeypatch.setattr(site_config, "_snapshot", None)
+
+    assert await site_config.get_config("wisherr_url", "http://localhost:8080") == "http://localhost:8080"
+    assert not site_config.is_loaded()
@@ -0,0 +1,27 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.tracing import setup_tracing, shutdown_tracing
+
+
+def test_setup_tracing_exports_route_spans():
+    """Test de l'export des spans des routes (exportateur en mémoire)"""
+    pytest.importorskip("opentelemetry.instrumentation.fastapi")
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    app = FastAPI()
+
+    @app.get("/api/things/{thing_id}")
+    async def get_thing(thing_id: int):
+        return {"id": thing_id}
+
+    exporter = InMemorySpanExporter()
+    assert setup_tracing(app, exporter=exporter)
+    try:
+        TestClient(app).get("/api/things/1")
+        TestClient(app).get("/api/health")
+        names = [span.name for span in exporter.get_finished_spans()]
+        assert "GET /api/things/{thing_id}" in names
+        assert not any("health" in name for name in names)
+    finally:
+        shutdown_tracing()
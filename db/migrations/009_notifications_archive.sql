@@ -0,0 +1,30 @@
+-- Migration 009: Archivage des notifications lues
+-- Les notifications lues depuis plus de NOTIFICATIONS_ARCHIVE_AFTER_DAYS jours sont déplacées
+-- par le planificateur du backend vers une table partitionnée par mois d'archivage.
+-- Les partitions mensuelles (notifications_archive_pYYYYMM) sont créées et supprimées par le job.
+
+-- Index partiels pour les opérations en masse
+CREATE INDEX IF NOT EXISTS ix_notifications_user_unread ON notifications(user_id) WHERE is_read = FALSE;
+CREATE INDEX IF NOT EXISTS ix_notifications_read_at ON notifications(read_at) WHERE is_read = TRUE;
+
+-- Table d'archive partitionnée
+CREATE TABLE IF NOT EXISTS notifications_archive (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    type VARCHAR(32) NOT NULL,
+    title VARCHAR(256) NOT NULL,
+    message TEXT,
+    icon VARCHAR(32),
+    color VARCHAR(7),
+    link VARCHAR(512),
+    target_type VARCHAR(32),
+    target_id INTEGER,
+    is_read BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP NOT NULL,
+    read_at TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW()
+) PARTITION BY RANGE (archived_at);
+
+CREATE INDEX IF NOT EXISTS ix_notifications_archive_user_id ON notifications_archive(user_id);
+
+COMMENT ON TABLE notifications_archive IS 'Notifications lues archivées, partitionnées par mois d''archivage';
@@ -0,0 +1,136 @@
+-- Migration 010: Partitionnement mensuel de activities et audit_log + agrégats journaliers
+-- Les partitions suivantes (<table>_pYYYYMM) sont créées et supprimées par le planificateur du backend
+-- (ACTIVITY_RETENTION_MONTHS, AUDIT_LOG_RETENTION_MONTHS, ACTIVITY_RETENTION_DAYS).
+
+BEGIN;
+
+-- Crée les partitions mensuelles de `tbl` couvrant [from_ts, to_ts]
+CREATE OR REPLACE FUNCTION wisherr_create_monthly_partitions(tbl TEXT, from_ts TIMESTAMP, to_ts TIMESTAMP)
+RETURNS VOID AS $$
+DECLARE
+    m DATE := date_trunc('month', from_ts)::date;
+BEGIN
+    WHILE m <= to_ts LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            tbl || '_p' || to_char(m, 'YYYYMM'), tbl, m, (m + INTERVAL '1 month')::date
+        );
+        m := (m + INTERVAL '1 month')::date;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ---------------------------------------------------------------------
+-- ACTIVITIES
+-- ---------------------------------------------------------------------
+
+ALTER TABLE activities RENAME TO activities_legacy;
+ALTER TABLE activities_legacy RENAME CONSTRAINT activities_pkey TO activities_legacy_pkey;
+ALTER INDEX IF EXISTS ix_activities_user_id RENAME TO ix_activities_legacy_user_id;
+ALTER SEQUENCE activities_id_seq OWNED BY NONE;
+
+-- La clé de partitionnement doit faire partie de la clé primaire
+CREATE TABLE activities (
+    id INTEGER NOT NULL DEFAULT nextval('activities_id_seq'),
+    user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    action_type VARCHAR(32) NOT NULL,
+    target_type VARCHAR(32) NOT NULL,
+    target_id INTEGER,
+    target_name VARCHAR(256),
+    extra_data JSONB DEFAULT '{}',
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    wishlist_id INTEGER REFERENCES wishlists(id) ON DELETE SET NULL,
+    is_public BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE activities_id_seq OWNED BY activities.id;
+CREATE TABLE activities_default PARTITION OF activities DEFAULT;
+
+SELECT wisherr_create_monthly_partitions(
+    'activities',
+    COALESCE((SELECT MIN(created_at) FROM activities_legacy), NOW()::timestamp),
+    (NOW() + INTERVAL '2 months')::timestamp
+);
+
+INSERT INTO activities (id, user_id, action_type, target_type, target_id, target_name, extra_data, created_at, wishlist_id, is_public)
+SELECT id, user_id, action_type, target_type, target_id, target_name, extra_data, created_at, wishlist_id, is_public
+FROM activities_legacy;
+
+DROP TABLE activities_legacy;
+
+CREATE INDEX IF NOT EXISTS ix_activities_created_at ON activities(created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_activities_user_created ON activities(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_activities_wishlist_created ON activities(wishlist_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_activities_action_created ON activities(action_type, created_at);
+
+-- ---------------------------------------------------------------------
+-- AUDIT LOG
+-- ---------------------------------------------------------------------
+
+ALTER TABLE audit_log RENAME TO audit_log_legacy;
+ALTER TABLE audit_log_legacy RENAME CONSTRAINT audit_log_pkey TO audit_log_legacy_pkey;
+ALTER SEQUENCE audit_log_id_seq OWNED BY NONE;
+
+CREATE TABLE audit_log (
+    id INTEGER NOT NULL DEFAULT nextval('audit_log_id_seq'),
+    user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    action VARCHAR(64) NOT NULL,
+    target_type VARCHAR(32) NOT NULL,
+    target_id INTEGER,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id;
+CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT;
+
+SELECT wisherr_create_monthly_partitions(
+    'audit_log',
+    COALESCE((SELECT MIN(created_at) FROM audit_log_legacy), NOW()::timestamp),
+    (NOW() + INTERVAL '2 months')::timestamp
+);
+
+INSERT INTO audit_log (id, user_id, action, target_type, target_id, created_at)
+SELECT id, user_id, action, target_type, target_id, created_at
+FROM audit_log_legacy;
+
+DROP TABLE audit_log_legacy;
+
+CREATE INDEX IF NOT EXISTS ix_audit_log_created_at ON audit_log(created_at DESC);
+
+-- ---------------------------------------------------------------------
+-- AGRÉGATS JOURNALIERS (statistiques admin)
+-- ---------------------------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS activity_daily_stats (
+    day DATE NOT NULL,
+    action_type VARCHAR(32) NOT NULL,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    user_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, action_type)
+);
+
+CREATE TABLE IF NOT EXISTS activity_daily_users (
+    day DATE NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    PRIMARY KEY (day, user_id)
+);
+
+-- Reconstruction de l'historique
+INSERT INTO activity_daily_stats (day, action_type, event_count, user_count)
+SELECT created_at::date, action_type, COUNT(*), COUNT(DISTINCT user_id)
+FROM activities
+GROUP BY created_at::date, action_type
+ON CONFLICT (day, action_type) DO NOTHING;
+
+INSERT INTO activity_daily_users (day, user_id)
+SELECT DISTINCT created_at::date, user_id
+FROM activities
+WHERE user_id IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+COMMENT ON TABLE activity_daily_stats IS 'Nombre d''événements et d''utilisateurs distincts par jour et type d''action';
+COMMENT ON TABLE activity_daily_users IS 'Utilisateurs actifs par jour (utilisateurs actifs sur N jours sans parcourir activities)';
+
+COMMIT;
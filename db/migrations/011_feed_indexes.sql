@@ -0,0 +1,8 @@
+-- Migration 011: Index pour le feed d'activités en une requête
+-- Résolution des listes partagées avec un utilisateur (directement ou via un groupe)
+
+CREATE INDEX IF NOT EXISTS ix_wishlist_shares_target_user ON wishlist_shares(target_user_id, wishlist_id)
+    WHERE share_type = 'internal' AND is_active = TRUE;
+CREATE INDEX IF NOT EXISTS ix_wishlist_shares_target_group ON wishlist_shares(target_group_id, wishlist_id)
+    WHERE share_type = 'internal' AND is_active = TRUE;
+CREATE INDEX IF NOT EXISTS ix_group_members_user_group ON group_members(user_id, group_id);
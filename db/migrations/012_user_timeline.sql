@@ -0,0 +1,12 @@
+-- Migration 012: Timelines d'activités matérialisées (ACTIVITY_FEED_STRATEGY=write)
+-- Alimentée à l'insertion de chaque activité, tronquée par le planificateur
+-- à ACTIVITY_TIMELINE_MAX_LENGTH entrées par utilisateur.
+
+CREATE TABLE IF NOT EXISTS user_timeline (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    activity_id INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, created_at, activity_id)
+);
+
+COMMENT ON TABLE user_timeline IS 'Feed précalculé par utilisateur (fan-out à l''écriture)';
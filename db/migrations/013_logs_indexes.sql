@@ -0,0 +1,8 @@
+-- Migration 013: Index pour le journal admin unifié (/admin/logs)
+-- Filtres par utilisateur, action et cible, triés par date
+
+CREATE INDEX IF NOT EXISTS ix_activities_target_created ON activities(target_type, target_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS ix_audit_log_user_created ON audit_log(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_audit_log_action_created ON audit_log(action, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_audit_log_target_created ON audit_log(target_type, target_id, created_at DESC);
@@ -0,0 +1,11 @@
+-- Migration 014: Cache des résultats de scraping (utilisé quand Redis n'est pas configuré)
+-- url_key = sha256 de l'URL canonique (paramètres de suivi retirés, ASIN pour Amazon)
+
+CREATE UNLOGGED TABLE IF NOT EXISTS scrape_cache (
+    url_key CHAR(64) PRIMARY KEY,
+    url VARCHAR(2048) NOT NULL,
+    data JSONB NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_scrape_cache_expires_at ON scrape_cache(expires_at);
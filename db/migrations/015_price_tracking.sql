@@ -0,0 +1,25 @@
+-- Migration 015: Suivi des prix des articles
+-- item_price_tracking: état du suivi par article (validateurs HTTP, prochaine vérification)
+-- item_price_history: une ligne par changement de prix observé (pas de ligne si inchangé)
+
+CREATE TABLE IF NOT EXISTS item_price_tracking (
+    item_id INTEGER PRIMARY KEY REFERENCES items(id) ON DELETE CASCADE,
+    url TEXT,
+    etag VARCHAR(256),
+    last_modified VARCHAR(64),
+    last_price NUMERIC(10,2),
+    currency CHAR(3),
+    last_checked_at TIMESTAMP,
+    next_check_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    failures SMALLINT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_item_price_tracking_next_check ON item_price_tracking(next_check_at);
+
+CREATE TABLE IF NOT EXISTS item_price_history (
+    item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+    observed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    price NUMERIC(10,2) NOT NULL,
+    currency CHAR(3),
+    PRIMARY KEY (item_id, observed_at)
+);
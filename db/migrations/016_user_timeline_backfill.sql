@@ -0,0 +1,10 @@
+-- Migration 016: Rattrapage des timelines d'activités (ACTIVITY_FEED_STRATEGY=write)
+-- Une ligne par utilisateur dont la timeline a été initialisée avec son historique
+-- (feed calculé à la lecture) lors de sa première consultation du feed.
+
+CREATE TABLE IF NOT EXISTS user_timeline_backfill (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    backfilled_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE user_timeline_backfill IS 'Timelines initialisées avec l''historique existant';
@@ -0,0 +1,9 @@
+-- Migration 017: Prix de référence du suivi des prix
+-- Le suivi était initialisé avec le prix saisi dans l'article, ce qui pouvait notifier
+-- une "baisse" dès la première vérification. La référence est désormais le premier prix
+-- observé: les prix jamais observés (aucun historique) sont remis à NULL.
+
+UPDATE item_price_tracking t
+SET last_price = NULL
+WHERE t.last_price IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM item_price_history h WHERE h.item_id = t.item_id);
@@ -7,6 +7,7 @@ import api from '../../../shared/utils/api';
 
 interface LogEntry {
   id: number;
+  source: 'activity' | 'audit';
   created_at: string;
   action: string;
   target_type: string;
@@ -235,7 +236,7 @@ export default function AdminLogs() {
                   </thead>
                   <tbody className="divide-y divide-white/5">
                     {logs.map((log: any) => (
-                      <tr key={log.id} className="hover:bg-white/5">
+                      <tr key={`${log.source}-${log.id}`} className="hover:bg-white/5">
                         <td className="px-4 py-3 text-xs text-gray-500 whitespace-nowrap">
                           {formatTimestamp(log.created_at)}
                         </td>